@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark Toolkit - Time checks and exporters on synthetic large hosts
+
+A synthetic host mocks psutil the same way the unit tests do, but at fleet
+scale: thousands of partitions, logged-in sessions, network interfaces and
+processes, plus a real syslog and passwd/shadow files with tens of
+thousands of accounts. Every ``check_*`` method, ``list_users`` and every
+``export_report_*`` method is timed over several repetitions, and peak
+memory is measured with tracemalloc in a separate pass so tracing does
+not skew the timings.
+
+Results are written as JSON. ``--compare`` checks a new run against a saved
+baseline and exits non-zero when anything got slower or hungrier than the
+allowed threshold.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime
+from unittest.mock import patch
+
+from it_support_toolkit import CPUSampler, ITSupportToolkit
+
+
+BENCHMARK_VERSION = 1
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+# Size of the synthetic host at --scale 1
+DEFAULT_SCALE = {
+    'partitions': 5000,
+    'sessions': 10000,
+    'passwd_entries': 50000,
+    'interfaces': 500,
+    'processes': 50000,
+    'log_lines': 100000,
+}
+
+SYNTHETIC_MOUNT_ROOT = '/bench'
+
+_Partition = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+_Usage = namedtuple('sdiskusage', 'total used free percent')
+_User = namedtuple('suser', 'name terminal host started pid')
+_Address = namedtuple('snicaddr', 'family address netmask broadcast ptp')
+_StatResult = namedtuple('stat_result', 'st_dev')
+_CpuTimes = namedtuple('pcputimes', 'user system')
+_MemoryInfo = namedtuple('pmem', 'rss vms')
+_NicCounters = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv '
+                                    'errin errout dropin dropout')
+_NicStats = namedtuple('snicstats', 'isup duplex speed mtu')
+
+
+class _Process:
+    """Stand-in for psutil.Process as returned by process_iter(attrs)."""
+    
+    __slots__ = ('pid', 'info')
+    
+    def __init__(self, pid, info):
+        self.pid = pid
+        self.info = info
+    
+    def username(self):
+        return 'bench'
+
+
+class SyntheticHost:
+    """Fake a large host by patching psutil and pointing the toolkit at big account files."""
+    
+    def __init__(self, partitions, sessions, passwd_entries, interfaces, processes,
+                 log_lines, workdir):
+        self.sizes = {'partitions': partitions, 'sessions': sessions,
+                      'passwd_entries': passwd_entries, 'interfaces': interfaces,
+                      'processes': processes, 'log_lines': log_lines}
+        self.partitions = [
+            _Partition(f'/dev/bench{i}', f'{SYNTHETIC_MOUNT_ROOT}/{i}', 'ext4', 'rw')
+            for i in range(partitions)
+        ]
+        self.sessions = [
+            _User(f'user{i}', f'pts/{i}', f'10.0.{i // 250}.{i % 250}', 1700000000.0 + i, i)
+            for i in range(sessions)
+        ]
+        self.interfaces = {
+            f'eth{i}': [_Address(2, f'10.{i // 250}.{i % 250}.1', '255.255.255.0', None, None)]
+            for i in range(interfaces)
+        }
+        self.nic_counters = {
+            f'eth{i}': _NicCounters(i * 10**6, i * 10**7, i * 10**3, i * 10**4, 0, 0, i % 7, 0)
+            for i in range(interfaces)
+        }
+        self.nic_stats = {f'eth{i}': _NicStats(True, 2, 1000, 1500) for i in range(interfaces)}
+        self.processes = [
+            _Process(i, {'name': f'worker{i % 50}', 'create_time': 1700000000.0,
+                         'cpu_times': _CpuTimes(i % 997 / 10, i % 89 / 10),
+                         'memory_info': _MemoryInfo((i % 4099) * 1024**2, 0)})
+            for i in range(processes)
+        ]
+        self._toolkits = []
+        self.passwd_path = os.path.join(workdir, 'passwd')
+        self.shadow_path = os.path.join(workdir, 'shadow')
+        self._write_account_files(passwd_entries)
+        self.log_path = os.path.join(workdir, 'syslog')
+        self._write_log(log_lines)
+    
+    def _write_account_files(self, count):
+        with open(self.passwd_path, 'w') as passwd, open(self.shadow_path, 'w') as shadow:
+            passwd.write(''.join(f'bench{i}:x:{1000 + i}:{1000 + i}::/home/bench{i}:/bin/bash\n'
+                                 for i in range(count)))
+            # Mix of expiring, never-expiring and must-change accounts
+            shadow.write(''.join(
+                f'bench{i}:$6$hash:{0 if i % 97 == 0 else 19000 + i % 365}:0:'
+                f'{99999 if i % 3 == 0 else 90}:7:::\n'
+                for i in range(count)
+            ))
+    
+    def _write_log(self, count):
+        # Mostly routine lines, with an error every 50 and an auth failure every 200
+        with open(self.log_path, 'w') as log:
+            log.write(''.join(
+                f'Jan  1 00:00:{i % 60:02d} bench sshd[{i}]: Failed password for bench{i}\n'
+                if i % 200 == 0 else
+                f'Jan  1 00:00:{i % 60:02d} bench app[{i}]: request failed with error {i}\n'
+                if i % 50 == 0 else
+                f'Jan  1 00:00:{i % 60:02d} bench app[{i}]: handled request {i} in 12 ms\n'
+                for i in range(count)
+            ))
+    
+    @staticmethod
+    def _fake_stat(real_stat):
+        def fake_stat(path, *args, **kwargs):
+            if isinstance(path, str) and path.startswith(SYNTHETIC_MOUNT_ROOT + '/'):
+                return _StatResult(st_dev=int(path.rsplit('/', 1)[1]))
+            return real_stat(path, *args, **kwargs)
+        return fake_stat
+    
+    def patches(self):
+        """Context manager that makes psutil and os.stat describe this host."""
+        usage = _Usage(500 * 1024**3, 200 * 1024**3, 300 * 1024**3, 40.0)
+        stack = contextlib.ExitStack()
+        stack.enter_context(patch('psutil.disk_partitions', return_value=self.partitions))
+        stack.enter_context(patch('psutil.disk_usage', return_value=usage))
+        stack.enter_context(patch('os.stat', new=self._fake_stat(os.stat)))
+        stack.enter_context(patch('psutil.process_iter',
+                                  side_effect=lambda *args, **kwargs: iter(self.processes)))
+        stack.enter_context(patch('psutil.users', return_value=self.sessions))
+        stack.enter_context(patch('psutil.net_if_addrs', return_value=self.interfaces))
+        stack.enter_context(patch('psutil.net_io_counters', return_value=self.nic_counters))
+        stack.enter_context(patch('psutil.net_if_stats', return_value=self.nic_stats))
+        stack.enter_context(patch('platform.system', return_value='Linux'))
+        stack.enter_context(patch.object(CPUSampler, 'usage',
+                                         return_value={'percent': 12.5, 'per_core': [12.5],
+                                                       'seconds': 60.0}))
+        return stack
+    
+    def toolkit(self):
+        """Return a fresh toolkit (empty cache) wired to the synthetic host."""
+        toolkit = ITSupportToolkit()
+        toolkit.passwd_path = self.passwd_path
+        toolkit.shadow_path = self.shadow_path
+        toolkit.probe_targets = []
+        toolkit.process_interval = 0  # Time the two process passes, not the sleep
+        toolkit.traffic_interval = 0
+        toolkit.log_files = [self.log_path]
+        self._toolkits.append(toolkit)
+        return toolkit
+    
+    def close(self):
+        """Stop the CPU samplers started by the benchmarked toolkits."""
+        for toolkit in self._toolkits:
+            toolkit.cpu_sampler.stop()
+        self._toolkits = []
+
+
+# Benchmarked callables: name -> (toolkit method, synthetic size driving its work)
+CHECK_BENCHMARKS = {
+    'check_disk_space': ('check_disk_space', 'partitions'),
+    'check_cpu_ram': ('check_cpu_ram', None),
+    'check_top_processes': ('check_top_processes', 'processes'),
+    'list_users': ('list_users', 'sessions'),
+    'check_network_connectivity': ('check_network_connectivity', 'interfaces'),
+    'check_interface_traffic': ('check_interface_traffic', 'interfaces'),
+    'check_password_expiry': ('check_password_expiry', 'passwd_entries'),
+    'check_logs': ('check_logs', 'log_lines'),
+}
+EXPORT_BENCHMARKS = ('txt', 'csv', 'json', 'ndjson', 'sqlite')
+
+
+def _report_records(report_data):
+    """Count the records an exporter has to write."""
+    checks = report_data['checks']
+    network = checks.get('network') or {}
+    processes = checks.get('processes') or {}
+    logs = checks.get('logs') or {}
+    traffic = checks.get('traffic') or {}
+    return (len(checks.get('disk_space') or []) + len(checks.get('users') or [])
+            + len(processes.get('top_cpu', [])) + len(processes.get('top_memory', []))
+            + len(logs.get('files', [])) + len(traffic.get('interfaces', []))
+            + len(checks.get('password_expiry') or [])
+            + len(network.get('interfaces', [])) + len(network.get('connectivity_tests', []))
+            + 2)
+
+
+def _measure(func, repeats):
+    """Return (timings, peak bytes): timed runs first, then one tracemalloc run."""
+    timings = []
+    for _ in range(repeats):
+        run = func()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    
+    run = func()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def _summary(timings, peak, items):
+    best = min(timings)
+    return {
+        'items': items,
+        'runs': len(timings),
+        'min_seconds': round(best, 6),
+        'median_seconds': round(statistics.median(timings), 6),
+        'items_per_second': round(items / best, 1) if items and best else None,
+        'peak_memory_bytes': peak,
+    }
+
+
+def run_benchmarks(scale=1.0, repeats=DEFAULT_REPEATS, only=None):
+    """Build a synthetic host and benchmark every check and exporter on it."""
+    sizes = {name: max(1, int(count * scale)) for name, count in DEFAULT_SCALE.items()}
+    results = {}
+    console = open(os.devnull, 'w')
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        host = SyntheticHost(workdir=workdir, **sizes)
+        with host.patches(), contextlib.redirect_stdout(console):
+            for name, (method, size_key) in CHECK_BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                
+                def prepare(method=method):
+                    toolkit = host.toolkit()
+                    return getattr(toolkit, method)
+                
+                timings, peak = _measure(prepare, repeats)
+                results[name] = _summary(timings, peak, sizes[size_key] if size_key else 1)
+            
+            # Exporters run on a report holding every synthetic record
+            populated = host.toolkit()
+            for method, _ in CHECK_BENCHMARKS.values():
+                getattr(populated, method)()
+            items = _report_records(populated.report_data)
+            
+            for export_format in EXPORT_BENCHMARKS:
+                name = f'export_report_{export_format}'
+                if only and name not in only:
+                    continue
+                target = os.path.join(workdir, f'report.{export_format}')
+                
+                def prepare(export_format=export_format, target=target):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    export = getattr(populated, f'export_report_{export_format}')
+                    return lambda: export(target)
+                
+                timings, peak = _measure(prepare, repeats)
+                results[name] = _summary(timings, peak, items)
+        host.close()
+    console.close()
+    
+    return {
+        'version': BENCHMARK_VERSION,
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': f"{platform.system()} {platform.release()}",
+        'sizes': sizes,
+        'repeats': repeats,
+        'results': results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare two benchmark runs.
+    
+    Returns a list of ``(name, metric, before, after, change)`` rows and
+    the subset that regressed by more than ``threshold`` (0.2 = 20%).
+    """
+    rows, regressions = [], []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        for metric in ('min_seconds', 'peak_memory_bytes'):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            row = (name, metric, old, new, change)
+            rows.append(row)
+            if change > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def _format_value(metric, value):
+    if metric == 'peak_memory_bytes':
+        return f"{value / 1024**2:.1f} MB"
+    return f"{value * 1000:.1f} ms"
+
+
+def display_results(report):
+    sizes = report['sizes']
+    print(f"Synthetic host: {sizes['partitions']} partitions, {sizes['sessions']} sessions, "
+          f"{sizes['passwd_entries']} passwd entries, {sizes['interfaces']} interfaces, "
+          f"{sizes['processes']} processes, {sizes['log_lines']} log lines")
+    print(f"{'Benchmark':<30} {'Min':>10} {'Median':>10} {'Items/s':>12} {'Peak mem':>10}")
+    print("-" * 76)
+    for name, result in report['results'].items():
+        rate = f"{result['items_per_second']:,.0f}" if result['items_per_second'] else '-'
+        print(f"{name:<30} {_format_value('min_seconds', result['min_seconds']):>10} "
+              f"{_format_value('min_seconds', result['median_seconds']):>10} {rate:>12} "
+              f"{_format_value('peak_memory_bytes', result['peak_memory_bytes']):>10}")
+
+
+def display_comparison(rows, regressions, threshold):
+    print(f"\n{'Benchmark':<30} {'Metric':<8} {'Before':>10} {'After':>10} {'Change':>8}")
+    print("-" * 70)
+    for name, metric, old, new, change in rows:
+        flag = " ⚠️" if change > threshold else ""
+        label = 'time' if metric == 'min_seconds' else 'memory'
+        print(f"{name:<30} {label:<8} {_format_value(metric, old):>10} "
+              f"{_format_value(metric, new):>10} {change:>+7.1%}{flag}")
+    
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) above {threshold:.0%}")
+    else:
+        print(f"\n✓ No regressions above {threshold:.0%}")
+
+
+def main():
+    """Run the benchmark suite and optionally compare with a baseline."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Benchmark IT support checks and exporters on a synthetic large host',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                  # Full-size run, saved to benchmark_results.json
+  %(prog)s --scale 0.1 --repeats 5          # Smaller host, more repetitions
+  %(prog)s --only list_users --only export_report_csv
+  %(prog)s -o after.json --compare before.json --threshold 0.1
+        """
+    )
+    parser.add_argument('--scale', type=float, default=1.0,
+                       help='Multiply the synthetic host size (default: 1.0 = '
+                            + ', '.join(f"{count} {name}" for name, count in DEFAULT_SCALE.items())
+                            + ')')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                       help=f'Timed runs per benchmark (default: {DEFAULT_REPEATS})')
+    parser.add_argument('--only', action='append', metavar='NAME',
+                       help='Only run this benchmark (repeatable)')
+    parser.add_argument('--output', '-o', default=DEFAULT_OUTPUT,
+                       help=f'JSON results file (default: {DEFAULT_OUTPUT})')
+    parser.add_argument('--compare', metavar='BASELINE',
+                       help='Compare against a previous results file; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help='Allowed slowdown / memory growth before a change counts '
+                            f'as a regression (default: {DEFAULT_THRESHOLD})')
+    args = parser.parse_args()
+    
+    report = run_benchmarks(args.scale, args.repeats, args.only)
+    display_results(report)
+    
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results saved to: {os.path.abspath(args.output)}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('sizes') != report['sizes']:
+            print("⚠️  Baseline was recorded with a different host size; "
+                  "comparison may be misleading.")
+        rows, regressions = compare_results(baseline, report, args.threshold)
+        display_comparison(rows, regressions, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
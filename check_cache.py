@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Check Cache - Memoize slow-changing check facts between runs
+
+Much of what the checks collect rarely changes: core counts, interface
+addresses, the partition table and password expiry dates. Each cached
+value is stored with an expiry time and a fingerprint of what it depends
+on (boot ID, mount table, passwd/shadow file signatures, ...). A value is
+reused only while it is fresh and its fingerprint still matches, so a
+reboot, a new mount or a password change invalidates it immediately.
+
+The cache is kept in memory and, when given a path, persisted as JSON in
+the toolkit state directory so separate runs share it.
+"""
+
+import os
+import threading
+import time
+import zlib
+
+
+STATE_DIR_ENV = 'IT_SUPPORT_STATE_DIR'
+DEFAULT_STATE_DIR = '~/.cache/it-support-toolkit'
+CACHE_FILENAME = 'check_cache.json'
+CACHE_VERSION = 2
+
+BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+MOUNTS_PATH = '/proc/mounts'
+
+# Seconds each cached fact stays valid, even if its fingerprint is unchanged
+CACHE_TTLS = {
+    'cpu_static': 24 * 3600,
+    'interfaces': 60,
+    # Previous interface counters; older samples are too coarse to show saturation
+    'net_counters': 900,
+    'partitions': 300,
+    'partitions_all': 300,
+    'password_expiry': 3600,
+}
+
+
+def state_dir():
+    """Return the toolkit state directory (``$IT_SUPPORT_STATE_DIR`` overrides)."""
+    return os.path.expanduser(os.environ.get(STATE_DIR_ENV) or DEFAULT_STATE_DIR)
+
+
+def default_cache_path():
+    return os.path.join(state_dir(), CACHE_FILENAME)
+
+
+def boot_id(path=BOOT_ID_PATH):
+    """Return an identifier that changes on every reboot."""
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        import psutil
+        return str(psutil.boot_time())
+
+
+def file_signature(path):
+    """Return ``[mtime_ns, size, inode]`` of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def directory_signature(path):
+    """Return the sorted entries of a directory, or None if it cannot be listed."""
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return None
+
+
+def content_signature(path):
+    """
+    Return a checksum of a file's contents, or None if it cannot be read.
+    
+    Used for procfs files such as /proc/mounts whose mtime never changes.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return zlib.crc32(f.read())
+    except OSError:
+        return None
+
+
+def write_state_file(path, data):
+    """
+    Atomically write ``data`` as JSON to a private (0600) state file.
+    
+    Raises OSError or TypeError; callers decide how loudly to fail.
+    """
+    import json
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    # State files hold account and filesystem details; keep them private
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class CheckCache:
+    """Thread-safe TTL cache whose entries are invalidated by fingerprints."""
+    
+    def __init__(self, path=None, ttls=None):
+        self.path = os.fspath(path) if path else None
+        self.ttls = dict(CACHE_TTLS)
+        self.ttls.update(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._load()
+    
+    def _load(self):
+        import json
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+            self._entries = data.get('entries', {})
+    
+    def save(self):
+        """Write the cache to its path if anything changed since the last save."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'version': CACHE_VERSION, 'entries': self._entries}
+            self._dirty = False
+        try:
+            write_state_file(self.path, data)
+        except (OSError, TypeError) as e:
+            print(f"⚠️  Could not save check cache {self.path}: {e}")
+    
+    def get(self, key, fingerprint=None):
+        """Return ``(hit, value)`` for a cached entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None and entry['expires'] > time.time()
+                    and entry['fingerprint'] == fingerprint):
+                self.hits += 1
+                return True, entry['value']
+            self.misses += 1
+            return False, None
+    
+    def put(self, key, value, fingerprint=None, ttl=None):
+        if ttl is None:
+            ttl = self.ttls.get(key, 0)
+        with self._lock:
+            self._entries[key] = {'value': value, 'fingerprint': fingerprint,
+                                  'expires': time.time() + ttl}
+            self._dirty = True
+    
+    def get_or_compute(self, key, compute, fingerprint=None, ttl=None):
+        """
+        Return the cached value for ``key``, calling ``compute()`` on a miss.
+        
+        ``fingerprint`` must be JSON-compatible (lists rather than tuples) so
+        it compares equal after a round trip through the cache file.
+        """
+        hit, value = self.get(key, fingerprint)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, value, fingerprint, ttl)
+        return value
+    
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._dirty = True
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Directory Analyzer - Find what is filling a mount
+
+Walks a directory tree with parallel ``os.scandir`` workers, staying on
+the filesystem it started on, and reports the largest directories (by
+total size of their subtree) and the largest files. Sizes are allocated
+bytes, as ``du`` reports them.
+
+What a directory contains is remembered in a persisted cache keyed by
+the directory's mtime. A directory whose mtime is unchanged has not had
+entries added, removed or renamed, so its file sizes and subdirectory
+list are reused without listing it or stat'ing its files. Only the
+subdirectories are stat'ed to see whether they changed. Repeat scans of
+large volumes therefore cost one stat per directory instead of one per
+file. Files growing in place do not change their directory's mtime, so
+a cached volume is rescanned in full once its cache is older than
+``DEFAULT_CACHE_MAX_AGE``.
+"""
+
+import heapq
+import os
+import queue
+import stat
+import threading
+import time
+
+from check_cache import state_dir, write_state_file
+
+
+DEFAULT_TOP_K = 10
+DEFAULT_SCAN_WORKERS = 16
+DEFAULT_CACHE_MAX_AGE = 24 * 3600
+DIR_CACHE_FILENAME = 'dir_sizes.json'
+DIR_CACHE_VERSION = 1
+
+
+def default_dir_cache_path():
+    return os.path.join(state_dir(), DIR_CACHE_FILENAME)
+
+
+def _allocated_bytes(st):
+    """Bytes a file occupies on disk (st_blocks is unavailable on Windows)."""
+    blocks = getattr(st, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+class DirectorySizeCache:
+    """
+    Per-directory listings of previous scans, keyed by scan root.
+    
+    Each directory maps to ``[mtime_ns, file bytes, largest files, subdirs]``
+    where largest files are ``[bytes, name]`` pairs (at most top-K).
+    """
+    
+    def __init__(self, path=None, max_age=DEFAULT_CACHE_MAX_AGE):
+        self.path = os.fspath(path) if path else None
+        self.max_age = max_age
+        self._roots = {}
+        if self.path is not None:
+            self._load()
+    
+    def _load(self):
+        import json
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == DIR_CACHE_VERSION:
+            self._roots = data.get('roots', {})
+    
+    def get(self, root, device):
+        """Return the cached directories of ``root``, or {} if stale or missing."""
+        entry = self._roots.get(root)
+        if (entry is None or entry['device'] != device
+                or time.time() - entry['scanned_at'] > self.max_age):
+            return {}
+        return entry['dirs']
+    
+    def put(self, root, device, dirs, scanned_at=None):
+        """
+        Store a scan; ``scanned_at`` is kept from the last full scan, so the
+        cache still expires on schedule when it keeps being reused.
+        """
+        self._roots[root] = {'device': device, 'dirs': dirs,
+                             'scanned_at': scanned_at or time.time()}
+    
+    def scanned_at(self, root):
+        entry = self._roots.get(root)
+        return entry['scanned_at'] if entry else None
+    
+    def save(self):
+        if self.path is None:
+            return
+        try:
+            write_state_file(self.path, {'version': DIR_CACHE_VERSION, 'roots': self._roots})
+        except (OSError, TypeError) as e:
+            print(f"⚠️  Could not save directory cache {self.path}: {e}")
+
+
+def analyze_directory(root, top=DEFAULT_TOP_K, workers=DEFAULT_SCAN_WORKERS, cache=None):
+    """
+    Find the largest directories and files under ``root``.
+    
+    Returns a dict with ``total_bytes``, ``largest_directories`` and
+    ``largest_files`` (lists of ``(bytes, path)``, largest first) and scan
+    counters: ``scanned`` directories listed, ``reused`` directories taken
+    from ``cache`` and ``errors`` directories that could not be read.
+    Mountpoints and symlinks below ``root`` are not followed.
+    """
+    start = time.perf_counter()
+    root = os.path.abspath(root)
+    root_stat = os.stat(root)
+    device = root_stat.st_dev
+    cached = cache.get(root, device) if cache is not None else {}
+    
+    # relative path -> [mtime_ns, file bytes, largest files, subdirs]
+    dirs = {}
+    counts = {'scanned': 0, 'reused': 0, 'errors': 0}
+    lock = threading.Lock()
+    pending = queue.Queue()
+    
+    def count(name):
+        with lock:
+            counts[name] += 1
+    
+    def list_directory(path):
+        file_bytes, files, subdirs = 0, [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_dev == device:
+                            subdirs.append((entry.name, st.st_mtime_ns))
+                    elif entry.is_file(follow_symlinks=False):
+                        size = _allocated_bytes(entry.stat(follow_symlinks=False))
+                        file_bytes += size
+                        if len(files) < top:
+                            heapq.heappush(files, (size, entry.name))
+                        elif size > files[0][0]:
+                            heapq.heapreplace(files, (size, entry.name))
+                except OSError:
+                    continue  # Removed while scanning
+        return file_bytes, [list(item) for item in files], subdirs
+    
+    def reuse_directory(path, entry):
+        subdirs = []
+        for name in entry[3]:
+            try:
+                st = os.stat(os.path.join(path, name), follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode) and st.st_dev == device:
+                subdirs.append((name, st.st_mtime_ns))
+        return entry[1], entry[2], subdirs
+    
+    def worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            relpath, mtime_ns = item
+            try:
+                path = os.path.join(root, relpath) if relpath else root
+                entry = cached.get(relpath)
+                if entry is not None and entry[0] == mtime_ns:
+                    file_bytes, files, subdirs = reuse_directory(path, entry)
+                    count('reused')
+                else:
+                    file_bytes, files, subdirs = list_directory(path)
+                    count('scanned')
+                dirs[relpath] = [mtime_ns, file_bytes, files, [name for name, _ in subdirs]]
+                for name, child_mtime in subdirs:
+                    pending.put((os.path.join(relpath, name), child_mtime))
+            except OSError:
+                count('errors')
+            finally:
+                pending.task_done()
+    
+    pending.put(('', root_stat.st_mtime_ns))
+    threads = [threading.Thread(target=worker, name='dir-scan', daemon=True)
+               for _ in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+    pending.join()
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    
+    # Add each directory's total to its parent, deepest first
+    totals = {relpath: entry[1] for relpath, entry in dirs.items()}
+    for relpath in sorted(totals, key=lambda relpath: relpath.count(os.sep), reverse=True):
+        if relpath:
+            parent = os.path.dirname(relpath)
+            if parent in totals:
+                totals[parent] += totals[relpath]
+    
+    largest_dirs = heapq.nlargest(
+        top, ((size, os.path.join(root, relpath)) for relpath, size in totals.items() if relpath))
+    largest_files = heapq.nlargest(
+        top, ((size, os.path.join(root, relpath, name))
+              for relpath, entry in dirs.items() for size, name in entry[2]))
+    
+    if cache is not None:
+        # Keep the age of the last full scan while anything is being reused
+        scanned_at = cache.scanned_at(root) if cached and counts['reused'] else None
+        cache.put(root, device, dirs, scanned_at)
+    
+    return {
+        'path': root,
+        'total_bytes': totals.get('', 0),
+        'largest_directories': largest_dirs,
+        'largest_files': largest_files,
+        'elapsed_s': round(time.perf_counter() - start, 3),
+        **counts,
+    }
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+
+def display_analysis(result):
+    print(f"\n{result['path']}: {_format_bytes(result['total_bytes'])} "
+          f"({result['scanned']} directories listed, {result['reused']} reused from cache, "
+          f"{result['errors']} unreadable) in {result['elapsed_s']} s")
+    print("Largest directories:")
+    for size, path in result['largest_directories']:
+        print(f"  {_format_bytes(size):>10}  {path}")
+    print("Largest files:")
+    for size, path in result['largest_files']:
+        print(f"  {_format_bytes(size):>10}  {path}")
+
+
+def main():
+    """Analyze one or more directories from the command line."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Find the largest directories and files on a filesystem',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s /var                  # Top 10 directories and files under /var
+  %(prog)s / --top 25 --workers 32
+  %(prog)s /srv --no-cache       # Ignore (and do not update) the size cache
+        """
+    )
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                       help='Directory (usually a mountpoint) to analyze')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_K,
+                       help=f'Directories and files to report (default: {DEFAULT_TOP_K})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_SCAN_WORKERS,
+                       help=f'Parallel scandir workers (default: {DEFAULT_SCAN_WORKERS})')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='List every directory instead of reusing unchanged ones')
+    args = parser.parse_args()
+    
+    cache = DirectorySizeCache(None if args.no_cache else default_dir_cache_path())
+    for path in args.paths:
+        try:
+            result = analyze_directory(path, top=args.top, workers=args.workers, cache=cache)
+        except OSError as e:
+            print(f"✗ Could not analyze {path}: {e}")
+            continue
+        display_analysis(result)
+    cache.save()
+
+
+if __name__ == '__main__':
+    main()
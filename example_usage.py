@@ -3,7 +3,7 @@
 Example script demonstrating usage of the IT Support Toolkit
 """
 
-from it_support_toolkit import ITSupportToolkit
+from it_support_toolkit import ITSupportToolkit, ConsoleRenderer
 
 def basic_example():
     """Run all checks and export to all formats."""
@@ -18,13 +18,16 @@ def specific_checks_example():
     
     toolkit = ITSupportToolkit()
     
-    # Run individual checks
+    # Run individual checks; they only collect data and print nothing
     print("Running disk space check only...")
     toolkit.check_disk_space()
     
     print("\nRunning CPU/RAM check only...")
     toolkit.check_cpu_ram()
     
+    # Render what was collected, one status line per check
+    print(ConsoleRenderer('summary').report(toolkit.report_data), end='')
+    
     # Export results
     toolkit.export_report_txt("specific_checks_report.txt")
 
@@ -34,7 +37,7 @@ def custom_report_example():
     
     toolkit = ITSupportToolkit()
     
-    # Check resources
+    # Check resources; used as a library, the checks have no output overhead
     disk_info = toolkit.check_disk_space()
     cpu_data, ram_data = toolkit.check_cpu_ram()
     
@@ -42,7 +45,7 @@ def custom_report_example():
     warnings = []
     
     for disk in disk_info:
-        if disk['percent_used'] > 80:
+        if (disk['percent_used'] or 0) > 80:
             warnings.append(f"High disk usage on {disk['device']}: {disk['percent_used']}%")
     
     if cpu_data['usage_percent'] > 80:
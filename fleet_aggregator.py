@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Fleet Aggregator - Collect IT support reports from many hosts over HTTP
+
+Agents POST their ``report_data`` (one JSON object, or a JSON array of them)
+to ``/reports``. Accepted reports go into a bounded queue and a single
+writer thread stores them in the SQLite history store in batches. When the
+queue is full the aggregator answers ``503`` with ``Retry-After`` so agents
+back off instead of overwhelming the writer.
+"""
+
+import json
+import queue
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from history_store import HistoryStore
+from http_handlers import KeepAliveHandler
+from report_records import compact_report
+
+
+DEFAULT_PORT = 8740
+DEFAULT_FLEET_DB = 'it_support_fleet.db'
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_INTERVAL = 1.0
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+RETRY_AFTER_SECONDS = 1
+
+
+def _valid_report(report):
+    """Return True if a decoded JSON value looks like a toolkit report."""
+    return (isinstance(report, dict)
+            and isinstance(report.get('hostname'), str)
+            and isinstance(report.get('timestamp'), str)
+            and isinstance(report.get('checks', {}), dict))
+
+
+class _IngestHandler(KeepAliveHandler):
+    """HTTP handler; ``server.aggregator`` is the owning FleetAggregator."""
+    
+    def setup(self):
+        super().setup()
+        self.server.aggregator._count('connections')
+    
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, self.server.aggregator.stats())
+        else:
+            self._reply(404, {'error': 'not found'})
+    
+    def do_POST(self):
+        aggregator = self.server.aggregator
+        if self.path != '/reports':
+            self._reply(404, {'error': 'not found'})
+            return
+        
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self.close_connection = True
+            self._reply(411, {'error': 'Content-Length required'})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._reply(413, {'error': 'request too large'})
+            return
+        
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(400, {'error': 'invalid JSON'})
+            return
+        
+        reports = body if isinstance(body, list) else [body]
+        if not reports or not all(_valid_report(report) for report in reports):
+            self._reply(400, {'error': 'expected report object(s) with hostname, '
+                                       'timestamp and checks'})
+            return
+        
+        # Queued reports can pile up by the thousand; store their records compactly
+        accepted = aggregator.submit([compact_report(report) for report in reports])
+        if accepted < len(reports):
+            aggregator._count('rejected', len(reports) - accepted)
+            self._reply(503, {'error': 'ingest queue full', 'accepted': accepted},
+                        {'Retry-After': str(RETRY_AFTER_SECONDS)})
+            return
+        self._reply(202, {'accepted': accepted})
+
+
+class FleetAggregator:
+    """HTTP ingest server with a bounded queue and a batching storage writer."""
+    
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, db_path=DEFAULT_FLEET_DB,
+                 queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL, store=None):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.store = store or HistoryStore(db_path)
+        self.server = ThreadingHTTPServer((host, port), _IngestHandler)
+        self.server.daemon_threads = True
+        self.server.aggregator = self
+        self._counters = {'connections': 0, 'accepted': 0, 'rejected': 0,
+                          'written': 0, 'skipped': 0, 'batches': 0}
+        self._counter_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+    
+    @property
+    def address(self):
+        """(host, port) the server is listening on."""
+        return self.server.server_address[:2]
+    
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            self._counters[name] += amount
+    
+    def stats(self):
+        """Return ingest counters and the current queue depth."""
+        with self._counter_lock:
+            stats = dict(self._counters)
+        stats['queued'] = self.queue.qsize()
+        return stats
+    
+    def submit(self, reports):
+        """Queue reports without blocking; returns how many fitted in the queue."""
+        accepted = 0
+        for report in reports:
+            try:
+                self.queue.put_nowait(report)
+            except queue.Full:
+                break
+            accepted += 1
+        self._count('accepted', accepted)
+        return accepted
+    
+    def _next_batch(self):
+        """Block for the first report, then gather up to batch_size within batch_interval."""
+        try:
+            batch = [self.queue.get(timeout=self.batch_interval)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _skip_report(self, report, error):
+        self._count('skipped')
+        print(f"⚠️  Skipped malformed report from {report.get('hostname')} "
+              f"at {report.get('timestamp')}: {type(error).__name__}: {error}")
+    
+    def _write_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._count('written', self.store.record_many(batch, self._skip_report))
+                    self._count('batches')
+                except Exception as e:
+                    print(f"⚠️  Could not store {len(batch)} report(s): {e}")
+            elif self._stopping.is_set():
+                return
+    
+    def start(self):
+        """Start the HTTP server and the writer in background threads."""
+        for target, name in ((self.server.serve_forever, 'aggregator-http'),
+                             (self._write_loop, 'aggregator-writer')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+    
+    def stop(self):
+        """Stop accepting reports, drain the queue to storage and close."""
+        self.server.shutdown()
+        self.server.server_close()
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.store.close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Run the fleet aggregator until interrupted."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Collect IT support reports from many hosts over HTTP',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                            # Listen on 0.0.0.0:8740
+  %(prog)s --port 9000 --db fleet.db
+Agents post with: it_support_toolkit.py --post http://aggregator:8740/reports
+        """
+    )
+    parser.add_argument('--bind', default='0.0.0.0',
+                       help='Address to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                       help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--db', default=DEFAULT_FLEET_DB,
+                       help=f'History database for fleet reports (default: {DEFAULT_FLEET_DB})')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                       help=f'Reports buffered before agents are told to back off '
+                            f'(default: {DEFAULT_QUEUE_SIZE})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help=f'Reports per storage transaction (default: {DEFAULT_BATCH_SIZE})')
+    args = parser.parse_args()
+    
+    aggregator = FleetAggregator(args.bind, args.port, args.db,
+                                 queue_size=args.queue_size,
+                                 batch_size=args.batch_size).start()
+    host, port = aggregator.address
+    print(f"✓ Fleet aggregator listening on {host}:{port} (storing in {args.db})")
+    print("Press Ctrl+C to stop.")
+    
+    try:
+        while True:
+            time.sleep(60)
+            stats = aggregator.stats()
+            print(f"Accepted: {stats['accepted']} | Written: {stats['written']} | "
+                  f"Skipped: {stats['skipped']} | Rejected: {stats['rejected']} | "
+                  f"Queued: {stats['queued']}")
+    except KeyboardInterrupt:
+        print("\nStopping aggregator...")
+    finally:
+        aggregator.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+History Store - Append-only SQLite history of IT support reports
+
+Every report is stored as one row in ``runs`` plus normalised rows in one
+table per check. Each check table carries the host and timestamp of its run
+and is indexed on them, so range queries such as "RAM % on this host over
+the last 7 days" are answered from an index instead of re-parsing report
+files.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+DEFAULT_HISTORY_DB = 'it_support_history.db'
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Raised by reports whose records lack fields or hold values SQLite cannot bind
+MALFORMED_REPORT_ERRORS = (LookupError, TypeError, ValueError, AttributeError,
+                           sqlite3.IntegrityError, sqlite3.InterfaceError)
+
+# Check tables: report key -> (table, columns). Every table also gets
+# run_id, host and ts columns plus an index on (host, ts).
+CHECK_TABLES = {
+    'disk_space': ('disk_space', (
+        ('device', 'TEXT'), ('mountpoint', 'TEXT'), ('filesystem', 'TEXT'),
+        ('total_gb', 'REAL'), ('used_gb', 'REAL'), ('free_gb', 'REAL'),
+        ('percent_used', 'REAL'),
+    )),
+    'cpu': ('cpu', (
+        ('usage_percent', 'REAL'), ('physical_cores', 'INTEGER'),
+        ('logical_cores', 'INTEGER'), ('current_freq_mhz', 'REAL'),
+        ('max_freq_mhz', 'REAL'),
+    )),
+    'ram': ('ram', (
+        ('total_gb', 'REAL'), ('available_gb', 'REAL'), ('used_gb', 'REAL'),
+        ('percent_used', 'REAL'),
+    )),
+    'users': ('users', (
+        ('name', 'TEXT'), ('terminal', 'TEXT'), ('remote_host', 'TEXT'),
+        ('started', 'TEXT'),
+    )),
+    'password_expiry': ('password_expiry', (
+        ('username', 'TEXT'), ('password_expires', 'TEXT'),
+    )),
+    'network_interfaces': ('network_interfaces', (
+        ('interface', 'TEXT'), ('ip_address', 'TEXT'), ('netmask', 'TEXT'),
+    )),
+    'connectivity': ('connectivity', (
+        ('target_host', 'TEXT'), ('port', 'INTEGER'), ('description', 'TEXT'),
+        ('reachable', 'INTEGER'), ('latency_ms', 'REAL'), ('error', 'TEXT'),
+    )),
+}
+
+# Extra indexes for per-device lookups
+EXTRA_INDEXES = (
+    ('disk_space', ('host', 'mountpoint', 'ts')),
+    ('connectivity', ('host', 'target_host', 'ts')),
+)
+
+
+def _number(value):
+    """Return value if it is numeric, else None (e.g. 'N/A' frequencies)."""
+    return value if isinstance(value, (int, float)) else None
+
+
+def _timestamp(value):
+    """Normalise a datetime or timestamp string for comparisons."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return str(value)
+
+
+def _check_rows(checks):
+    """Yield (report key, row values) for every check record in a report."""
+    for disk in checks.get('disk_space') or []:
+        yield 'disk_space', (
+            disk['device'], disk['mountpoint'], disk['filesystem'],
+            disk['total_gb'], disk['used_gb'], disk['free_gb'], disk['percent_used']
+        )
+    
+    cpu = checks.get('cpu')
+    if cpu:
+        yield 'cpu', (
+            cpu['usage_percent'], cpu['physical_cores'], cpu['logical_cores'],
+            _number(cpu.get('current_freq_mhz')), _number(cpu.get('max_freq_mhz'))
+        )
+    
+    ram = checks.get('ram')
+    if ram:
+        yield 'ram', (
+            ram['total_gb'], ram['available_gb'], ram['used_gb'], ram['percent_used']
+        )
+    
+    for user in checks.get('users') or []:
+        yield 'users', (user['name'], user['terminal'], user['host'], user['started'])
+    
+    pwd_exp = checks.get('password_expiry')
+    if isinstance(pwd_exp, list):
+        for user in pwd_exp:
+            yield 'password_expiry', (user['username'], user['password_expires'])
+    
+    net = checks.get('network') or {}
+    for iface in net.get('interfaces', []):
+        yield 'network_interfaces', (iface['interface'], iface['ip_address'],
+                                     iface['netmask'])
+    for test in net.get('connectivity_tests', []):
+        yield 'connectivity', (
+            test['host'], test['port'], test['description'], int(test['reachable']),
+            test.get('latency_ms'), test.get('error')
+        )
+
+
+class HistoryStore:
+    """Append-only SQLite store for report history."""
+    
+    def __init__(self, path=DEFAULT_HISTORY_DB):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+        self._insert_sql = {
+            key: (f"INSERT INTO {table} (run_id, host, ts, "
+                  f"{', '.join(name for name, _ in columns)}) "
+                  f"VALUES (?, ?, ?, {', '.join('?' for _ in columns)})")
+            for key, (table, columns) in CHECK_TABLES.items()
+        }
+    
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'id INTEGER PRIMARY KEY, host TEXT NOT NULL, ts TEXT NOT NULL, os TEXT)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_host_ts ON runs (host, ts)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs (ts)')
+            
+            for table, columns in CHECK_TABLES.values():
+                column_sql = ', '.join(f"{name} {sql_type}" for name, sql_type in columns)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"run_id INTEGER NOT NULL REFERENCES runs (id), "
+                    f"host TEXT NOT NULL, ts TEXT NOT NULL, {column_sql})"
+                )
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_host_ts ON {table} (host, ts)"
+                )
+            
+            for table, index_columns in EXTRA_INDEXES:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index_columns)} "
+                    f"ON {table} ({', '.join(index_columns)})"
+                )
+    
+    def _insert_report(self, report):
+        """Insert one report; the caller owns the transaction."""
+        host = report['hostname']
+        ts = report['timestamp']
+        cursor = self._conn.execute('INSERT INTO runs (host, ts, os) VALUES (?, ?, ?)',
+                                    (host, ts, report.get('os')))
+        run_id = cursor.lastrowid
+        
+        rows = {}
+        for key, values in _check_rows(report.get('checks', {})):
+            rows.setdefault(key, []).append((run_id, host, ts) + tuple(values))
+        for key, key_rows in rows.items():
+            self._conn.executemany(self._insert_sql[key], key_rows)
+        return run_id
+    
+    def record(self, report):
+        """Append one report (``report_data`` layout); returns its run id."""
+        with self._lock, self._conn:
+            return self._insert_report(report)
+    
+    def record_many(self, reports, on_error=None):
+        """
+        Append many reports in a single transaction; returns the count stored.
+        
+        Each report is inserted under its own savepoint, so a malformed one
+        (e.g. a disk record without a device) is rolled back and skipped
+        instead of discarding the whole batch. ``on_error(report, error)`` is
+        called for every skipped report.
+        """
+        count = 0
+        with self._lock, self._conn:
+            # Opened explicitly: an outermost SAVEPOINT would start (and its
+            # RELEASE commit) a transaction per report
+            self._conn.execute('BEGIN')
+            for report in reports:
+                self._conn.execute('SAVEPOINT report')
+                try:
+                    self._insert_report(report)
+                except MALFORMED_REPORT_ERRORS as e:
+                    self._conn.execute('ROLLBACK TO report')
+                    self._conn.execute('RELEASE report')
+                    if on_error is not None:
+                        on_error(report, e)
+                    continue
+                # Other errors (e.g. a full disk) propagate and roll back the batch
+                self._conn.execute('RELEASE report')
+                count += 1
+        return count
+    
+    def query(self, check, host=None, since=None, until=None, **filters):
+        """
+        Return rows of one check table as dicts, oldest first.
+        
+        ``check`` is a report key from CHECK_TABLES; extra keyword arguments
+        filter on equality (e.g. ``mountpoint='/var'``).
+        """
+        if check not in CHECK_TABLES:
+            raise ValueError(f"Unknown check: {check}")
+        table, columns = CHECK_TABLES[check]
+        valid_columns = {name for name, _ in columns} | {'run_id', 'host', 'ts'}
+        
+        clauses, params = [], []
+        if host is not None:
+            clauses.append('host = ?')
+            params.append(host)
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append('ts <= ?')
+            params.append(_timestamp(until))
+        for column, value in filters.items():
+            if column not in valid_columns:
+                raise ValueError(f"Unknown column for {check}: {column}")
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        
+        sql = f"SELECT * FROM {table}"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ts'
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+    
+    def metric_series(self, check, column, host=None, since=None, until=None, **filters):
+        """Return ``[(timestamp, value), ...]`` for one column of a check."""
+        return [(row['ts'], row[column])
+                for row in self.query(check, host, since, until, **filters)]
+    
+    def hosts(self):
+        """Return all hosts with recorded runs."""
+        with self._lock:
+            return [row['host'] for row in
+                    self._conn.execute('SELECT DISTINCT host FROM runs ORDER BY host')]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Print one metric series from the history database."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Query the IT support report history database',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s ram percent_used --host myserver --days 7
+  %(prog)s disk_space percent_used --host myserver --mountpoint /var
+        """
+    )
+    parser.add_argument('check', choices=sorted(CHECK_TABLES),
+                       help='Check to query')
+    parser.add_argument('column', help='Column to print (e.g. percent_used)')
+    parser.add_argument('--db', default=DEFAULT_HISTORY_DB,
+                       help=f'History database (default: {DEFAULT_HISTORY_DB})')
+    parser.add_argument('--host', help='Only show this host')
+    parser.add_argument('--days', type=float, default=7,
+                       help='How many days back to query (default: 7)')
+    parser.add_argument('--mountpoint', help='Only show this mountpoint (disk_space)')
+    
+    args = parser.parse_args()
+    
+    filters = {'mountpoint': args.mountpoint} if args.mountpoint else {}
+    since = datetime.now() - timedelta(days=args.days)
+    with HistoryStore(args.db) as store:
+        series = store.metric_series(args.check, args.column, args.host, since, **filters)
+    
+    if not series:
+        print("No matching history found.")
+        return
+    for ts, value in series:
+        print(f"{ts}  {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,83 +4,2051 @@ IT Support Automation Toolkit
 A comprehensive tool for automating common IT support health checks and reporting.
 """
 
-import psutil
-import platform
-import socket
-import csv
-import json
-from datetime import datetime
-from pathlib import Path
-import subprocess
+# Only cheap modules are imported here. psutil, asyncio, http.client,
+# subprocess, csv, json, platform, socket, pathlib and concurrent.futures
+# are imported where they are used, so `--help` and single cheap checks do
+# not pay for them on every cron or config-management invocation.
+import os
+from datetime import datetime, date, timedelta
+import signal
+import contextlib
 import sys
+import io
+import time
+import threading
+import queue
+import heapq
+import importlib
+from collections import deque
+from collections.abc import Mapping
+
+from check_cache import (CheckCache, MOUNTS_PATH, boot_id, content_signature,
+                         default_cache_path, directory_signature, file_signature)
+from report_records import (DiskRecord, InterfaceRecord, ProbeResult, ProcessRecord,
+                            TrafficRecord, UserSession, record_default)
+
+
+# Checks executed by run_all_checks, in the order their output is printed
+DEFAULT_CHECKS = (
+    'check_disk_space',
+    'check_cpu_ram',
+    'check_top_processes',
+    'list_users',
+    'check_network_connectivity',
+    'check_interface_traffic',
+    'check_password_expiry',
+    'check_logs',
+)
+DEFAULT_MAX_WORKERS = len(DEFAULT_CHECKS)
+
+# Rolling CPU utilisation windows (seconds) reported by check_cpu_ram
+DEFAULT_CPU_WINDOWS = (1, 10, 60)
+# Share of a window the samples must cover before its average is reported
+CPU_WINDOW_FILL = 0.9
+
+# Watch mode: how often each check is re-sampled, in multiples of the watch interval
+WATCH_CADENCE = {
+    'check_cpu_ram': 1,
+    'check_top_processes': 5,
+    'check_network_connectivity': 5,
+    'check_interface_traffic': 1,
+    'list_users': 5,
+    'check_disk_space': 10,
+    'check_largest_directories': 60,
+    'check_password_expiry': 360,
+    'check_logs': 1,
+}
+DEFAULT_HISTORY_SIZE = 1440
+DEFAULT_FLUSH_INTERVAL = 300
+DEFAULT_HISTORY_FILE = 'it_support_history.ndjson'
+
+
+# Connectivity probe targets used when no target config file is given
+DEFAULT_PROBE_TARGETS = (
+    {'host': '8.8.8.8', 'port': 53, 'description': 'Google DNS'},
+    {'host': '1.1.1.1', 'port': 53, 'description': 'Cloudflare DNS'},
+    {'host': 'google.com', 'port': 80, 'description': 'Google HTTP'},
+)
+DEFAULT_PROBE_CONCURRENCY = 256
+DEFAULT_PROBE_TIMEOUT = 3
+
+# Probe name resolution. getaddrinfo does not report record TTLs, so answers
+# are kept for fixed times (failures briefly) unless the resolver config changes
+DNS_CACHE_TTL = 300
+DNS_NEGATIVE_TTL = 30
+RESOLVER_FILES = ('/etc/hosts', '/etc/resolv.conf')
+# Once one address family has answered, wait this long for the other (RFC 8305)
+DNS_RESOLUTION_DELAY = 0.05
+# Start a connection to the next address if the previous one has not connected yet
+CONNECT_ATTEMPT_DELAY = 0.25
+
+# Disk check: mounts are stat'ed in parallel; one that does not answer within
+# the deadline (e.g. a stale NFS server) is reported as a timeout
+DEFAULT_MOUNT_TIMEOUT = 2.0
+DEFAULT_DISK_WORKERS = 32
+# Mounts used above this percentage are flagged, and analyzed by --largest-dirs
+DISK_WARNING_PERCENT = 80
+
+# Process check: CPU use is measured over one interval shared by every PID.
+# A sample left by the previous run (watch mode) is reused while it is recent.
+DEFAULT_TOP_PROCESSES = 10
+DEFAULT_PROCESS_INTERVAL = 0.5
+PROCESS_SAMPLE_MAX_AGE = 300
+PROCESS_ATTRS = ('name', 'create_time', 'cpu_times', 'memory_info')
+
+# Interface traffic: rates come from the counter snapshot of the previous run
+# (kept in the check cache); without one the check samples for this long
+DEFAULT_TRAFFIC_INTERVAL = 1.0
+NIC_COUNTER_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                      'errin', 'errout', 'dropin', 'dropout')
+
+# Accounts below this UID are system users and skipped by the password check
+MIN_REGULAR_UID = 1000
+# chage treats a maximum password age of 10000 days or more as "never expires"
+CHAGE_NEVER_MAX_DAYS = 10000
+
+# Listing of network devices; a new or removed interface invalidates the cache
+NET_DEVICES_PATH = '/sys/class/net'
+
+
+class _ThreadLocalStdout:
+    """Stdout proxy that diverts writes from worker threads into per-thread buffers."""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def start_capture(self):
+        self._local.buffer = io.StringIO()
+    
+    def stop_capture(self):
+        buffer = getattr(self._local, 'buffer', None)
+        self._local.buffer = None
+        return buffer.getvalue() if buffer is not None else ''
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            return self._stream.write(text)
+        return buffer.write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _cpu_busy_total(times):
+    """Return (busy, total) seconds for a psutil cpu_times entry."""
+    total = sum(times)
+    # On Linux guest time is already included in user/nice time
+    total -= getattr(times, 'guest', 0) + getattr(times, 'guest_nice', 0)
+    busy = total - times.idle - getattr(times, 'iowait', 0)
+    return busy, total
+
+
+class CPUSampler:
+    """
+    Background CPU sampler keeping a rolling window of utilisation deltas.
+    
+    The counters are primed once on construction; every ``interval`` seconds
+    the sampler thread appends the per-core busy/total deltas since the
+    previous sample. Reading the window is instant, so callers never pay the
+    one-second sleep of ``psutil.cpu_percent(interval=1)``.
+    """
+    
+    # Shortest delta worth reporting when no background sample exists yet
+    MIN_SAMPLE_INTERVAL = 0.1
+    
+    def __init__(self, interval=1.0, max_window=max(DEFAULT_CPU_WINDOWS)):
+        self.interval = interval
+        self._samples = deque(maxlen=max(1, int(round(max_window / interval))))
+        self._lock = threading.Lock()
+        self._updated_checks = set()
+        self._stop = threading.Event()
+        self._thread = None
+        import psutil
+        self._last = (time.monotonic(), psutil.cpu_times(percpu=True))
+    
+    def start(self):
+        """Start the background sampling thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='cpu-sampler',
+                                                daemon=True)
+                self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the background sampling thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+    
+    def sample(self):
+        """Record the utilisation delta since the previous sample."""
+        with self._lock:
+            last_time, last_times = self._last
+            wait = self.MIN_SAMPLE_INTERVAL - (time.monotonic() - last_time)
+            if wait > 0:
+                time.sleep(wait)
+            import psutil
+            now, times = time.monotonic(), psutil.cpu_times(percpu=True)
+            deltas = []
+            for before, after in zip(last_times, times):
+                busy_before, total_before = _cpu_busy_total(before)
+                busy_after, total_after = _cpu_busy_total(after)
+                deltas.append((max(busy_after - busy_before, 0.0),
+                               max(total_after - total_before, 0.0)))
+            self._last = (now, times)
+            self._samples.append((last_time, now, deltas))
+    
+    def usage(self, window=1):
+        """
+        Return aggregate and per-core utilisation averaged over ``window`` seconds.
+        
+        If the background thread has not produced a recent sample, one is
+        taken on demand from the primed counters. ``seconds`` is the time
+        the averaged samples actually cover, which is shorter than
+        ``window`` until the sampler has been running for that long.
+        """
+        with self._lock:
+            latest = self._samples[-1][1] if self._samples else None
+        if latest is None or time.monotonic() - latest > 2 * self.interval:
+            self.sample()
+        
+        count = max(1, int(round(window / self.interval)))
+        with self._lock:
+            recent = list(self._samples)[-count:]
+        
+        cores = len(recent[-1][2])
+        busy = [0.0] * cores
+        total = [0.0] * cores
+        for _, _, deltas in recent:
+            for core, (core_busy, core_total) in enumerate(deltas[:cores]):
+                busy[core] += core_busy
+                total[core] += core_total
+        
+        per_core = [round(100.0 * b / t, 1) if t else 0.0 for b, t in zip(busy, total)]
+        aggregate = round(100.0 * sum(busy) / sum(total), 1) if sum(total) else 0.0
+        return {'percent': aggregate, 'per_core': per_core,
+                'seconds': round(recent[-1][1] - recent[0][0], 2)}
+
+
+# Per-thread count of child processes started, maintained by an audit hook
+_span_state = threading.local()
+_subprocess_hook_installed = False
+_subprocess_hook_lock = threading.Lock()
+
+# Audit events raised when a child process is started
+SUBPROCESS_EVENTS = frozenset(('subprocess.Popen', 'os.system'))
+DEFAULT_PROFILE_DIR = 'it_support_profile'
+DEFAULT_PROFILE_TOP = 10
+
+
+def _count_subprocess(event, args):
+    if event in SUBPROCESS_EVENTS:
+        _span_state.subprocesses = getattr(_span_state, 'subprocesses', 0) + 1
+
+
+def _install_subprocess_counter():
+    """Install the audit hook once; hooks cannot be removed, so it stays cheap."""
+    global _subprocess_hook_installed
+    with _subprocess_hook_lock:
+        if not _subprocess_hook_installed:
+            sys.addaudithook(_count_subprocess)
+            _subprocess_hook_installed = True
+
+
+class SpanRecorder:
+    """
+    Record wall time, CPU time and subprocess launches for named spans.
+    
+    CPU time is the calling thread's (``time.thread_time``), so spans of
+    checks running concurrently on the scheduler pool do not count each
+    other's work. A span keeps the timing of its latest run, so long-running
+    watch and metrics processes report current rather than summed cost. With
+    ``profile_dir`` every span also runs under its own cProfile profiler
+    and its stats are dumped to ``<profile_dir>/<span>.prof``; with
+    ``trace_memory`` the top allocations made during each span are kept.
+    Profiling is per thread, so profile with checks running sequentially.
+    """
+    
+    def __init__(self, profile_dir=None, trace_memory=False, top=DEFAULT_PROFILE_TOP):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.top = top
+        self.timings = {}
+        self.profiles = {}
+        self.allocations = {}
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        _install_subprocess_counter()
+    
+    def record(self, name, wall, cpu, subprocesses=0):
+        """Store a timing measured in seconds (e.g. outside a ``span`` block)."""
+        with self._lock:
+            self.timings[name] = {'wall_ms': round(wall * 1000, 3),
+                                  'cpu_ms': round(cpu * 1000, 3),
+                                  'subprocesses': subprocesses}
+    
+    @contextlib.contextmanager
+    def span(self, name):
+        """Time the enclosed block as ``name``."""
+        profiler = snapshot = None
+        if self.profile_dir:
+            import cProfile
+            profiler = cProfile.Profile()
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            snapshot = tracemalloc.take_snapshot()
+        
+        subprocesses = getattr(_span_state, 'subprocesses', 0)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.record(name, time.perf_counter() - wall, time.thread_time() - cpu,
+                     getattr(_span_state, 'subprocesses', 0) - subprocesses)
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{name}.prof")
+                profiler.dump_stats(path)
+                self.profiles[name] = path
+            if snapshot is not None:
+                import tracemalloc
+                diff = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')
+                self.allocations[name] = [
+                    (str(stat.traceback), stat.size_diff) for stat in diff[:self.top]
+                    if stat.size_diff > 0
+                ]
+    
+    def stop(self):
+        """Stop allocation tracing started by this recorder."""
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    def print_report(self):
+        """Print the timing table, the hottest functions and top allocations."""
+        print("\n=== TIMINGS ===")
+        print(f"{'Span':<32} {'Wall (ms)':>10} {'CPU (ms)':>10} {'Subproc':>8}")
+        for name, timing in sorted(self.timings.items(),
+                                   key=lambda item: item[1]['wall_ms'], reverse=True):
+            print(f"{name:<32} {timing['wall_ms']:>10.1f} {timing['cpu_ms']:>10.1f} "
+                  f"{timing['subprocesses']:>8}")
+        
+        if self.profiles:
+            import pstats
+            for name, path in self.profiles.items():
+                print(f"\n--- Profile: {name} ({path}) ---")
+                stats = pstats.Stats(path, stream=sys.stdout)
+                stats.sort_stats('cumulative').print_stats(self.top)
+        
+        for name, allocations in self.allocations.items():
+            print(f"\n--- Top allocations: {name} ---")
+            for location, size in allocations:
+                print(f"   {size / 1024:>10.1f} KB  {location}")
+
+
+def load_probe_targets(path):
+    """
+    Load connectivity probe targets from a JSON config file.
+    
+    The file holds a list of targets (or ``{"targets": [...]}``); each target
+    is either ``{"host": ..., "port": ..., "description": ...}`` or a
+    ``"host:port"`` string.
+    """
+    import json
+    with open(path, 'r') as f:
+        config = json.load(f)
+    
+    if isinstance(config, dict):
+        config = config.get('targets', [])
+    
+    targets = []
+    for entry in config:
+        if isinstance(entry, str):
+            host, _, port = entry.rpartition(':')
+            entry = {'host': host.strip('[]'), 'port': port}
+        target = {
+            'host': entry['host'],
+            'port': int(entry['port']),
+            'description': entry.get('description') or f"{entry['host']}:{entry['port']}"
+        }
+        targets.append(target)
+    return targets
+
+
+class _Resolver:
+    """
+    Resolve probe hosts for one probe run.
+    
+    IPv6 and IPv4 addresses are looked up in parallel, each host is looked
+    up once however many targets use it, and answers are kept in the check
+    cache (when given) so later runs and watch-mode iterations skip the
+    lookup.
+    """
+    
+    def __init__(self, cache=None, timeout=DEFAULT_PROBE_TIMEOUT):
+        self.cache = cache
+        self.timeout = timeout
+        self._fingerprint = [file_signature(path) for path in RESOLVER_FILES]
+        self._lookups = {}
+    
+    def resolve(self, host):
+        """
+        Return a future for ``(addresses, dns_ms, cached, error)``.
+        
+        Addresses alternate between IPv6 and IPv4, IPv6 first; ``error`` is
+        set when there are none.
+        """
+        import asyncio
+        if host not in self._lookups:
+            self._lookups[host] = asyncio.ensure_future(self._resolve(host))
+        return self._lookups[host]
+    
+    async def _resolve(self, host):
+        import asyncio
+        import ipaddress
+        import socket
+        try:
+            return [str(ipaddress.ip_address(host))], 0.0, False, None
+        except ValueError:
+            pass
+        
+        key = f'dns:{host}'
+        if self.cache is not None:
+            hit, value = self.cache.get(key, self._fingerprint)
+            if hit:
+                return value['addresses'], 0.0, True, value['error']
+        
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        deadline = loop.time() + self.timeout
+        found = {socket.AF_INET6: [], socket.AF_INET: []}
+        errors = []
+        pending = {asyncio.ensure_future(loop.getaddrinfo(host, None, family=family,
+                                                          type=socket.SOCK_STREAM))
+                   for family in found}
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        answers = task.result()
+                    except OSError as e:
+                        errors.append(e)
+                        continue
+                    for family, _, _, _, sockaddr in answers:
+                        if family in found and sockaddr[0] not in found[family]:
+                            found[family].append(sockaddr[0])
+                if any(found.values()):
+                    deadline = min(deadline, loop.time() + DNS_RESOLUTION_DELAY)
+        finally:
+            for task in pending:
+                task.cancel()
+        dns_ms = round((time.perf_counter() - start) * 1000, 2)
+        
+        v6, v4 = found[socket.AF_INET6], found[socket.AF_INET]
+        addresses = [address for pair in zip(v6, v4) for address in pair]
+        addresses += v6[len(v4):] + v4[len(v6):]
+        if addresses:
+            error = None
+        elif errors:
+            error = f"DNS lookup failed: {errors[0]}"
+        else:
+            # Timeouts are not cached; the next run asks again
+            return [], dns_ms, False, f"DNS lookup timed out after {self.timeout} s"
+        
+        if self.cache is not None:
+            self.cache.put(key, {'addresses': addresses, 'error': error}, self._fingerprint,
+                           ttl=DNS_CACHE_TTL if addresses else DNS_NEGATIVE_TTL)
+        return addresses, dns_ms, False, error
+
+
+async def _connect_first(addresses, port, timeout):
+    """
+    Connect to the first address that answers, Happy Eyeballs style.
+    
+    Attempts start ``CONNECT_ATTEMPT_DELAY`` apart, or as soon as the
+    previous one fails, so an unreachable IPv6 route does not use up the
+    timeout. Returns ``(address, writer)``; raises ``asyncio.TimeoutError``
+    or the last connection error.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    waiting = list(addresses)
+    attempts = {}
+    last_error = None
+    try:
+        while waiting or attempts:
+            if waiting:
+                address = waiting.pop(0)
+                attempts[asyncio.ensure_future(asyncio.open_connection(address, port))] = address
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            done, _ = await asyncio.wait(
+                attempts, timeout=min(remaining, CONNECT_ATTEMPT_DELAY) if waiting else remaining,
+                return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                address = attempts.pop(task)
+                try:
+                    _, writer = task.result()
+                except OSError as e:
+                    last_error = e
+                    continue
+                return address, writer
+        raise last_error
+    finally:
+        for task in attempts:
+            task.cancel()
+            # An attempt that connected alongside the winner is closed, not leaked
+            if task.done() and not task.cancelled() and task.exception() is None:
+                task.result()[1].close()
+
+
+async def _probe_target(semaphore, target, timeout, resolver):
+    """
+    Resolve and connect to one target, timing the two steps separately.
+    
+    ``latency_ms`` is the total, ``dns_ms`` and ``connect_ms`` the parts;
+    the timeout covers both.
+    """
+    import asyncio
+    target = {'host': target['host'], 'port': target['port'],
+              'description': target['description']}
+    async with semaphore:
+        start = time.perf_counter()
+        addresses, dns_ms, dns_cached, error = await resolver.resolve(target['host'])
+        timings = {'dns_ms': dns_ms, 'dns_cached': dns_cached}
+        if error:
+            return ProbeResult(**target, reachable=False, latency_ms=None, **timings,
+                               connect_ms=None, address=None, error=error)
+        
+        connect_start = time.perf_counter()
+        remaining = max(0.0, timeout - (connect_start - start))
+        try:
+            address, writer = await _connect_first(addresses, target['port'], remaining)
+        except asyncio.TimeoutError:
+            return ProbeResult(**target, reachable=False, latency_ms=None, **timings,
+                               connect_ms=None, address=None,
+                               error=f"connect timed out after {timeout} s")
+        except OSError as e:
+            return ProbeResult(**target, reachable=False, latency_ms=None, **timings,
+                               connect_ms=None, address=None, error=str(e))
+        
+        end = time.perf_counter()
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return ProbeResult(**target, reachable=True,
+                       latency_ms=round((end - start) * 1000, 2), **timings,
+                       connect_ms=round((end - connect_start) * 1000, 2), address=address)
+
+
+async def probe_targets_async(targets, concurrency=DEFAULT_PROBE_CONCURRENCY,
+                              timeout=DEFAULT_PROBE_TIMEOUT, cache=None):
+    """
+    Probe all targets concurrently, at most ``concurrency`` at a time.
+    
+    Host names are resolved through ``cache`` (a CheckCache) when given.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(concurrency)
+    resolver = _Resolver(cache, timeout)
+    return await asyncio.gather(*(_probe_target(semaphore, target, timeout, resolver)
+                                  for target in targets))
+
+
+def probe_targets(targets, concurrency=DEFAULT_PROBE_CONCURRENCY,
+                  timeout=DEFAULT_PROBE_TIMEOUT, cache=None):
+    """Run the asyncio probe engine from synchronous code; results keep target order."""
+    if not targets:
+        return []
+    import asyncio
+    return asyncio.run(probe_targets_async(targets, concurrency, timeout, cache))
+
+
+def stat_mounts(mountpoints, timeout=DEFAULT_MOUNT_TIMEOUT, workers=DEFAULT_DISK_WORKERS):
+    """
+    Stat many mountpoints in parallel, giving each one at most ``timeout`` seconds.
+    
+    Returns ``{mountpoint: (st_dev, usage)}``; a mountpoint maps to the
+    exception it raised, or to None if it did not answer in time. Calls into
+    a hung filesystem cannot be cancelled, so workers are daemon threads: a
+    stuck worker is abandoned (it exits whenever the call returns) and a
+    replacement is started so the remaining mounts keep being served.
+    """
+    mountpoints = list(dict.fromkeys(mountpoints))
+    if not mountpoints:
+        return {}
+    import psutil
+    
+    pending = queue.SimpleQueue()
+    for mountpoint in mountpoints:
+        pending.put(mountpoint)
+    done = queue.SimpleQueue()
+    # Mounts currently being stat'ed -> start time; entries are removed as soon
+    # as the call returns, so deadline scans stay proportional to the workers
+    in_flight = {}
+    
+    def worker():
+        while True:
+            try:
+                mountpoint = pending.get_nowait()
+            except queue.Empty:
+                return
+            in_flight[mountpoint] = time.monotonic()
+            try:
+                st_dev = os.stat(mountpoint).st_dev
+                outcome = (st_dev, psutil.disk_usage(mountpoint))
+            except Exception as e:
+                outcome = e
+            in_flight.pop(mountpoint, None)
+            done.put((mountpoint, outcome))
+    
+    def spawn():
+        threading.Thread(target=worker, name='disk-stat', daemon=True).start()
+    
+    for _ in range(min(workers, len(mountpoints))):
+        spawn()
+    
+    results = {}
+    while len(results) < len(mountpoints):
+        starts = list(in_flight.values())
+        wait = (min(starts) + timeout - time.monotonic()) if starts else timeout
+        try:
+            mountpoint, outcome = done.get(timeout=max(0.0, wait))
+            results.setdefault(mountpoint, outcome)
+            continue
+        except queue.Empty:
+            pass
+        
+        now = time.monotonic()
+        for mountpoint, start in list(in_flight.items()):
+            if now - start >= timeout:
+                in_flight.pop(mountpoint, None)
+                results.setdefault(mountpoint, None)
+                spawn()
+    return results
+
+
+def counter_delta(previous, current):
+    """
+    Increase of a cumulative counter between two readings.
+    
+    A counter that went down either wrapped (32-bit counters, when the old
+    value was in the upper half of their range) or was reset, e.g. by a
+    driver reload; after a reset the new value is the whole increase.
+    """
+    if current >= previous:
+        return current - previous
+    if 2**31 <= previous < 2**32:
+        return current + 2**32 - previous
+    return current
+
+
+def _push_bounded(heap, size, item):
+    """Keep the ``size`` largest items in a min-heap."""
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def read_passwd_users(passwd_path='/etc/passwd', min_uid=MIN_REGULAR_UID):
+    """Return passwd entries (username, uid) for regular users, in file order."""
+    users = []
+    with open(passwd_path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            
+            parts = line.split(':')
+            if len(parts) < 7:
+                continue
+            
+            try:
+                uid = int(parts[2])
+            except ValueError:
+                continue
+            if uid >= min_uid:
+                users.append({'username': parts[0], 'uid': uid})
+    return users
+
+
+def _shadow_days(field):
+    """Parse a numeric shadow field; empty fields become -1 like in shadow(5)."""
+    try:
+        return int(field)
+    except ValueError:
+        return -1
+
+
+def read_password_expiry(passwd_path='/etc/passwd', shadow_path='/etc/shadow',
+                         min_uid=MIN_REGULAR_UID, today=None):
+    """
+    Compute password expiry for regular users straight from passwd and shadow.
+    
+    Both files are read once and the expiry is derived in-process from the
+    last-change, max-days and warn fields, formatted exactly as
+    ``chage -l`` prints "Password expires". Users without a shadow entry are
+    skipped, as chage would fail for them. Raises PermissionError when the
+    shadow file is not readable.
+    """
+    today = today or date.today()
+    epoch = date(1970, 1, 1)
+    
+    shadow = {}
+    with open(shadow_path, 'r') as f:
+        for line in f:
+            parts = line.rstrip('\n').split(':')
+            if len(parts) < 6 or line.startswith('#'):
+                continue
+            shadow[parts[0]] = (_shadow_days(parts[2]), _shadow_days(parts[4]),
+                                _shadow_days(parts[5]))
+    
+    password_info = []
+    for user in read_passwd_users(passwd_path, min_uid):
+        if user['username'] not in shadow:
+            continue
+        last_change, max_days, warn_days = shadow[user['username']]
+        
+        if last_change == 0:
+            expiry_date = 'password must be changed'
+            warning = True
+        elif last_change < 0 or max_days < 0 or max_days >= CHAGE_NEVER_MAX_DAYS:
+            expiry_date = 'never'
+            warning = False
+        else:
+            expires = epoch + timedelta(days=last_change + max_days)
+            expiry_date = expires.strftime('%b %d, %Y')
+            warning = (expires - today).days <= max(warn_days, 0)
+        
+        password_info.append({
+            'username': user['username'],
+            'password_expires': expiry_date,
+            'warning': warning
+        })
+    return password_info
+
+
+# Report sections in the order exporters write them
+REPORT_SECTIONS = ('disk_space', 'largest_directories', 'cpu', 'ram', 'processes', 'users',
+                   'password_expiry', 'logs', 'network', 'traffic')
+EXPORT_BUFFER_SIZE = 1024 * 1024
+# Fields of a plugin result shown on its console summary line
+PLUGIN_SUMMARY_FIELDS = 4
+
+
+def report_section_keys(checks):
+    """Keys of ``checks`` in export order: REPORT_SECTIONS, then plugin results."""
+    return ([key for key in REPORT_SECTIONS if key in checks] +
+            [key for key in checks if key not in REPORT_SECTIONS])
+
+
+def _plugin_fields(value):
+    """
+    ``(name, text)`` pairs for a section without its own layout (plugin results).
+    
+    Mappings give one pair per key and lists one per item; nested values
+    are shown as JSON.
+    """
+    if isinstance(value, Mapping):
+        items = value.items()
+    elif isinstance(value, (list, tuple)):
+        items = enumerate(value, start=1)
+    else:
+        items = [('value', value)]
+    import json
+    return [(str(name), json.dumps(field, default=record_default)
+             if isinstance(field, (Mapping, list, tuple)) else str(field))
+            for name, field in items]
+
+
+def _plugin_heading(key):
+    return key.replace('_', ' ').upper()
+
+
+class ReportSink:
+    """
+    Base class for export sinks.
+    
+    ``ITSupportToolkit.export_reports`` walks the report once and calls
+    ``begin``, then ``section`` for each check present (in REPORT_SECTIONS
+    order, then plugin results), then ``end``. Sinks render a whole section before writing it.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def begin(self, report):
+        pass
+    
+    def section(self, key, value):
+        pass
+    
+    def end(self, report):
+        pass
+
+
+class TxtSink(ReportSink):
+    """Human-readable text report."""
+    
+    def begin(self, report):
+        self.stream.write(
+            "=" * 60 + "\n"
+            "IT SUPPORT SYSTEM HEALTH CHECK REPORT\n" +
+            "=" * 60 + "\n\n"
+            f"Generated: {report['timestamp']}\n"
+            f"Hostname: {report['hostname']}\n"
+            f"Operating System: {report['os']}\n" +
+            "\n" + "=" * 60 + "\n\n"
+        )
+    
+    def section(self, key, value):
+        lines = []
+        
+        if key == 'disk_space':
+            lines.append("DISK SPACE\n")
+            lines.append("-" * 60 + "\n")
+            for disk in value:
+                lines.append(f"Device: {disk['device']} ({disk['mountpoint']})\n")
+                lines.append(f"  Filesystem: {disk['filesystem']}\n")
+                if disk.get('status', 'ok') != 'ok':
+                    lines.append(f"  Status: {disk['status'].upper()}\n\n")
+                    continue
+                lines.append(f"  Total: {disk['total_gb']} GB\n")
+                lines.append(f"  Used: {disk['used_gb']} GB ({disk['percent_used']}%)\n")
+                lines.append(f"  Free: {disk['free_gb']} GB\n\n")
+        
+        elif key == 'largest_directories':
+            lines.append("LARGEST DIRECTORIES\n")
+            lines.append("-" * 60 + "\n")
+            for analysis in value:
+                if 'error' in analysis:
+                    lines.append(f"{analysis['path']}: {analysis['error']}\n\n")
+                    continue
+                lines.append(f"{analysis['path']} ({analysis['total_gb']} GB)\n")
+                for title, sub_key in (("Directories", 'largest_directories'),
+                                       ("Files", 'largest_files')):
+                    lines.append(f"  {title}:\n")
+                    for item in analysis[sub_key]:
+                        lines.append(f"    {item['size_gb']} GB  {item['path']}\n")
+                lines.append("\n")
+        
+        elif key == 'cpu':
+            lines.append("CPU INFORMATION\n")
+            lines.append("-" * 60 + "\n")
+            lines.append(f"Usage: {value['usage_percent']}%\n")
+            lines.append(f"Physical Cores: {value['physical_cores']}\n")
+            lines.append(f"Logical Cores: {value['logical_cores']}\n")
+            lines.append(f"Current Frequency: {value['current_freq_mhz']} MHz\n\n")
+        
+        elif key == 'ram':
+            lines.append("RAM INFORMATION\n")
+            lines.append("-" * 60 + "\n")
+            lines.append(f"Total: {value['total_gb']} GB\n")
+            lines.append(f"Used: {value['used_gb']} GB ({value['percent_used']}%)\n")
+            lines.append(f"Available: {value['available_gb']} GB\n\n")
+        
+        elif key == 'processes':
+            lines.append("TOP PROCESSES\n")
+            lines.append("-" * 60 + "\n")
+            lines.append(f"Processes: {value['total']} "
+                         f"(CPU measured over {value['interval_s']} s)\n")
+            for title, sub_key in (("By CPU", 'top_cpu'), ("By memory", 'top_memory')):
+                lines.append(f"{title}:\n")
+                for proc in value.get(sub_key, []):
+                    lines.append(f"  {proc['pid']} {proc['name']} ({proc['username']}): "
+                                 f"CPU {proc['cpu_percent']}% | RSS {proc['rss_mb']} MB "
+                                 f"({proc['memory_percent']}%)\n")
+            lines.append("\n")
+        
+        elif key == 'users':
+            lines.append("LOGGED IN USERS\n")
+            lines.append("-" * 60 + "\n")
+            if value:
+                for user in value:
+                    lines.append(f"User: {user['name']}\n")
+                    lines.append(f"  Terminal: {user['terminal']}\n")
+                    lines.append(f"  Host: {user['host']}\n")
+                    lines.append(f"  Login Time: {user['started']}\n\n")
+            else:
+                lines.append("No users currently logged in.\n\n")
+        
+        elif key == 'password_expiry':
+            lines.append("PASSWORD EXPIRY\n")
+            lines.append("-" * 60 + "\n")
+            if isinstance(value, list) and value:
+                for user in value:
+                    lines.append(f"{user['username']}: {user['password_expires']}\n")
+            else:
+                lines.append("Password expiry information not available.\n")
+            lines.append("\n")
+        
+        elif key == 'logs':
+            lines.append("LOG SCAN\n")
+            lines.append("-" * 60 + "\n")
+            for result in value.get('files', []):
+                if result['status'] != 'ok':
+                    lines.append(f"{result['path']}: {result['status'].upper()}\n")
+                    continue
+                lines.append(f"{result['path']}: {result['bytes_read']} new bytes - " +
+                             ", ".join(f"{name}: {count}"
+                                       for name, count in result['matches'].items()) + "\n")
+                for name, samples in result['samples'].items():
+                    for line in samples:
+                        lines.append(f"  [{name}] {line}\n")
+            lines.append("\n")
+        
+        elif key == 'network':
+            lines.append("NETWORK INFORMATION\n")
+            lines.append("-" * 60 + "\n")
+            lines.append("Network Interfaces:\n")
+            for iface in value.get('interfaces', []):
+                lines.append(f"  {iface['interface']}: {iface['ip_address']} "
+                             f"(Netmask: {iface['netmask']})\n")
+            
+            lines.append("\nConnectivity Tests:\n")
+            for test in value.get('connectivity_tests', []):
+                status = "OK" if test['reachable'] else "FAILED"
+                if test.get('latency_ms') is not None:
+                    status += f" ({test['latency_ms']} ms"
+                    if test.get('connect_ms') is not None:
+                        status += f"; DNS {test['dns_ms']} ms, connect {test['connect_ms']} ms"
+                    status += ")"
+                elif test.get('error'):
+                    status += f" ({test['error']})"
+                lines.append(f"  {test['description']} ({test['host']}:{test['port']}): "
+                             f"{status}\n")
+            lines.append("\n")
+        
+        elif key == 'traffic':
+            lines.append("INTERFACE TRAFFIC\n")
+            lines.append("-" * 60 + "\n")
+            lines.append(f"Measured over {value['interval_s']} s\n")
+            for nic in value.get('interfaces', []):
+                if nic['status'] != 'ok':
+                    lines.append(f"  {nic['interface']}: {nic['status'].upper()}\n")
+                    continue
+                utilization = (f" ({nic['utilization_percent']}% of {nic['speed_mbps']} Mb/s)"
+                               if nic['utilization_percent'] is not None else "")
+                lines.append(f"  {nic['interface']}: in {nic['bytes_recv_per_s']} B/s, "
+                             f"out {nic['bytes_sent_per_s']} B/s{utilization}, "
+                             f"errors {nic['errors_in']}/{nic['errors_out']}, "
+                             f"drops {nic['drops_in']}/{nic['drops_out']}\n")
+            for nic in value.get('removed', []):
+                lines.append(f"  {nic}: REMOVED\n")
+            lines.append("\n")
+        
+        else:
+            lines.append(f"{_plugin_heading(key)}\n")
+            lines.append("-" * 60 + "\n")
+            for name, text in _plugin_fields(value):
+                lines.append(f"{name}: {text}\n")
+            lines.append("\n")
+        
+        self.stream.write(''.join(lines))
+    
+    def end(self, report):
+        timings = report.get('timings')
+        if timings:
+            lines = ["TIMINGS\n", "-" * 60 + "\n"]
+            for name, timing in timings.items():
+                lines.append(f"{name}: {timing['wall_ms']} ms wall, {timing['cpu_ms']} ms CPU, "
+                             f"{timing['subprocesses']} subprocess(es)\n")
+            self.stream.write(''.join(lines) + "\n")
+        self.stream.write("=" * 60 + "\n" "END OF REPORT\n" + "=" * 60 + "\n")
+
+
+class CsvSink(ReportSink):
+    """Spreadsheet-friendly CSV report."""
+    
+    def __init__(self, stream):
+        super().__init__(stream)
+        import csv
+        self.writer = csv.writer(stream)
+    
+    def begin(self, report):
+        self.writer.writerows([
+            ['IT Support System Health Check Report'],
+            ['Generated', report['timestamp']],
+            ['Hostname', report['hostname']],
+            ['Operating System', report['os']],
+            [],
+        ])
+    
+    def section(self, key, value):
+        rows = []
+        
+        if key == 'disk_space':
+            rows.append(['DISK SPACE'])
+            rows.append(['Device', 'Mountpoint', 'Filesystem', 'Total (GB)', 
+                         'Used (GB)', 'Free (GB)', 'Used (%)', 'Status'])
+            for disk in value:
+                rows.append([
+                    disk['device'], disk['mountpoint'], disk['filesystem'],
+                    disk['total_gb'], disk['used_gb'], disk['free_gb'],
+                    disk['percent_used'], disk.get('status', 'ok')
+                ])
+            rows.append([])
+        
+        elif key == 'largest_directories':
+            rows.append(['LARGEST DIRECTORIES'])
+            rows.append(['Mountpoint', 'Kind', 'Path', 'Size (GB)'])
+            for analysis in value:
+                for kind, sub_key in (('directory', 'largest_directories'),
+                                      ('file', 'largest_files')):
+                    for item in analysis.get(sub_key, []):
+                        rows.append([analysis['path'], kind, item['path'], item['size_gb']])
+            rows.append([])
+        
+        elif key == 'cpu':
+            rows.append(['CPU INFORMATION'])
+            rows.append(['Metric', 'Value'])
+            rows.append(['Usage (%)', value['usage_percent']])
+            rows.append(['Physical Cores', value['physical_cores']])
+            rows.append(['Logical Cores', value['logical_cores']])
+            rows.append(['Current Frequency (MHz)', value['current_freq_mhz']])
+            rows.append([])
+        
+        elif key == 'ram':
+            rows.append(['RAM INFORMATION'])
+            rows.append(['Metric', 'Value'])
+            rows.append(['Total (GB)', value['total_gb']])
+            rows.append(['Used (GB)', value['used_gb']])
+            rows.append(['Available (GB)', value['available_gb']])
+            rows.append(['Used (%)', value['percent_used']])
+            rows.append([])
+        
+        elif key == 'processes':
+            rows.append(['TOP PROCESSES'])
+            rows.append(['Ranked By', 'PID', 'Name', 'User', 'CPU (%)', 'RSS (MB)',
+                         'Memory (%)'])
+            for ranking, sub_key in (('cpu', 'top_cpu'), ('memory', 'top_memory')):
+                for proc in value.get(sub_key, []):
+                    rows.append([ranking, proc['pid'], proc['name'], proc['username'],
+                                 proc['cpu_percent'], proc['rss_mb'], proc['memory_percent']])
+            rows.append([])
+        
+        elif key == 'users':
+            rows.append(['LOGGED IN USERS'])
+            rows.append(['Username', 'Terminal', 'Host', 'Login Time'])
+            for user in value:
+                rows.append([user['name'], user['terminal'], user['host'], user['started']])
+            rows.append([])
+        
+        elif key == 'password_expiry':
+            rows.append(['PASSWORD EXPIRY'])
+            rows.append(['Username', 'Expiry Date'])
+            if isinstance(value, list):
+                for user in value:
+                    rows.append([user['username'], user['password_expires']])
+            rows.append([])
+        
+        elif key == 'logs':
+            rows.append(['LOG SCAN'])
+            rows.append(['Log File', 'Status', 'New Bytes', 'Pattern', 'Matches'])
+            for result in value.get('files', []):
+                for name, count in result['matches'].items():
+                    rows.append([result['path'], result['status'], result['bytes_read'],
+                                 name, count])
+            rows.append([])
+        
+        elif key == 'network':
+            rows.append(['NETWORK INTERFACES'])
+            rows.append(['Interface', 'IP Address', 'Netmask'])
+            for iface in value.get('interfaces', []):
+                rows.append([iface['interface'], iface['ip_address'], iface['netmask']])
+            rows.append([])
+            
+            rows.append(['CONNECTIVITY TESTS'])
+            rows.append(['Description', 'Host', 'Port', 'Status', 'Latency (ms)', 'DNS (ms)',
+                         'DNS Cached', 'Connect (ms)', 'Address', 'Error'])
+            for test in value.get('connectivity_tests', []):
+                status = 'OK' if test['reachable'] else 'FAILED'
+                rows.append([test['description'], test['host'], test['port'], status,
+                             test.get('latency_ms'), test.get('dns_ms'), test.get('dns_cached'),
+                             test.get('connect_ms'), test.get('address'), test.get('error')])
+            rows.append([])
+        
+        elif key == 'traffic':
+            rows.append(['INTERFACE TRAFFIC'])
+            rows.append(['Interface', 'Status', 'In (B/s)', 'Out (B/s)', 'Packets In/s',
+                         'Packets Out/s', 'Errors In', 'Errors Out', 'Drops In', 'Drops Out',
+                         'Speed (Mb/s)', 'Utilization (%)'])
+            for nic in value.get('interfaces', []):
+                rows.append([nic['interface'], nic['status'], nic['bytes_recv_per_s'],
+                             nic['bytes_sent_per_s'], nic['packets_recv_per_s'],
+                             nic['packets_sent_per_s'], nic['errors_in'], nic['errors_out'],
+                             nic['drops_in'], nic['drops_out'], nic['speed_mbps'],
+                             nic['utilization_percent']])
+            for nic in value.get('removed', []):
+                rows.append([nic, 'removed'])
+            rows.append([])
+        
+        else:
+            rows.append([_plugin_heading(key)])
+            rows.append(['Field', 'Value'])
+            rows.extend([name, text] for name, text in _plugin_fields(value))
+            rows.append([])
+        
+        self.writer.writerows(rows)
+
+
+class JsonSink(ReportSink):
+    """Full report as one JSON document."""
+    
+    def end(self, report):
+        import json
+        self.stream.write(json.dumps(report, indent=2, default=record_default))
+
+
+class NdjsonSink(ReportSink):
+    """
+    One JSON object per line: a header record, then one record per partition,
+    user, interface, probe, etc. Suited to streaming into log shippers.
+    """
+    
+    # Sections holding several record lists: section -> ((sub-key, record type), ...)
+    NESTED_SECTIONS = {
+        'processes': (('top_cpu', 'process_cpu'), ('top_memory', 'process_memory')),
+        'logs': (('files', 'log_file'),),
+        'traffic': (('interfaces', 'interface_traffic'),),
+        'network': (('interfaces', 'network_interface'),
+                    ('connectivity_tests', 'connectivity_test')),
+    }
+    
+    def __init__(self, stream):
+        super().__init__(stream)
+        import json
+        self._dumps = json.JSONEncoder(default=record_default).encode
+    
+    def begin(self, report):
+        self._context = {'hostname': report['hostname'], 'timestamp': report['timestamp']}
+        self.stream.write(self._dumps({'type': 'report', 'os': report['os'],
+                                       **self._context}) + '\n')
+    
+    def _record(self, record_type, record):
+        if not isinstance(record, Mapping):
+            record = {'value': record}  # Plugin results may be plain values
+        return self._dumps({'type': record_type, **self._context, **record}) + '\n'
+    
+    def section(self, key, value):
+        if key in self.NESTED_SECTIONS:
+            records = [self._record(record_type, item)
+                       for sub_key, record_type in self.NESTED_SECTIONS[key]
+                       for item in value.get(sub_key, [])]
+        elif isinstance(value, list):
+            records = [self._record(key, item) for item in value]
+        else:
+            records = [self._record(key, value)]
+        self.stream.write(''.join(records))
+        self.stream.flush()
+
+
+EXPORT_SINKS = {
+    'txt': TxtSink,
+    'csv': CsvSink,
+    'json': JsonSink,
+    'ndjson': NdjsonSink,
+}
+
+# Console output of a run: every section in full, one status line per
+# section, or only the status lines that need attention
+CONSOLE_FULL = 'full'
+CONSOLE_SUMMARY = 'summary'
+CONSOLE_QUIET = 'quiet'
+CONSOLE_MODES = (CONSOLE_FULL, CONSOLE_SUMMARY, CONSOLE_QUIET)
+# CPU, RAM, per-process and link utilisation above this is flagged
+USAGE_WARNING_PERCENT = 80
+
+
+class ConsoleRenderer:
+    """
+    Console text for check results.
+    
+    Checks only collect data; the renderer turns stored report sections
+    into text and returns it, so a run is written to the terminal in one go
+    and library callers that never render pay nothing for output.
+    """
+    
+    # Section -> console heading; 'ram' is printed under the CPU check heading
+    HEADINGS = {
+        'disk_space': 'DISK SPACE CHECK',
+        'largest_directories': 'LARGEST DIRECTORIES',
+        'cpu': 'CPU & RAM CHECK',
+        'processes': 'TOP PROCESSES',
+        'users': 'LOGGED IN USERS',
+        'password_expiry': 'PASSWORD EXPIRY CHECK',
+        'logs': 'LOG SCAN',
+        'network': 'NETWORK CONNECTIVITY CHECK',
+        'traffic': 'INTERFACE TRAFFIC',
+    }
+    
+    def __init__(self, mode=CONSOLE_FULL):
+        if mode not in CONSOLE_MODES:
+            raise ValueError(f"Unknown console mode {mode!r}; expected one of "
+                             f"{', '.join(CONSOLE_MODES)}")
+        self.mode = mode
+    
+    def banner(self, title, report=None):
+        """A ``=== title ===`` block, with host details when ``report`` is given."""
+        if self.mode == CONSOLE_QUIET:
+            return ''
+        lines = ["=" * 60, title, "=" * 60]
+        if report is not None:
+            lines.append(f"Hostname: {report['hostname']}")
+            lines.append(f"OS: {report['os']}")
+            if 'timestamp' in report:
+                lines.append(f"Timestamp: {report['timestamp']}")
+        return '\n'.join(lines) + '\n'
+    
+    def section(self, key, value):
+        """Render one report section; plugin results render as key/value lines."""
+        if self.mode == CONSOLE_FULL:
+            lines = []
+            if key in self.HEADINGS:
+                lines.append(f"\n=== {self.HEADINGS[key]} ===")
+            elif key not in REPORT_SECTIONS:
+                lines.append(f"\n=== {_plugin_heading(key)} ===")
+            self._full(key, value, lines)
+            return '\n'.join(lines) + '\n'
+        ok, text = self._summary(key, value)
+        if ok and self.mode == CONSOLE_QUIET:
+            return ''
+        return f"{'✓' if ok else '⚠️'} {text}\n"
+    
+    def report(self, report):
+        """Render every section of a report, in export order."""
+        checks = report['checks']
+        return ''.join(self.section(key, checks[key]) for key in report_section_keys(checks))
+    
+    def _full(self, key, value, lines):
+        if key == 'disk_space':
+            for disk in value:
+                target = f"{disk['device']} ({disk['mountpoint']})"
+                if disk['status'] != 'ok':
+                    lines.append(f"✗ {disk['status'].upper()} {target} - "
+                                 f"{disk.get('error', 'no data')}")
+                    continue
+                status = ("⚠️ WARNING" if disk['percent_used'] > DISK_WARNING_PERCENT
+                          else "✓ OK")
+                lines.append(f"{status} {target}")
+                lines.append(f"   Total: {disk['total_gb']} GB | "
+                             f"Used: {disk['used_gb']} GB ({disk['percent_used']}%) | "
+                             f"Free: {disk['free_gb']} GB")
+        
+        elif key == 'largest_directories':
+            if not value:
+                lines.append(f"✓ No mount is above {DISK_WARNING_PERCENT}% used; "
+                             "nothing to analyze.")
+            for analysis in value:
+                if 'error' in analysis:
+                    lines.append(f"✗ Could not analyze {analysis['path']}: {analysis['error']}")
+                    continue
+                directories = analysis['directories_scanned'] + analysis['directories_cached']
+                lines.append(f"⚠️ {analysis['path']}: {analysis['total_gb']} GB in "
+                             f"{directories} directories ({analysis['directories_cached']} "
+                             f"unchanged since last scan, {analysis.get('elapsed_s')} s)")
+                for title, sub_key in (("Largest directories:", 'largest_directories'),
+                                       ("Largest files:", 'largest_files')):
+                    lines.append(f"   {title}")
+                    for item in analysis[sub_key]:
+                        lines.append(f"     {item['size_gb']} GB  {item['path']}")
+        
+        elif key == 'cpu':
+            status = ("⚠️ WARNING" if value['usage_percent'] > USAGE_WARNING_PERCENT
+                      else "✓ OK")
+            lines.append(f"{status} CPU Usage: {value['usage_percent']}%")
+            if value['average_percent']:
+                lines.append("   Averages: " + " | ".join(
+                    f"{window} {percent}%"
+                    for window, percent in value['average_percent'].items()))
+            elif 'sampled_seconds' in value:
+                lines.append(f"   Sampled over {value['sampled_seconds']} s")
+            lines.append(f"   Cores: {value['physical_cores']} physical, "
+                         f"{value['logical_cores']} logical")
+            if value['current_freq_mhz'] != 'N/A':
+                lines.append(f"   Frequency: {value['current_freq_mhz']} MHz "
+                             f"(Max: {value['max_freq_mhz']} MHz)")
+        
+        elif key == 'ram':
+            status = ("⚠️ WARNING" if value['percent_used'] > USAGE_WARNING_PERCENT
+                      else "✓ OK")
+            lines.append(f"\n{status} RAM Usage: {value['percent_used']}%")
+            lines.append(f"   Total: {value['total_gb']} GB | "
+                         f"Used: {value['used_gb']} GB | "
+                         f"Available: {value['available_gb']} GB")
+        
+        elif key == 'processes':
+            lines.append(f"{value['total']} processes; "
+                         f"CPU measured over {value['interval_s']} s")
+            for title, sub_key in (("Top by CPU:", 'top_cpu'), ("Top by memory:", 'top_memory')):
+                lines.append(title)
+                for proc in value[sub_key]:
+                    busy = ((proc['cpu_percent'] or 0) > USAGE_WARNING_PERCENT
+                            or (proc['memory_percent'] or 0) > USAGE_WARNING_PERCENT)
+                    lines.append(f"{'⚠️' if busy else '✓'} {proc['pid']} {proc['name']} "
+                                 f"({proc['username'] or '?'}) - CPU {proc['cpu_percent']}% | "
+                                 f"RSS {proc['rss_mb']} MB ({proc['memory_percent']}%)")
+        
+        elif key == 'users':
+            if not value:
+                lines.append("No users currently logged in.")
+            for user in value:
+                lines.append(f"✓ User: {user['name']}")
+                lines.append(f"   Terminal: {user['terminal']} | Host: {user['host']} | "
+                             f"Since: {user['started']}")
+        
+        elif key == 'password_expiry':
+            if isinstance(value, dict):
+                lines.append(f"⚠️  Could not check password expiry: {value.get('error')}")
+                return
+            for user in value:
+                status = "⚠️" if _password_warning(user) else "✓"
+                lines.append(f"{status} {user['username']}: "
+                             f"Password expires {user['password_expires']}")
+        
+        elif key == 'logs':
+            if not value['files']:
+                # Normal on journald-only hosts, so not a warning
+                lines.append("✓ None of the configured log files exist on this host; "
+                             "nothing to scan.")
+            for result in value['files']:
+                if result['status'] != 'ok':
+                    lines.append(f"✗ {result['path']}: "
+                                 f"{result.get('error', result['status'])}")
+                    continue
+                found = sum(result['matches'].values())
+                rotated = " (rotated)" if result['rotated'] else ""
+                lines.append(f"{'⚠️' if found else '✓'} {result['path']}: "
+                             f"{result['bytes_read']} new bytes{rotated} - " +
+                             ", ".join(f"{name}: {count}"
+                                       for name, count in result['matches'].items()))
+                for name, samples in result['samples'].items():
+                    for line in samples:
+                        lines.append(f"   [{name}] {line}")
+        
+        elif key == 'network':
+            lines.append("Network Interfaces:")
+            for iface in value['interfaces']:
+                lines.append(f"✓ {iface['interface']}: {iface['ip_address']} "
+                             f"(Netmask: {iface['netmask']})")
+            lines.append("\nConnectivity Tests:")
+            for test in value['connectivity_tests']:
+                target = f"{test['description']} ({test['host']}:{test['port']})"
+                dns = "cached" if test.get('dns_cached') else f"{test.get('dns_ms')} ms"
+                if test['reachable']:
+                    lines.append(f"✓ OK {target} - {test['latency_ms']} ms "
+                                 f"(DNS {dns}, connect {test.get('connect_ms')} ms)")
+                else:
+                    lines.append(f"✗ FAILED {target} - {test.get('error')} (DNS {dns})")
+        
+        elif key == 'traffic':
+            for nic in value['interfaces']:
+                if nic['status'] != 'ok':
+                    lines.append(f"✓ {nic['interface']}: new interface; rates from the next run")
+                    continue
+                link = (f" ({nic['utilization_percent']}% of {nic['speed_mbps']} Mb/s)"
+                        if nic['utilization_percent'] is not None else "")
+                status = "⚠️" if _traffic_warning(nic) else "✓"
+                lines.append(f"{status} {nic['interface']}: "
+                             f"in {nic['bytes_recv_per_s'] / 1024**2:.2f} MB/s, "
+                             f"out {nic['bytes_sent_per_s'] / 1024**2:.2f} MB/s{link}")
+                lines.append(f"   Packets: {nic['packets_recv_per_s']}/s in, "
+                             f"{nic['packets_sent_per_s']}/s out | "
+                             f"Errors: {nic['errors_in']} in, {nic['errors_out']} out | "
+                             f"Drops: {nic['drops_in']} in, {nic['drops_out']} out")
+            for nic in value['removed']:
+                lines.append(f"⚠️ {nic}: interface removed since the previous sample")
+        
+        elif key not in REPORT_SECTIONS:
+            lines.extend(f"   {name}: {text}" for name, text in _plugin_fields(value))
+    
+    def _summary(self, key, value):
+        """Return ``(ok, text)``: one status line for a section."""
+        if key == 'disk_space':
+            full = [disk for disk in value if disk['status'] == 'ok'
+                    and disk['percent_used'] > DISK_WARNING_PERCENT]
+            failed = [disk for disk in value if disk['status'] != 'ok']
+            text = f"Disk: {len(value)} mounts"
+            if full:
+                text += (f", above {DISK_WARNING_PERCENT}%: " +
+                         ", ".join(f"{disk['mountpoint']} {disk['percent_used']}%"
+                                   for disk in full))
+            if failed:
+                text += ", unreadable: " + ", ".join(disk['mountpoint'] for disk in failed)
+            return not (full or failed), text
+        
+        if key == 'largest_directories':
+            if not value:
+                return True, "Largest directories: nothing to analyze"
+            return False, "Largest directories: " + "; ".join(
+                f"{analysis['path']}: {analysis['error']}" if 'error' in analysis else
+                f"{analysis['path']} {analysis['total_gb']} GB" + "".join(
+                    f", {item['path']} {item['size_gb']} GB"
+                    for item in analysis['largest_directories'][:1])
+                for analysis in value)
+        
+        if key == 'cpu':
+            return (value['usage_percent'] <= USAGE_WARNING_PERCENT,
+                    f"CPU: {value['usage_percent']}% ({value['logical_cores']} logical cores)")
+        
+        if key == 'ram':
+            return (value['percent_used'] <= USAGE_WARNING_PERCENT,
+                    f"RAM: {value['percent_used']}% of {value['total_gb']} GB")
+        
+        if key == 'processes':
+            busiest = value['top_cpu'][:1]
+            text = f"Processes: {value['total']}" + "".join(
+                f", busiest {proc['pid']} {proc['name']} {proc['cpu_percent']}% CPU"
+                for proc in busiest)
+            return all((proc['cpu_percent'] or 0) <= USAGE_WARNING_PERCENT
+                       for proc in busiest), text
+        
+        if key == 'users':
+            return True, f"Users: {len(value)} logged in"
+        
+        if key == 'password_expiry':
+            if isinstance(value, dict):
+                return False, f"Password expiry: {value.get('error')}"
+            expiring = [user['username'] for user in value if _password_warning(user)]
+            text = f"Password expiry: {len(value)} accounts"
+            if expiring:
+                text += f", expiring: {', '.join(expiring)}"
+            return not expiring, text
+        
+        if key == 'logs':
+            if not value['files']:
+                return True, "Logs: no configured log files on this host"
+            found = {name: count for name, count in value['totals'].items() if count}
+            failed = [result['path'] for result in value['files'] if result['status'] != 'ok']
+            text = f"Logs: {len(value['files'])} files, " + (
+                ", ".join(f"{name}: {count}" for name, count in found.items())
+                if found else "no new matches")
+            if failed:
+                text += f", unreadable: {', '.join(failed)}"
+            return not (found or failed), text
+        
+        if key == 'network':
+            tests = value['connectivity_tests']
+            failed = [test['description'] for test in tests if not test['reachable']]
+            text = f"Network: {len(tests) - len(failed)}/{len(tests)} targets reachable"
+            if failed:
+                text += f", failed: {', '.join(failed)}"
+            return not failed, text
+        
+        if key == 'traffic':
+            flagged = [nic['interface'] for nic in value['interfaces'] if _traffic_warning(nic)]
+            text = f"Traffic: {len(value['interfaces'])} interfaces"
+            if flagged:
+                text += f", busy or dropping: {', '.join(flagged)}"
+            if value['removed']:
+                text += f", removed: {', '.join(value['removed'])}"
+            return not (flagged or value['removed']), text
+        
+        # Plugin results: flagged by an 'error' or a non-ok 'status' field
+        fields = _plugin_fields(value)
+        text = f"{key}: " + ", ".join(f"{name} {field}"
+                                      for name, field in fields[:PLUGIN_SUMMARY_FIELDS])
+        if len(fields) > PLUGIN_SUMMARY_FIELDS:
+            text += f", ... ({len(fields)} fields)"
+        failed = isinstance(value, Mapping) and (
+            value.get('error') or value.get('status', 'ok') != 'ok')
+        return not failed, text
+
+
+def _password_warning(user):
+    expires = user['password_expires']
+    return user.get('warning', expires != 'never' and expires != 'N/A')
+
+
+def _traffic_warning(nic):
+    if nic['status'] != 'ok':
+        return False
+    problems = nic['errors_in'] + nic['errors_out'] + nic['drops_in'] + nic['drops_out']
+    return (nic['utilization_percent'] or 0) > USAGE_WARNING_PERCENT or problems > 0
+
+
+# Report posting to a fleet aggregator (see fleet_aggregator.py)
+DEFAULT_POST_RETRIES = 3
+DEFAULT_POST_TIMEOUT = 10
+MAX_RETRY_AFTER = 30
+
+
+class ReportPostError(Exception):
+    """Raised when a report could not be delivered to the aggregator."""
+
+
+def _accepted_count(payload):
+    """Number of reports a 503 answer from the aggregator says it queued."""
+    import json
+    try:
+        return max(0, int(json.loads(payload).get('accepted', 0)))
+    except (ValueError, TypeError, AttributeError):
+        return 0
+
+
+class ReportPoster:
+    """
+    Post reports to a fleet aggregator over one reused HTTP connection.
+    
+    Connection errors reconnect and retry with exponential backoff; 429/503
+    answers are retried after the server's Retry-After delay, so agents back
+    off when the aggregator's ingest queue is full. When a list of reports
+    was only partly queued, only the reports the server did not accept are
+    sent again.
+    """
+    
+    def __init__(self, url, timeout=DEFAULT_POST_TIMEOUT, retries=DEFAULT_POST_RETRIES,
+                 backoff=0.5):
+        import http.client
+        from urllib.parse import urlsplit
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Unsupported aggregator URL: {url}")
+        self.url = url
+        self.path = parts.path or '/reports'
+        if parts.query:
+            self.path += '?' + parts.query
+        self._connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                  else http.client.HTTPConnection)
+        self._netloc = (parts.hostname, parts.port)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._conn = None
+    
+    def _connection(self):
+        if self._conn is None:
+            host, port = self._netloc
+            self._conn = self._connection_class(host, port, timeout=self.timeout)
+        return self._conn
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def post(self, report):
+        """Post one report (or a list of reports); returns the HTTP status."""
+        import http.client
+        import json
+        body = json.dumps(report, default=record_default).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        last_error = None
+        
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            try:
+                conn = self._connection()
+                conn.request('POST', self.path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                # Stale keep-alive connection or aggregator unreachable
+                self.close()
+                last_error = str(e)
+            else:
+                if 200 <= response.status < 300:
+                    return response.status
+                last_error = f"HTTP {response.status} {response.reason}"
+                if response.status not in (429, 503):
+                    raise ReportPostError(last_error)
+                accepted = _accepted_count(payload) if isinstance(report, list) else 0
+                if accepted:
+                    # The head of the list is already queued; resending it would store it twice
+                    report = report[accepted:]
+                    body = json.dumps(report, default=record_default).encode('utf-8')
+                try:
+                    delay = min(float(response.getheader('Retry-After', delay)),
+                                MAX_RETRY_AFTER)
+                except ValueError:
+                    pass
+            
+            if attempt < self.retries:
+                time.sleep(delay)
+        
+        raise ReportPostError(f"Giving up after {self.retries + 1} attempt(s): {last_error}")
+
+
+class CheckSpec:
+    """
+    Registry entry for one check.
+    
+    ``target`` is either the name of an ``ITSupportToolkit`` method or a
+    ``"module:function"`` plugin path. Plugin modules are imported only when
+    the check first runs; the function is called with the toolkit and its
+    return value (if not None) is stored under ``report_key``. ``cost`` is
+    the estimated run time in seconds, used to start expensive checks first;
+    ``deps`` are checks that must finish before this one starts; checks that
+    are not ``parallel_safe`` run on their own with nothing else in flight.
+    """
+    
+    def __init__(self, name, target=None, cost=1.0, deps=(), parallel_safe=True,
+                 flag=None, help=None, cadence=1, report_key=None):
+        self.name = name
+        self.target = target or name
+        self.cost = cost
+        self.deps = tuple(deps)
+        self.parallel_safe = parallel_safe
+        self.flag = flag
+        self.help = help
+        self.cadence = cadence
+        self.report_key = report_key or name
+        self._function = None
+    
+    @property
+    def is_plugin(self):
+        return ':' in self.target
+    
+    def resolve(self, toolkit):
+        """Return a zero-argument callable running this check on ``toolkit``."""
+        if not self.is_plugin:
+            return getattr(toolkit, self.target)
+        
+        if self._function is None:
+            module_name, _, function_name = self.target.partition(':')
+            module = importlib.import_module(module_name)
+            self._function = getattr(module, function_name)
+        
+        def run_plugin():
+            result = self._function(toolkit)
+            if result is not None:
+                toolkit._store_check(self.report_key, result)
+            return result
+        return run_plugin
+
+
+CHECK_REGISTRY = {}
+
+
+def register_check(name, target=None, **options):
+    """
+    Add a check to the registry (replacing any check of the same name).
+    
+    Site-specific checks can be registered without editing this module, e.g.
+    ``register_check('check_raid', 'site_checks:check_raid', cost=3, flag='raid')``.
+    """
+    spec = CheckSpec(name, target, **options)
+    CHECK_REGISTRY[name] = spec
+    return spec
+
+
+def register_plugin(path, **options):
+    """Register a ``"module:function"`` plugin under its function name."""
+    name = path.rpartition(':')[2]
+    if not name or ':' not in path:
+        raise ValueError(f"Plugin must be given as module:function, got {path!r}")
+    return register_check(name, path, **options)
+
+
+def get_check(name):
+    """Return the registered spec, or an ad-hoc spec for a toolkit method."""
+    return CHECK_REGISTRY.get(name) or CheckSpec(name)
+
+
+def schedule_checks(checks):
+    """
+    Expand dependencies and order checks for the scheduler.
+    
+    Returns ``(display_order, run_order)``: the requested checks with any
+    missing dependencies inserted before their first dependent, and a
+    dependency-respecting order that starts parallel-safe, expensive checks
+    first.
+    """
+    display_order = []
+    visiting = set()
+    
+    def visit(name):
+        if name in display_order:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle involving check {name!r}")
+        visiting.add(name)
+        for dep in get_check(name).deps:
+            visit(dep)
+        visiting.discard(name)
+        display_order.append(name)
+    
+    for name in checks:
+        visit(name)
+    
+    position = {name: index for index, name in enumerate(display_order)}
+    waiting = {name: set(get_check(name).deps) for name in display_order}
+    dependents = {name: [] for name in display_order}
+    for name, deps in waiting.items():
+        for dep in deps:
+            dependents[dep].append(name)
+    
+    def priority(name):
+        spec = get_check(name)
+        return (not spec.parallel_safe, -spec.cost, position[name], name)
+    
+    ready = [priority(name) for name, deps in waiting.items() if not deps]
+    heapq.heapify(ready)
+    run_order = []
+    while ready:
+        name = heapq.heappop(ready)[-1]
+        run_order.append(name)
+        for dependent in dependents[name]:
+            waiting[dependent].discard(name)
+            if not waiting[dependent]:
+                heapq.heappush(ready, priority(dependent))
+    return display_order, run_order
+
+
+# Built-in checks; costs are rough wall-clock estimates in seconds
+register_check('check_disk_space', cost=2.0, flag='disk',
+               help='Run only disk space check',
+               cadence=WATCH_CADENCE['check_disk_space'])
+register_check('check_largest_directories', cost=30.0, deps=('check_disk_space',),
+               flag='largest-dirs',
+               help='Find the largest directories and files on mounts the disk '
+                    'check warns about',
+               cadence=WATCH_CADENCE['check_largest_directories'])
+register_check('check_cpu_ram', cost=0.5, flag='cpu',
+               help='Run only CPU/RAM check',
+               cadence=WATCH_CADENCE['check_cpu_ram'])
+register_check('check_top_processes', cost=DEFAULT_PROCESS_INTERVAL, flag='processes',
+               help='Show the top processes by CPU and memory only',
+               cadence=WATCH_CADENCE['check_top_processes'])
+register_check('list_users', cost=0.1, flag='users',
+               help='List logged in users only',
+               cadence=WATCH_CADENCE['list_users'])
+register_check('check_network_connectivity', cost=DEFAULT_PROBE_TIMEOUT, flag='network',
+               help='Check network connectivity only',
+               cadence=WATCH_CADENCE['check_network_connectivity'])
+register_check('check_interface_traffic', cost=0.1, flag='traffic',
+               help='Show per-interface throughput, errors and drops only',
+               cadence=WATCH_CADENCE['check_interface_traffic'])
+register_check('check_password_expiry', cost=1.0, flag='password',
+               help='Check password expiry only',
+               cadence=WATCH_CADENCE['check_password_expiry'])
+register_check('check_logs', cost=0.5, flag='logs',
+               help='Scan system logs for new errors and authentication failures only',
+               cadence=WATCH_CADENCE['check_logs'])
+
+
+def host_metadata():
+    """
+    Return ``(hostname, os description)`` for report headers.
+    
+    One ``uname`` call on POSIX; the platform and socket modules are only
+    imported on systems without ``os.uname`` (Windows).
+    """
+    if hasattr(os, 'uname'):
+        uname = os.uname()
+        return uname.nodename, f"{uname.sysname} {uname.release}"
+    import platform
+    import socket
+    return socket.gethostname(), f"{platform.system()} {platform.release()}"
 
 
 class ITSupportToolkit:
     """Main class for IT support automation tasks."""
     
-    def __init__(self):
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, cpu_windows=DEFAULT_CPU_WINDOWS,
+                 probe_targets=None, probe_concurrency=DEFAULT_PROBE_CONCURRENCY,
+                 probe_timeout=DEFAULT_PROBE_TIMEOUT, cache=None,
+                 mount_timeout=DEFAULT_MOUNT_TIMEOUT, disk_workers=DEFAULT_DISK_WORKERS,
+                 fstypes=None, exclude_fstypes=None, profile_dir=None,
+                 trace_memory=False):
+        hostname, os_name = host_metadata()
         self.report_data = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'hostname': socket.gethostname(),
-            'os': f"{platform.system()} {platform.release()}",
+            'hostname': hostname,
+            'os': os_name,
             'checks': {}
         }
+        # Timing spans for every check and export (wall/CPU ms, subprocesses)
+        self.spans = SpanRecorder(profile_dir, trace_memory)
+        self.report_data['timings'] = self.spans.timings
+        self.max_workers = max_workers
+        self.cpu_windows = tuple(sorted(cpu_windows))
+        self._cpu_sampler = None
+        self.probe_targets = list(probe_targets or DEFAULT_PROBE_TARGETS)
+        self.probe_concurrency = probe_concurrency
+        self.probe_timeout = probe_timeout
+        self.mount_timeout = mount_timeout
+        self.disk_workers = disk_workers
+        self.fstypes = set(fstypes or ())
+        # Directory analyzer: extra paths to analyze besides mounts over the threshold
+        self.analyze_paths = []
+        self._dir_cache = None
+        # Log check: files to scan and {name: regex} patterns (see log_scanner.py)
+        self.log_files = None
+        self.log_patterns = None
+        self._log_scanner = None
+        self.traffic_interval = DEFAULT_TRAFFIC_INTERVAL
+        self.top_processes = DEFAULT_TOP_PROCESSES
+        self.process_interval = DEFAULT_PROCESS_INTERVAL
+        # (monotonic time, wall time, {(pid, create_time): CPU seconds}) of the last sample
+        self._process_sample = None
+        self.exclude_fstypes = set(exclude_fstypes or ())
+        self.passwd_path = '/etc/passwd'
+        self.shadow_path = '/etc/shadow'
+        # Slow-changing facts; in memory only unless a cache with a path is given
+        self.cache = cache if cache is not None else CheckCache()
+        # How run_checks and run_all_checks render to the console (CONSOLE_MODES)
+        self.console_mode = CONSOLE_FULL
+        # 'gzip' or 'xz' to compress report files named by the toolkit (see report_files)
+        self.compression = None
+        self._lock = threading.Lock()
+        self._updated_checks = set()
+        # Sections stored by the check running in this thread, for the renderer
+        self._local = threading.local()
+    
+    @property
+    def cpu_sampler(self):
+        """Rolling CPU sampler, created (and psutil imported) on first use."""
+        with self._lock:
+            if self._cpu_sampler is None:
+                self._cpu_sampler = CPUSampler(max_window=self.cpu_windows[-1])
+            return self._cpu_sampler
+    
+    def _store_check(self, key, value):
+        """Store a check result; safe to call from scheduler worker threads."""
+        with self._lock:
+            self.report_data['checks'][key] = value
+            self._updated_checks.add(key)
+        sections = getattr(self._local, 'sections', None)
+        if sections is not None:
+            sections.append((key, value))
+    
+    def drain_updates(self):
+        """Return the check results stored since the previous call."""
+        with self._lock:
+            updated = {key: self.report_data['checks'][key] for key in self._updated_checks}
+            self._updated_checks.clear()
+        return updated
     
     def check_disk_space(self):
-        """Check disk space usage for all partitions."""
-        print("\n=== DISK SPACE CHECK ===")
+        """
+        Check disk space usage for all partitions.
+        
+        Mounts are stat'ed in parallel with a per-mount deadline, so a hung
+        network filesystem is reported as ``timeout`` instead of stalling the
+        run. ``self.fstypes`` limits the check to those filesystem types (and
+        then also considers virtual/network mounts such as nfs or overlay);
+        ``self.exclude_fstypes`` drops types. Bind mounts of the same
+        filesystem are reported once.
+        """
+        import psutil
         disk_info = []
         
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                partition_data = {
-                    'device': partition.device,
-                    'mountpoint': partition.mountpoint,
-                    'filesystem': partition.fstype,
+        # The partition table only changes when something is (un)mounted
+        all_mounts = bool(self.fstypes)
+        partitions = self.cache.get_or_compute(
+            'partitions_all' if all_mounts else 'partitions',
+            lambda: [[partition.device, partition.mountpoint, partition.fstype]
+                     for partition in psutil.disk_partitions(all=all_mounts)],
+            fingerprint=[boot_id(), content_signature(MOUNTS_PATH)]
+        )
+        partitions = [(device, mountpoint, fstype)
+                      for device, mountpoint, fstype in partitions
+                      if (not self.fstypes or fstype in self.fstypes)
+                      and fstype not in self.exclude_fstypes]
+        
+        outcomes = stat_mounts([mountpoint for _, mountpoint, _ in partitions],
+                               timeout=self.mount_timeout, workers=self.disk_workers)
+        seen_devices = set()
+        
+        for device, mountpoint, fstype in partitions:
+            outcome = outcomes.get(mountpoint)
+            if isinstance(outcome, (PermissionError, FileNotFoundError)):
+                continue
+            
+            partition_data = {
+                'device': device,
+                'mountpoint': mountpoint,
+                'filesystem': fstype,
+                'total_gb': None,
+                'used_gb': None,
+                'free_gb': None,
+                'percent_used': None,
+                'status': 'ok'
+            }
+            if outcome is None:
+                partition_data['status'] = 'timeout'
+                partition_data['error'] = f"no answer within {self.mount_timeout:g} s"
+            elif isinstance(outcome, Exception):
+                partition_data['status'] = 'error'
+                partition_data['error'] = str(outcome)
+            else:
+                st_dev, usage = outcome
+                if st_dev in seen_devices:
+                    continue  # Bind mount of a filesystem already reported
+                seen_devices.add(st_dev)
+                partition_data.update({
                     'total_gb': round(usage.total / (1024**3), 2),
                     'used_gb': round(usage.used / (1024**3), 2),
                     'free_gb': round(usage.free / (1024**3), 2),
                     'percent_used': usage.percent
-                }
-                disk_info.append(partition_data)
-                
-                status = "⚠️ WARNING" if usage.percent > 80 else "✓ OK"
-                print(f"{status} {partition.device} ({partition.mountpoint})")
-                print(f"   Total: {partition_data['total_gb']} GB | "
-                      f"Used: {partition_data['used_gb']} GB ({usage.percent}%) | "
-                      f"Free: {partition_data['free_gb']} GB")
-            except PermissionError:
-                continue
+                })
+            disk_info.append(DiskRecord(**partition_data))
         
-        self.report_data['checks']['disk_space'] = disk_info
+        self._store_check('disk_space', disk_info)
         return disk_info
     
+    @property
+    def dir_cache(self):
+        """Directory size cache, persisted next to the check cache when that is."""
+        if self._dir_cache is None:
+            from dir_analyzer import DirectorySizeCache, DIR_CACHE_FILENAME
+            path = None
+            if self.cache.path is not None:
+                path = os.path.join(os.path.dirname(self.cache.path), DIR_CACHE_FILENAME)
+            self._dir_cache = DirectorySizeCache(path)
+        return self._dir_cache
+    
+    def check_largest_directories(self):
+        """
+        Find what fills each mount the disk check warned about.
+        
+        Runs after ``check_disk_space`` and analyzes every mount above
+        DISK_WARNING_PERCENT, plus ``self.analyze_paths``, with
+        ``dir_analyzer.analyze_directory``.
+        """
+        from dir_analyzer import analyze_directory
+        
+        paths = [disk['mountpoint'] for disk in self.report_data['checks'].get('disk_space') or []
+                 if (disk.get('percent_used') or 0) > DISK_WARNING_PERCENT]
+        paths = list(dict.fromkeys(paths + list(self.analyze_paths)))
+        
+        def entries(items):
+            return [{'path': path, 'size_gb': round(size / 1024**3, 2)}
+                    for size, path in items]
+        
+        analyses = []
+        for path in paths:
+            try:
+                result = analyze_directory(path, cache=self.dir_cache)
+            except OSError as e:
+                analyses.append({'path': path, 'error': str(e)})
+                continue
+            
+            analysis = {
+                'path': result['path'],
+                'total_gb': round(result['total_bytes'] / 1024**3, 2),
+                'directories_scanned': result['scanned'],
+                'directories_cached': result['reused'],
+                'unreadable': result['errors'],
+                'elapsed_s': result['elapsed_s'],
+                'largest_directories': entries(result['largest_directories']),
+                'largest_files': entries(result['largest_files'])
+            }
+            analyses.append(analysis)
+        
+        self.dir_cache.save()
+        self._store_check('largest_directories', analyses)
+        return analyses
+    
+    @property
+    def log_scanner(self):
+        """Incremental log scanner; offsets are persisted next to the check cache."""
+        if self._log_scanner is None:
+            from log_scanner import LogScanner, LOG_STATE_FILENAME
+            path = None
+            if self.cache.path is not None:
+                path = os.path.join(os.path.dirname(self.cache.path), LOG_STATE_FILENAME)
+            self._log_scanner = LogScanner(path, self.log_patterns)
+        return self._log_scanner
+    
+    def check_logs(self):
+        """
+        Count errors and authentication failures appended to the system logs.
+        
+        Only bytes written since the previous run are read (see
+        ``log_scanner.LogScanner``); logs that do not exist on this host are
+        skipped.
+        """
+        from log_scanner import DEFAULT_LOG_FILES
+        
+        results = self.log_scanner.scan_files(self.log_files or DEFAULT_LOG_FILES)
+        self.log_scanner.save()
+        results = [result for result in results if result['status'] != 'missing']
+        totals = dict.fromkeys(self.log_scanner.patterns, 0)
+        for result in results:
+            for name, count in result['matches'].items():
+                totals[name] += count
+        
+        log_data = {'files': results, 'totals': totals}
+        self._store_check('logs', log_data)
+        return log_data
+    
+    @staticmethod
+    def _cpu_static_facts():
+        """Core counts and maximum frequency; these only change across reboots."""
+        import psutil
+        cpu_freq = psutil.cpu_freq()
+        return {
+            'physical_cores': psutil.cpu_count(logical=False),
+            'logical_cores': psutil.cpu_count(logical=True),
+            'max_freq_mhz': round(cpu_freq.max, 2) if cpu_freq else 'N/A'
+        }
+    
     def check_cpu_ram(self):
         """Check CPU and RAM usage."""
-        print("\n=== CPU & RAM CHECK ===")
+        import psutil
         
-        # CPU Information
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count(logical=False)
-        cpu_count_logical = psutil.cpu_count(logical=True)
+        # CPU Information (read from the rolling sampler window; never blocks for 1 s)
+        self.cpu_sampler.start()
+        averages, sampled = {}, 0.0
+        for window in self.cpu_windows:
+            usage = self.cpu_sampler.usage(window)
+            sampled = max(sampled, usage['seconds'])
+            # A window the sampler has not filled yet (e.g. in a one-shot run)
+            # would report a shorter average under a longer label
+            if usage['seconds'] >= window * CPU_WINDOW_FILL:
+                averages[f"{window}s"] = usage['percent']
+        latest = self.cpu_sampler.usage(self.cpu_windows[0])
+        cpu_percent = latest['percent']
+        static = self.cache.get_or_compute('cpu_static', self._cpu_static_facts,
+                                           fingerprint=[boot_id()])
+        cpu_count = static['physical_cores']
+        cpu_count_logical = static['logical_cores']
         cpu_freq = psutil.cpu_freq()
         
         cpu_data = {
             'usage_percent': cpu_percent,
+            'per_core_percent': latest['per_core'],
+            'average_percent': averages,
+            'sampled_seconds': sampled,
             'physical_cores': cpu_count,
             'logical_cores': cpu_count_logical,
             'current_freq_mhz': round(cpu_freq.current, 2) if cpu_freq else 'N/A',
-            'max_freq_mhz': round(cpu_freq.max, 2) if cpu_freq else 'N/A'
+            'max_freq_mhz': static['max_freq_mhz']
         }
         
-        cpu_status = "⚠️ WARNING" if cpu_percent > 80 else "✓ OK"
-        print(f"{cpu_status} CPU Usage: {cpu_percent}%")
-        print(f"   Cores: {cpu_count} physical, {cpu_count_logical} logical")
-        if cpu_freq:
-            print(f"   Frequency: {cpu_data['current_freq_mhz']} MHz "
-                  f"(Max: {cpu_data['max_freq_mhz']} MHz)")
-        
         # RAM Information
         ram = psutil.virtual_memory()
         ram_data = {
@@ -90,111 +2058,188 @@ class ITSupportToolkit:
             'percent_used': ram.percent
         }
         
-        ram_status = "⚠️ WARNING" if ram.percent > 80 else "✓ OK"
-        print(f"\n{ram_status} RAM Usage: {ram.percent}%")
-        print(f"   Total: {ram_data['total_gb']} GB | "
-              f"Used: {ram_data['used_gb']} GB | "
-              f"Available: {ram_data['available_gb']} GB")
-        
-        self.report_data['checks']['cpu'] = cpu_data
-        self.report_data['checks']['ram'] = ram_data
+        self._store_check('cpu', cpu_data)
+        self._store_check('ram', ram_data)
         return cpu_data, ram_data
     
+    @staticmethod
+    def _process_cpu_times():
+        """Return ``{(pid, create_time): CPU seconds}`` for every visible process."""
+        import psutil
+        cpu_times = {}
+        for proc in psutil.process_iter(['create_time', 'cpu_times']):
+            times = proc.info['cpu_times']
+            if times is not None:
+                cpu_times[(proc.pid, proc.info['create_time'])] = times.user + times.system
+        return cpu_times
+    
+    def check_top_processes(self):
+        """
+        Report the top processes by CPU and by resident memory.
+        
+        Every process is sampled once, the check sleeps once for
+        ``self.process_interval`` and then samples again, so CPU use comes
+        from a single shared interval however many processes there are. Each
+        pass reads only the attributes it needs, under one ``oneshot()`` per
+        process. Only the top ``self.top_processes`` entries are kept in
+        bounded heaps, and only those processes have their user looked up.
+        """
+        import psutil
+        
+        previous = self._process_sample
+        if previous is None or time.monotonic() - previous[0] > PROCESS_SAMPLE_MAX_AGE:
+            previous = (time.monotonic(), time.time(), self._process_cpu_times())
+            time.sleep(self.process_interval)
+        sampled_at, sampled_wall, before = previous
+        
+        now = time.monotonic()
+        elapsed = max(now - sampled_at, 1e-6)
+        cpu_times = {}
+        top_cpu, top_memory = [], []
+        total = 0
+        
+        # process_iter with attrs reads each process inside oneshot()
+        for proc in psutil.process_iter(PROCESS_ATTRS):
+            info = proc.info
+            total += 1
+            key = (proc.pid, info['create_time'])
+            times = info['cpu_times']
+            percent = None
+            if times is not None:
+                cpu = cpu_times[key] = times.user + times.system
+                start = before.get(key)
+                if start is None and (info['create_time'] or 0) >= sampled_wall:
+                    start = 0.0  # Started during the interval
+                if start is not None:
+                    percent = (cpu - start) / elapsed * 100
+                    _push_bounded(top_cpu, self.top_processes, (percent, proc.pid, proc))
+            if info['memory_info'] is not None:
+                _push_bounded(top_memory, self.top_processes,
+                              (info['memory_info'].rss, proc.pid, proc, percent))
+        self._process_sample = (now, time.time(), cpu_times)
+        
+        memory_total = psutil.virtual_memory().total
+        usernames = {}
+        
+        def record(proc, cpu_percent):
+            if proc.pid not in usernames:
+                try:
+                    usernames[proc.pid] = proc.username()
+                except psutil.Error:
+                    usernames[proc.pid] = None
+            rss = proc.info['memory_info'].rss if proc.info['memory_info'] else None
+            return ProcessRecord(
+                pid=proc.pid,
+                name=proc.info['name'],
+                username=usernames[proc.pid],
+                cpu_percent=round(cpu_percent, 1) if cpu_percent is not None else None,
+                rss_mb=round(rss / 1024**2, 1) if rss is not None else None,
+                memory_percent=round(rss / memory_total * 100, 1) if rss is not None else None
+            )
+        
+        process_data = {
+            'total': total,
+            'interval_s': round(elapsed, 2),
+            'top_cpu': [record(proc, percent)
+                        for percent, _, proc in sorted(top_cpu, reverse=True)],
+            'top_memory': [record(proc, percent)
+                           for _, _, proc, percent in sorted(top_memory, reverse=True)]
+        }
+        
+        self._store_check('processes', process_data)
+        return process_data
+    
     def list_users(self):
         """List all users currently logged in."""
-        print("\n=== LOGGED IN USERS ===")
+        import psutil
         users_info = []
         
-        users = psutil.users()
-        if not users:
-            print("No users currently logged in.")
-            self.report_data['checks']['users'] = []
-            return []
-        
-        for user in users:
-            user_data = {
-                'name': user.name,
-                'terminal': user.terminal,
-                'host': user.host,
-                'started': datetime.fromtimestamp(user.started).strftime('%Y-%m-%d %H:%M:%S')
-            }
+        for user in psutil.users():
+            user_data = UserSession(
+                name=user.name,
+                terminal=user.terminal,
+                host=user.host,
+                started=datetime.fromtimestamp(user.started).strftime('%Y-%m-%d %H:%M:%S')
+            )
             users_info.append(user_data)
-            print(f"✓ User: {user.name}")
-            print(f"   Terminal: {user.terminal} | Host: {user.host} | "
-                  f"Since: {user_data['started']}")
         
-        self.report_data['checks']['users'] = users_info
+        self._store_check('users', users_info)
         return users_info
     
+    def _password_expiry_via_chage(self, usernames):
+        """Fallback: query expiry per user with ``sudo chage -l`` (slow, one process each)."""
+        import subprocess
+        password_info = []
+        for username in usernames:
+            try:
+                chage_result = subprocess.run(['sudo', 'chage', '-l', username],
+                                            capture_output=True, text=True, 
+                                            timeout=5)
+                
+                if chage_result.returncode == 0:
+                    expiry_date = 'N/A'
+                    for line in chage_result.stdout.split('\n'):
+                        if 'Password expires' in line:
+                            expiry_date = line.split(':', 1)[1].strip()
+                            break
+                    
+                    password_info.append({
+                        'username': username,
+                        'password_expires': expiry_date
+                    })
+            except subprocess.TimeoutExpired:
+                continue
+            except Exception:
+                continue
+        return password_info
+    
+    def _read_password_expiry(self):
+        try:
+            return read_password_expiry(self.passwd_path, self.shadow_path)
+        except PermissionError:
+            # Shadow file needs root; fall back to asking chage per user
+            usernames = [user['username'] for user in read_passwd_users(self.passwd_path)]
+            return self._password_expiry_via_chage(usernames)
+    
     def check_password_expiry(self):
         """Check password expiry for system users (Linux only)."""
-        print("\n=== PASSWORD EXPIRY CHECK ===")
+        import platform
         
         if platform.system() != 'Linux':
-            print("⚠️  Password expiry check only available on Linux systems.")
-            self.report_data['checks']['password_expiry'] = {'error': 'Not available on this OS'}
+            self._store_check('password_expiry', {'error': 'Not available on this OS'})
             return None
         
         password_info = []
         
         try:
-            # Get list of users from /etc/passwd
-            result = subprocess.run(['cat', '/etc/passwd'], 
-                                  capture_output=True, text=True, check=True)
-            
-            for line in result.stdout.split('\n'):
-                if not line or line.startswith('#'):
-                    continue
-                
-                parts = line.split(':')
-                if len(parts) < 7:
-                    continue
-                
-                username = parts[0]
-                # Skip system users (UID < 1000)
-                try:
-                    uid = int(parts[2])
-                    if uid < 1000:
-                        continue
-                except ValueError:
-                    continue
-                
-                # Check password expiry using chage
-                try:
-                    chage_result = subprocess.run(['sudo', 'chage', '-l', username],
-                                                capture_output=True, text=True, 
-                                                timeout=5)
-                    
-                    if chage_result.returncode == 0:
-                        expiry_date = 'N/A'
-                        for line in chage_result.stdout.split('\n'):
-                            if 'Password expires' in line:
-                                expiry_date = line.split(':', 1)[1].strip()
-                                break
-                        
-                        user_data = {
-                            'username': username,
-                            'password_expires': expiry_date
-                        }
-                        password_info.append(user_data)
-                        
-                        status = "⚠️" if expiry_date != 'never' and expiry_date != 'N/A' else "✓"
-                        print(f"{status} {username}: Password expires {expiry_date}")
-                except subprocess.TimeoutExpired:
-                    continue
-                except Exception:
-                    continue
-        
+            # Expiry only changes when passwd/shadow are edited or the day rolls over
+            password_info = self.cache.get_or_compute(
+                'password_expiry', self._read_password_expiry,
+                fingerprint=[self.passwd_path, file_signature(self.passwd_path),
+                             self.shadow_path, file_signature(self.shadow_path),
+                             date.today().isoformat()]
+            )
         except Exception as e:
-            print(f"⚠️  Could not check password expiry: {str(e)}")
-            print("   Note: This check may require sudo privileges.")
+            # Usually a missing privilege: the shadow file and chage need root
+            password_info = {'error': f"{e} (this check may require sudo privileges)"}
         
-        self.report_data['checks']['password_expiry'] = password_info
+        self._store_check('password_expiry', password_info)
         return password_info
     
+    @staticmethod
+    def _ipv4_interfaces():
+        """``[interface, address, netmask]`` rows, kept JSON-compatible for the cache."""
+        import psutil
+        import socket
+        interfaces = []
+        for interface_name, addresses in psutil.net_if_addrs().items():
+            for addr in addresses:
+                if addr.family == socket.AF_INET:  # IPv4
+                    interfaces.append([interface_name, addr.address, addr.netmask])
+        return interfaces
+    
     def check_network_connectivity(self):
         """Check network connectivity to common services."""
-        print("\n=== NETWORK CONNECTIVITY CHECK ===")
         
         # Get network interfaces
         network_info = {
@@ -203,294 +2248,487 @@ class ITSupportToolkit:
         }
         
         # List network interfaces
-        print("Network Interfaces:")
-        interfaces = psutil.net_if_addrs()
-        for interface_name, addresses in interfaces.items():
-            for addr in addresses:
-                if addr.family == socket.AF_INET:  # IPv4
-                    interface_data = {
-                        'interface': interface_name,
-                        'ip_address': addr.address,
-                        'netmask': addr.netmask
-                    }
-                    network_info['interfaces'].append(interface_data)
-                    print(f"✓ {interface_name}: {addr.address} (Netmask: {addr.netmask})")
-        
-        # Test connectivity to common services
-        print("\nConnectivity Tests:")
-        test_hosts = [
-            ('8.8.8.8', 53, 'Google DNS'),
-            ('1.1.1.1', 53, 'Cloudflare DNS'),
-            ('google.com', 80, 'Google HTTP'),
+        network_info['interfaces'] = [
+            InterfaceRecord(interface=interface, ip_address=address, netmask=netmask)
+            for interface, address, netmask in self.cache.get_or_compute(
+                'interfaces', self._ipv4_interfaces,
+                fingerprint=[boot_id(), directory_signature(NET_DEVICES_PATH)]
+            )
         ]
         
-        for host, port, description in test_hosts:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                result = sock.connect_ex((host, port))
-                sock.close()
-                
-                is_reachable = result == 0
-                test_data = {
-                    'host': host,
-                    'port': port,
-                    'description': description,
-                    'reachable': is_reachable
-                }
-                network_info['connectivity_tests'].append(test_data)
-                
-                status = "✓ OK" if is_reachable else "✗ FAILED"
-                print(f"{status} {description} ({host}:{port})")
-            except Exception as e:
-                test_data = {
-                    'host': host,
-                    'port': port,
-                    'description': description,
-                    'reachable': False,
-                    'error': str(e)
-                }
-                network_info['connectivity_tests'].append(test_data)
-                print(f"✗ FAILED {description} ({host}:{port}) - {str(e)}")
-        
-        self.report_data['checks']['network'] = network_info
+        # Test connectivity to the configured targets concurrently
+        network_info['connectivity_tests'] = probe_targets(
+            self.probe_targets, concurrency=self.probe_concurrency,
+            timeout=self.probe_timeout, cache=self.cache)
+        
+        self._store_check('network', network_info)
         return network_info
     
-    def export_report_txt(self, filename=None):
-        """Export report to text file."""
-        if filename is None:
-            filename = f"it_support_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        
-        filepath = Path(filename)
-        
-        with open(filepath, 'w') as f:
-            f.write("=" * 60 + "\n")
-            f.write("IT SUPPORT SYSTEM HEALTH CHECK REPORT\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(f"Generated: {self.report_data['timestamp']}\n")
-            f.write(f"Hostname: {self.report_data['hostname']}\n")
-            f.write(f"Operating System: {self.report_data['os']}\n")
-            f.write("\n" + "=" * 60 + "\n\n")
-            
-            # Disk Space
-            if 'disk_space' in self.report_data['checks']:
-                f.write("DISK SPACE\n")
-                f.write("-" * 60 + "\n")
-                for disk in self.report_data['checks']['disk_space']:
-                    f.write(f"Device: {disk['device']} ({disk['mountpoint']})\n")
-                    f.write(f"  Filesystem: {disk['filesystem']}\n")
-                    f.write(f"  Total: {disk['total_gb']} GB\n")
-                    f.write(f"  Used: {disk['used_gb']} GB ({disk['percent_used']}%)\n")
-                    f.write(f"  Free: {disk['free_gb']} GB\n\n")
-            
-            # CPU & RAM
-            if 'cpu' in self.report_data['checks']:
-                f.write("CPU INFORMATION\n")
-                f.write("-" * 60 + "\n")
-                cpu = self.report_data['checks']['cpu']
-                f.write(f"Usage: {cpu['usage_percent']}%\n")
-                f.write(f"Physical Cores: {cpu['physical_cores']}\n")
-                f.write(f"Logical Cores: {cpu['logical_cores']}\n")
-                f.write(f"Current Frequency: {cpu['current_freq_mhz']} MHz\n\n")
-            
-            if 'ram' in self.report_data['checks']:
-                f.write("RAM INFORMATION\n")
-                f.write("-" * 60 + "\n")
-                ram = self.report_data['checks']['ram']
-                f.write(f"Total: {ram['total_gb']} GB\n")
-                f.write(f"Used: {ram['used_gb']} GB ({ram['percent_used']}%)\n")
-                f.write(f"Available: {ram['available_gb']} GB\n\n")
-            
-            # Users
-            if 'users' in self.report_data['checks']:
-                f.write("LOGGED IN USERS\n")
-                f.write("-" * 60 + "\n")
-                if self.report_data['checks']['users']:
-                    for user in self.report_data['checks']['users']:
-                        f.write(f"User: {user['name']}\n")
-                        f.write(f"  Terminal: {user['terminal']}\n")
-                        f.write(f"  Host: {user['host']}\n")
-                        f.write(f"  Login Time: {user['started']}\n\n")
-                else:
-                    f.write("No users currently logged in.\n\n")
+    @staticmethod
+    def _nic_counters():
+        import psutil
+        return {nic: [getattr(counters, field) for field in NIC_COUNTER_FIELDS]
+                for nic, counters in psutil.net_io_counters(pernic=True).items()}
+    
+    def check_interface_traffic(self):
+        """
+        Report per-interface throughput, packet rates, errors and drops.
+        
+        Rates are counter deltas since the snapshot saved by the previous run
+        (in the check cache, invalidated by a reboot), so a one-shot run does
+        not have to sleep; only without a recent snapshot does the check
+        sample for ``self.traffic_interval`` seconds. Wrapped and reset
+        counters are handled by ``counter_delta``; interfaces that appeared
+        since the snapshot are reported as ``new`` and vanished ones are
+        listed under ``removed``.
+        """
+        import psutil
+        
+        fingerprint = [boot_id()]
+        hit, previous = self.cache.get('net_counters', fingerprint)
+        if not hit or previous['time'] >= time.time():
+            previous = {'time': time.time(), 'counters': self._nic_counters()}
+            time.sleep(self.traffic_interval)
+        now = time.time()
+        counters = self._nic_counters()
+        self.cache.put('net_counters', {'time': now, 'counters': counters}, fingerprint)
+        
+        elapsed = max(now - previous['time'], 1e-6)
+        speeds = {nic: stats.speed for nic, stats in psutil.net_if_stats().items()}
+        interfaces = []
+        
+        for nic, values in counters.items():
+            speed = speeds.get(nic) or None  # 0 means unknown
+            before = previous['counters'].get(nic)
+            if before is None:
+                interfaces.append(TrafficRecord(
+                    interface=nic, status='new', bytes_recv_per_s=None, bytes_sent_per_s=None,
+                    packets_recv_per_s=None, packets_sent_per_s=None, errors_in=None,
+                    errors_out=None, drops_in=None, drops_out=None, speed_mbps=speed,
+                    utilization_percent=None))
+                continue
             
-            # Password Expiry
-            if 'password_expiry' in self.report_data['checks']:
-                f.write("PASSWORD EXPIRY\n")
-                f.write("-" * 60 + "\n")
-                pwd_exp = self.report_data['checks']['password_expiry']
-                if isinstance(pwd_exp, list) and pwd_exp:
-                    for user in pwd_exp:
-                        f.write(f"{user['username']}: {user['password_expires']}\n")
+            delta = dict(zip(NIC_COUNTER_FIELDS, map(counter_delta, before, values)))
+            sent_rate = delta['bytes_sent'] / elapsed
+            recv_rate = delta['bytes_recv'] / elapsed
+            utilization = (round(max(sent_rate, recv_rate) * 8 / (speed * 10**6) * 100, 1)
+                           if speed else None)
+            interfaces.append(TrafficRecord(
+                interface=nic, status='ok',
+                bytes_recv_per_s=round(recv_rate, 1),
+                bytes_sent_per_s=round(sent_rate, 1),
+                packets_recv_per_s=round(delta['packets_recv'] / elapsed, 1),
+                packets_sent_per_s=round(delta['packets_sent'] / elapsed, 1),
+                errors_in=delta['errin'], errors_out=delta['errout'],
+                drops_in=delta['dropin'], drops_out=delta['dropout'],
+                speed_mbps=speed, utilization_percent=utilization))
+        
+        removed = sorted(set(previous['counters']) - set(counters))
+        
+        traffic_data = {
+            'interval_s': round(elapsed, 2),
+            'interfaces': interfaces,
+            'removed': removed
+        }
+        self._store_check('traffic', traffic_data)
+        return traffic_data
+    
+    def export_reports(self, targets):
+        """
+        Export the report to several formats in a single pass.
+        
+        ``targets`` maps an export format (see EXPORT_SINKS) to a filename
+        or an open text stream; None picks a timestamped default name
+        (compressed with ``self.compression``) and '-' streams to stdout.
+        Filenames ending in .gz or .xz are written through a streaming
+        compressor.
+        The report is walked once and each section is fanned out to every
+        sink, which writes it with one buffered write.
+        
+        Returns a dict mapping format to the absolute path written.
+        """
+        from report_files import COMPRESSIONS, open_report
+        streamed = {}
+        for export_format, filename in targets.items():
+            if filename == '-' or hasattr(filename, 'write'):
+                stream = sys.stdout if filename == '-' else filename
+                streamed.setdefault(id(stream), []).append(export_format)
+        for formats in streamed.values():
+            if len(formats) > 1:
+                # Sinks write section by section, so the formats would interleave
+                raise ValueError(f"Cannot write {', '.join(formats)} to one stream; "
+                                 f"stream a single format or export to files")
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        suffix = COMPRESSIONS[self.compression] if self.compression else ''
+        sinks, streams, paths = {}, {}, {}
+        # Per-format [wall, cpu] seconds, recorded as export_<format> spans
+        elapsed = {export_format: [0.0, 0.0] for export_format in targets}
+        
+        def timed(export_format, call, *args):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            call(*args)
+            elapsed[export_format][0] += time.perf_counter() - wall
+            elapsed[export_format][1] += time.thread_time() - cpu
+        
+        try:
+            for export_format, filename in targets.items():
+                if filename == '-' or hasattr(filename, 'write'):
+                    stream = sys.stdout if filename == '-' else filename
+                    paths[export_format] = '-'
                 else:
-                    f.write("Password expiry information not available.\n")
-                f.write("\n")
-            
-            # Network
-            if 'network' in self.report_data['checks']:
-                f.write("NETWORK INFORMATION\n")
-                f.write("-" * 60 + "\n")
-                net = self.report_data['checks']['network']
-                
-                f.write("Network Interfaces:\n")
-                for iface in net.get('interfaces', []):
-                    f.write(f"  {iface['interface']}: {iface['ip_address']} "
-                           f"(Netmask: {iface['netmask']})\n")
-                
-                f.write("\nConnectivity Tests:\n")
-                for test in net.get('connectivity_tests', []):
-                    status = "OK" if test['reachable'] else "FAILED"
-                    f.write(f"  {test['description']} ({test['host']}:{test['port']}): {status}\n")
-                f.write("\n")
+                    filepath = filename or f"it_support_report_{stamp}.{export_format}{suffix}"
+                    stream = open_report(filepath, 'w', buffering=EXPORT_BUFFER_SIZE,
+                                         newline='' if export_format == 'csv' else None)
+                    streams[export_format] = stream
+                    paths[export_format] = os.path.abspath(filepath)
+                sinks[export_format] = EXPORT_SINKS[export_format](stream)
             
-            f.write("=" * 60 + "\n")
-            f.write("END OF REPORT\n")
-            f.write("=" * 60 + "\n")
+            report = self.report_data
+            for export_format, sink in sinks.items():
+                timed(export_format, sink.begin, report)
+            for key in report_section_keys(report['checks']):
+                for export_format, sink in sinks.items():
+                    timed(export_format, sink.section, key, report['checks'][key])
+            for export_format, sink in sinks.items():
+                timed(export_format, sink.end, report)
+        finally:
+            for export_format, stream in streams.items():
+                timed(export_format, stream.close)
+        
+        for export_format, (wall, cpu) in elapsed.items():
+            self.spans.record(f"export_{export_format}", wall, cpu)
         
-        print(f"\n✓ Report exported to: {filepath.absolute()}")
-        return str(filepath.absolute())
+        if self.console_mode != CONSOLE_QUIET:
+            for path in paths.values():
+                if path != '-':
+                    print(f"✓ Report exported to: {path}")
+        return paths
+    
+    def export_report_txt(self, filename=None):
+        """Export report to text file."""
+        return self.export_reports({'txt': filename})['txt']
     
     def export_report_csv(self, filename=None):
         """Export report to CSV file."""
-        if filename is None:
-            filename = f"it_support_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return self.export_reports({'csv': filename})['csv']
+    
+    def export_report_json(self, filename=None):
+        """Export report to JSON file."""
+        return self.export_reports({'json': filename})['json']
+    
+    def export_report_ndjson(self, filename=None):
+        """Export report as newline-delimited JSON records ('-' streams to stdout)."""
+        return self.export_reports({'ndjson': filename})['ndjson']
+    
+    def export_report_sqlite(self, filename=None):
+        """Append report to the SQLite history database."""
+        from history_store import HistoryStore, DEFAULT_HISTORY_DB
         
-        filepath = Path(filename)
+        filepath = os.path.abspath(filename or DEFAULT_HISTORY_DB)
         
-        with open(filepath, 'w', newline='') as f:
-            writer = csv.writer(f)
-            
-            # Header information
-            writer.writerow(['IT Support System Health Check Report'])
-            writer.writerow(['Generated', self.report_data['timestamp']])
-            writer.writerow(['Hostname', self.report_data['hostname']])
-            writer.writerow(['Operating System', self.report_data['os']])
-            writer.writerow([])
-            
-            # Disk Space
-            if 'disk_space' in self.report_data['checks']:
-                writer.writerow(['DISK SPACE'])
-                writer.writerow(['Device', 'Mountpoint', 'Filesystem', 'Total (GB)', 
-                               'Used (GB)', 'Free (GB)', 'Used (%)'])
-                for disk in self.report_data['checks']['disk_space']:
-                    writer.writerow([
-                        disk['device'], disk['mountpoint'], disk['filesystem'],
-                        disk['total_gb'], disk['used_gb'], disk['free_gb'],
-                        disk['percent_used']
-                    ])
-                writer.writerow([])
-            
-            # CPU
-            if 'cpu' in self.report_data['checks']:
-                writer.writerow(['CPU INFORMATION'])
-                writer.writerow(['Metric', 'Value'])
-                cpu = self.report_data['checks']['cpu']
-                writer.writerow(['Usage (%)', cpu['usage_percent']])
-                writer.writerow(['Physical Cores', cpu['physical_cores']])
-                writer.writerow(['Logical Cores', cpu['logical_cores']])
-                writer.writerow(['Current Frequency (MHz)', cpu['current_freq_mhz']])
-                writer.writerow([])
-            
-            # RAM
-            if 'ram' in self.report_data['checks']:
-                writer.writerow(['RAM INFORMATION'])
-                writer.writerow(['Metric', 'Value'])
-                ram = self.report_data['checks']['ram']
-                writer.writerow(['Total (GB)', ram['total_gb']])
-                writer.writerow(['Used (GB)', ram['used_gb']])
-                writer.writerow(['Available (GB)', ram['available_gb']])
-                writer.writerow(['Used (%)', ram['percent_used']])
-                writer.writerow([])
-            
-            # Users
-            if 'users' in self.report_data['checks']:
-                writer.writerow(['LOGGED IN USERS'])
-                writer.writerow(['Username', 'Terminal', 'Host', 'Login Time'])
-                for user in self.report_data['checks']['users']:
-                    writer.writerow([user['name'], user['terminal'], 
-                                   user['host'], user['started']])
-                writer.writerow([])
-            
-            # Password Expiry
-            if 'password_expiry' in self.report_data['checks']:
-                writer.writerow(['PASSWORD EXPIRY'])
-                writer.writerow(['Username', 'Expiry Date'])
-                pwd_exp = self.report_data['checks']['password_expiry']
-                if isinstance(pwd_exp, list):
-                    for user in pwd_exp:
-                        writer.writerow([user['username'], user['password_expires']])
-                writer.writerow([])
-            
-            # Network
-            if 'network' in self.report_data['checks']:
-                writer.writerow(['NETWORK INTERFACES'])
-                writer.writerow(['Interface', 'IP Address', 'Netmask'])
-                net = self.report_data['checks']['network']
-                for iface in net.get('interfaces', []):
-                    writer.writerow([iface['interface'], iface['ip_address'], 
-                                   iface['netmask']])
-                writer.writerow([])
-                
-                writer.writerow(['CONNECTIVITY TESTS'])
-                writer.writerow(['Description', 'Host', 'Port', 'Status'])
-                for test in net.get('connectivity_tests', []):
-                    status = 'OK' if test['reachable'] else 'FAILED'
-                    writer.writerow([test['description'], test['host'], 
-                                   test['port'], status])
+        with self.spans.span('export_sqlite'), HistoryStore(filepath) as store:
+            store.record(self.report_data)
         
-        print(f"✓ Report exported to: {filepath.absolute()}")
-        return str(filepath.absolute())
+        if self.console_mode != CONSOLE_QUIET:
+            print(f"✓ Report recorded in: {filepath}")
+        return filepath
     
-    def export_report_json(self, filename=None):
-        """Export report to JSON file."""
-        if filename is None:
-            filename = f"it_support_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        filepath = Path(filename)
-        
-        with open(filepath, 'w') as f:
-            json.dump(self.report_data, f, indent=2)
-        
-        print(f"✓ Report exported to: {filepath.absolute()}")
-        return str(filepath.absolute())
-    
-    def run_all_checks(self, export_format='txt'):
-        """Run all health checks and export report."""
-        print("=" * 60)
-        print("IT SUPPORT AUTOMATION TOOLKIT")
-        print("=" * 60)
-        print(f"Hostname: {self.report_data['hostname']}")
-        print(f"OS: {self.report_data['os']}")
-        print(f"Timestamp: {self.report_data['timestamp']}")
-        
-        self.check_disk_space()
-        self.check_cpu_ram()
-        self.list_users()
-        self.check_network_connectivity()
-        self.check_password_expiry()
-        
-        print("\n" + "=" * 60)
-        print("EXPORTING REPORT")
-        print("=" * 60)
-        
-        if export_format.lower() == 'txt':
-            self.export_report_txt()
-        elif export_format.lower() == 'csv':
-            self.export_report_csv()
-        elif export_format.lower() == 'json':
-            self.export_report_json()
-        elif export_format.lower() == 'all':
-            self.export_report_txt()
-            self.export_report_csv()
-            self.export_report_json()
+    def post_report(self, url, poster=None):
+        """Post the report to a fleet aggregator."""
+        own_poster = poster is None
+        if own_poster:
+            poster = ReportPoster(url)
+        try:
+            poster.post(self.report_data)
+            if self.console_mode != CONSOLE_QUIET:
+                print(f"✓ Report posted to: {url}")
+            return True
+        except ReportPostError as e:
+            print(f"⚠️  Could not post report to {url}: {e}")
+            return False
+        finally:
+            if own_poster:
+                poster.close()
+    
+    def export(self, export_format='txt', output=None):
+        """
+        Export the report in one format, or TXT, CSV and JSON for 'all'.
+        
+        ``output`` is a filename without extension, '-' for stdout or an open
+        text stream; a stream takes a single format, so 'all' raises
+        ValueError there. All requested formats are written in a single pass
+        over the report.
+        """
+        export_format = export_format.lower()
+        if export_format == 'sqlite':
+            return {'sqlite': self.export_report_sqlite(f"{output}.db" if output else None)}
+        
+        if export_format == 'all':
+            formats = ('txt', 'csv', 'json')
+        elif export_format in EXPORT_SINKS:
+            formats = (export_format,)
         else:
             print(f"⚠️  Unknown format: {export_format}. Using TXT.")
-            self.export_report_txt()
+            formats = ('txt',)
+        
+        if output == '-' or hasattr(output, 'write'):
+            targets = {export_format: output for export_format in formats}
+        else:
+            from report_files import COMPRESSIONS
+            suffix = COMPRESSIONS[self.compression] if self.compression else ''
+            targets = {export_format: f"{output}.{export_format}{suffix}" if output else None
+                       for export_format in formats}
+        return self.export_reports(targets)
+    
+    def apply_retention(self, directory='.', keep_days=7, rollup='daily', max_days=None):
+        """
+        Thin out the reports in ``directory`` (see ``report_files.plan_retention``).
+        
+        Rollups are compressed with ``self.compression`` (gzip if unset).
+        Returns the summary of ``ReportCatalog.apply_retention``.
+        """
+        from view_reports import list_reports
+        try:
+            result = list_reports(directory).apply_retention(
+                keep_days, rollup, max_days, compression=self.compression or 'gzip')
+        except OSError as e:
+            print(f"⚠️  Could not apply report retention in {directory}: {e}")
+            return None
+        if self.console_mode != CONSOLE_QUIET and (result['deleted'] or result['compressed']):
+            print(f"✓ Report retention: removed {len(result['deleted'])}, compressed "
+                  f"{len(result['compressed'])}, freed {result['freed_bytes'] / 1024:.1f} KB")
+        return result
+    
+    def _run_captured(self, proxy, check_name, deps=()):
+        """
+        Run one check in a worker thread.
+        
+        Returns ``(result, error, output, sections)``: stray console output
+        (e.g. from plugins) and the report sections the check stored.
+        """
+        if deps:
+            # Dependencies were submitted earlier, so they are already running or done
+            from concurrent.futures import wait
+            wait(deps)
+        proxy.start_capture()
+        sections = self._local.sections = []
+        try:
+            with self.spans.span(check_name):
+                result = get_check(check_name).resolve(self)()
+            return result, None, proxy.stop_capture(), sections
+        except Exception as e:
+            return None, e, proxy.stop_capture(), sections
+        finally:
+            self._local.sections = None
+    
+    def run_checks(self, checks=None, max_workers=None, echo=True):
+        """
+        Run checks from the registry concurrently on a thread pool.
+        
+        Dependencies of the requested checks are added automatically and
+        finish before their dependents start. Expensive checks are started
+        first; checks that are not parallel-safe run with nothing else in
+        flight. Checks do not print: the sections they store are rendered by
+        a ConsoleRenderer in ``self.console_mode``, in the order the checks
+        were requested, and written with a single write once all are done.
+        With ``echo=False`` nothing is rendered and only failures are
+        written.
+        
+        Returns a dict mapping check name to its return value.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+        
+        display_order, run_order = schedule_checks(checks or DEFAULT_CHECKS)
+        workers = max_workers or self.max_workers or 1
+        if self.spans.profile_dir or self.spans.trace_memory:
+            # Profilers and allocation snapshots cannot tell concurrent checks apart
+            workers = 1
+        results = {}
+        renderer = ConsoleRenderer(self.console_mode) if echo else None
+        
+        stdout = sys.stdout
+        proxy = _ThreadLocalStdout(stdout)
+        sys.stdout = proxy
+        try:
+            if workers <= 1 or len(run_order) <= 1:
+                # Display order already lists dependencies before their dependents
+                outcomes = (self._run_captured(proxy, check_name)
+                            for check_name in display_order)
+                self._collect_outcomes(display_order, outcomes, results, stdout, renderer)
+            else:
+                with ThreadPoolExecutor(max_workers=min(workers, len(run_order))) as pool:
+                    futures = {}
+                    for check_name in run_order:
+                        spec = get_check(check_name)
+                        if spec.parallel_safe:
+                            deps = [futures[dep] for dep in spec.deps]
+                            futures[check_name] = pool.submit(self._run_captured, proxy,
+                                                              check_name, deps)
+                        else:
+                            wait(list(futures.values()))
+                            futures[check_name] = pool.submit(self._run_captured, proxy,
+                                                              check_name)
+                            wait([futures[check_name]])
+                    outcomes = (futures[check_name].result() for check_name in display_order)
+                    self._collect_outcomes(display_order, outcomes, results, stdout,
+                                           renderer)
+        finally:
+            sys.stdout = stdout
+        
+        return results
+    
+    @staticmethod
+    def _collect_outcomes(checks, outcomes, results, stdout, renderer):
+        """Render check results in request order, gather them, then write once."""
+        parts = []
+        for check_name, (result, error, output, sections) in zip(checks, outcomes):
+            if renderer is not None:
+                if renderer.mode != CONSOLE_QUIET:
+                    parts.append(output)
+                parts.extend(renderer.section(key, value) for key, value in sections)
+            if error is not None:
+                parts.append(f"\n⚠️  {check_name} failed: {error}\n")
+            results[check_name] = result
+        stdout.write(''.join(parts))
+    
+    def run_all_checks(self, export_format='txt', max_workers=None, output=None):
+        """Run all health checks concurrently and export report."""
+        self.run_selected_checks(DEFAULT_CHECKS, export_format, max_workers, output)
+    
+    def run_selected_checks(self, checks, export_format='txt', max_workers=None, output=None):
+        """Run checks between the console banners and export the report."""
+        renderer = ConsoleRenderer(self.console_mode)
+        sys.stdout.write(renderer.banner("IT SUPPORT AUTOMATION TOOLKIT", self.report_data))
+        
+        self.run_checks(checks, max_workers=max_workers)
+        
+        heading = renderer.banner("EXPORTING REPORT")
+        sys.stdout.write(heading and "\n" + heading)
+        
+        self.export(export_format, output)
+
+
+class WatchDaemon:
+    """
+    Long-running watch mode built around a single toolkit instance.
+    
+    Every tick re-samples the checks that are due according to their cadence
+    and appends one sample per tick to a bounded in-memory ring buffer.
+    Samples not yet written are appended to an NDJSON history file (and, if
+    ``history_db`` is set, to the SQLite history store in one transaction)
+    every ``flush_interval`` seconds and when the daemon stops. With
+    ``post_url`` each flush also posts the batch to a fleet aggregator over
+    a kept-alive connection. In ``CONSOLE_QUIET`` mode nothing is printed
+    per tick; only failures are reported.
+    """
+    
+    def __init__(self, toolkit, interval, cadence=None, history_size=DEFAULT_HISTORY_SIZE,
+                 history_file=DEFAULT_HISTORY_FILE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 history_db=None, post_url=None, console_mode=CONSOLE_FULL):
+        self.toolkit = toolkit
+        self.console_mode = console_mode
+        self.interval = interval
+        self.cadence = dict(cadence or WATCH_CADENCE)
+        self.history = deque(maxlen=history_size)
+        self.history_file = history_file
+        self.flush_interval = flush_interval
+        self.history_db = history_db
+        self._store = None
+        self.poster = ReportPoster(post_url) if post_url else None
+        self.ticks = 0
+        self._pending = deque(maxlen=history_size)
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+    
+    def due_checks(self):
+        """Return the checks scheduled for the current tick."""
+        return [check_name for check_name, every in self.cadence.items()
+                if self.ticks % max(1, every) == 0]
+    
+    def tick(self):
+        """Sample the due checks once and record the results."""
+        due = self.due_checks()
+        self.ticks += 1
+        if not due:
+            return None
+        
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.toolkit.report_data['timestamp'] = timestamp
+        self.toolkit.run_checks(due, echo=False)
+        
+        sample = {
+            'timestamp': timestamp,
+            'hostname': self.toolkit.report_data['hostname'],
+            'os': self.toolkit.report_data['os'],
+            'checks': self.toolkit.drain_updates()
+        }
+        self.history.append(sample)
+        self._pending.append(sample)
+        
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return sample
+    
+    def flush(self):
+        """Append samples not yet written to the history file."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return 0
+        
+        if self.history_file:
+            import json
+            lines = [json.dumps(sample, default=record_default) + '\n'
+                     for sample in self._pending]
+            with open(self.history_file, 'a') as f:
+                f.write(''.join(lines))
+        if self.history_db:
+            if self._store is None:
+                from history_store import HistoryStore
+                self._store = HistoryStore(self.history_db)
+            self._store.record_many(self._pending)
+        if self.poster is not None:
+            try:
+                self.poster.post(list(self._pending))
+            except ReportPostError as e:
+                print(f"⚠️  Could not post samples to {self.poster.url}: {e}")
+        
+        count = len(self._pending)
+        self._pending.clear()
+        return count
+    
+    def stop(self):
+        """Ask the run loop to exit after the current tick."""
+        self._stop.set()
+    
+    def run(self, max_ticks=None):
+        """Tick every ``interval`` seconds until stopped or interrupted."""
+        next_tick = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                sample = self.tick()
+                if sample is not None and self.console_mode != CONSOLE_QUIET:
+                    print(f"[{sample['timestamp']}] Sampled: "
+                          f"{', '.join(sorted(sample['checks']))}")
+                if max_ticks is not None and self.ticks >= max_ticks:
+                    break
+                next_tick += self.interval
+                self._stop.wait(max(0.0, next_tick - time.monotonic()))
+        except KeyboardInterrupt:
+            if self.console_mode != CONSOLE_QUIET:
+                print("\nStopping watch mode...")
+        finally:
+            self.flush()
+            if self._store is not None:
+                self._store.close()
+            if self.poster is not None:
+                self.poster.close()
+            self.toolkit.cpu_sampler.stop()
 
 
 def main():
     """Main entry point for the toolkit."""
     import argparse
+    from report_files import COMPRESSIONS, DEFAULT_ROLLUP, ROLLUPS
     
     parser = argparse.ArgumentParser(
         description='IT Support Automation Toolkit - System Health Checker',
@@ -501,88 +2739,203 @@ Examples:
   %(prog)s --format csv       # Run all checks, export to CSV
   %(prog)s --format all       # Export to TXT, CSV, and JSON
   %(prog)s --disk             # Run only disk space check
+  %(prog)s --disk --fstype nfs --fstype nfs4 --mount-timeout 5
+  %(prog)s --largest-dirs     # Find what fills mounts above 80%%
   %(prog)s --cpu              # Run only CPU/RAM check
+  %(prog)s --processes        # Top processes by CPU and memory
   %(prog)s --users            # List logged in users only
   %(prog)s --network          # Check network connectivity only
+  %(prog)s --traffic          # Per-interface throughput since the last run
   %(prog)s --password         # Check password expiry only
+  %(prog)s --logs --log-file /var/log/nginx/error.log  # New log errors since last run
+  %(prog)s --plugin site_checks:check_raid  # Run a site-specific check
+  %(prog)s --workers 1        # Run checks one after another
+  %(prog)s --summary-only     # One status line per check
+  %(prog)s --quiet            # Cron-friendly: only print what needs attention
+  %(prog)s --network --targets targets.json  # Probe custom targets
+  %(prog)s --watch 10         # Re-sample checks every 10 seconds
+  %(prog)s --format sqlite    # Append the run to it_support_history.db
+  %(prog)s -f ndjson -o -     # Stream NDJSON records to stdout
+  %(prog)s -f json --compress gzip --keep-days 7  # Compressed, with retention
+  %(prog)s --post http://aggregator:8740/reports  # Send report to the fleet
+  %(prog)s --no-cache         # Ignore cached partitions, cores, interfaces
+  %(prog)s --password --profile --profile-memory  # Find what makes a check slow
         """
     )
     
     parser.add_argument('--format', '-f', 
-                       choices=['txt', 'csv', 'json', 'all'],
+                       choices=['txt', 'csv', 'json', 'ndjson', 'sqlite', 'all'],
                        default='txt',
-                       help='Export format (default: txt)')
-    
-    parser.add_argument('--disk', action='store_true',
-                       help='Run only disk space check')
-    parser.add_argument('--cpu', action='store_true',
-                       help='Run only CPU/RAM check')
-    parser.add_argument('--users', action='store_true',
-                       help='List logged in users only')
-    parser.add_argument('--network', action='store_true',
-                       help='Check network connectivity only')
-    parser.add_argument('--password', action='store_true',
-                       help='Check password expiry only')
+                       help='Export format; sqlite appends to the history '
+                            'database, all writes TXT, CSV and JSON (default: txt)')
+    
+    # One flag per registered check (--disk, --cpu, --users, ...)
+    for spec in CHECK_REGISTRY.values():
+        if spec.flag:
+            parser.add_argument(f'--{spec.flag}', action='append_const', const=spec.name,
+                               dest='selected', help=spec.help)
+    parser.add_argument('--plugin', action='append', metavar='MODULE:FUNCTION',
+                       help='Run a site-specific check function; it is called with '
+                            'the toolkit and its return value is added to the '
+                            'report (repeatable)')
+    parser.add_argument('--fstype', action='append', metavar='TYPE',
+                       help='Only check filesystems of this type, including '
+                            'virtual/network ones such as nfs (repeatable)')
+    parser.add_argument('--exclude-fstype', action='append', metavar='TYPE',
+                       help='Skip filesystems of this type, e.g. squashfs (repeatable)')
+    parser.add_argument('--analyze-path', action='append', metavar='PATH',
+                       help='Also find the largest directories and files under PATH, '
+                            'even if its mount is not above '
+                            f'{DISK_WARNING_PERCENT}%% (implies --largest-dirs; repeatable)')
+    parser.add_argument('--mount-timeout', type=float, default=DEFAULT_MOUNT_TIMEOUT,
+                       help='Seconds to wait for each mount before reporting it '
+                            f'as a timeout (default: {DEFAULT_MOUNT_TIMEOUT:g})')
     
     parser.add_argument('--output', '-o',
-                       help='Output filename (without extension)')
+                       help="Output filename (without extension); '-' writes the "
+                            "report to stdout")
+    parser.add_argument('--compress', choices=list(COMPRESSIONS),
+                       help='Write TXT, CSV, JSON and NDJSON reports through a '
+                            'streaming gzip or xz compressor')
+    parser.add_argument('--keep-days', type=float, metavar='DAYS',
+                       help='After exporting, thin out the report directory: keep '
+                            'every report for DAYS days, then one compressed report '
+                            'per --rollup period')
+    parser.add_argument('--rollup', choices=list(ROLLUPS), default=DEFAULT_ROLLUP,
+                       help=f'Period of the reports kept after --keep-days '
+                            f'(default: {DEFAULT_ROLLUP})')
+    parser.add_argument('--max-days', type=float, metavar='DAYS',
+                       help='With --keep-days, delete reports older than DAYS days')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('--summary-only', action='store_const', const=CONSOLE_SUMMARY,
+                          dest='console', default=CONSOLE_FULL,
+                          help='Print one status line per check instead of full details')
+    verbosity.add_argument('--quiet', '-q', action='store_const', const=CONSOLE_QUIET,
+                          dest='console',
+                          help='Print only the status lines that need attention '
+                               '(nothing on a healthy host)')
+    parser.add_argument('--workers', '-w', type=int,
+                       default=DEFAULT_MAX_WORKERS,
+                       help='Number of checks to run concurrently; 1 runs them '
+                            f'sequentially (default: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--watch', type=float, metavar='INTERVAL',
+                       help='Keep running and re-sample checks every INTERVAL seconds')
+    parser.add_argument('--history-file', default=DEFAULT_HISTORY_FILE,
+                       help='NDJSON file watch mode appends samples to '
+                            f'(default: {DEFAULT_HISTORY_FILE})')
+    parser.add_argument('--history-db', metavar='PATH',
+                       help='Also record the run (or watch samples) in this '
+                            'SQLite history database')
+    parser.add_argument('--post', metavar='URL',
+                       help='Also post the report (or watch samples) to a fleet '
+                            'aggregator, e.g. http://aggregator:8740/reports')
+    parser.add_argument('--history-size', type=int, default=DEFAULT_HISTORY_SIZE,
+                       help='Samples kept in memory in watch mode '
+                            f'(default: {DEFAULT_HISTORY_SIZE})')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                       help='Seconds between history file flushes in watch mode '
+                            f'(default: {DEFAULT_FLUSH_INTERVAL})')
+    parser.add_argument('--targets', metavar='FILE',
+                       help='JSON file listing connectivity probe targets')
+    parser.add_argument('--log-file', action='append', metavar='PATH',
+                       help='Log file for the log scan, instead of the default '
+                            'system logs (repeatable)')
+    parser.add_argument('--log-patterns', metavar='FILE',
+                       help='JSON file mapping pattern names to regexes for the log scan')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Recompute every value instead of reusing cached '
+                            'static facts (partitions, core counts, interfaces, '
+                            'password expiry)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile each check with cProfile (runs checks '
+                            'sequentially), print the hottest functions and save '
+                            '.prof files to --profile-dir')
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR,
+                       help=f'Directory for .prof files (default: {DEFAULT_PROFILE_DIR})')
+    parser.add_argument('--profile-memory', action='store_true',
+                       help='Trace allocations and print the top allocation sites '
+                            'of each check')
+    parser.add_argument('--probe-concurrency', type=int,
+                       default=DEFAULT_PROBE_CONCURRENCY,
+                       help='Maximum simultaneous connectivity probes '
+                            f'(default: {DEFAULT_PROBE_CONCURRENCY})')
     
     args = parser.parse_args()
+    if args.output == '-' and args.format == 'all':
+        parser.error("--output - streams a single format; use --format txt, csv, json or ndjson")
+    
+    toolkit = ITSupportToolkit(
+        max_workers=args.workers,
+        probe_targets=load_probe_targets(args.targets) if args.targets else None,
+        probe_concurrency=args.probe_concurrency,
+        cache=CheckCache() if args.no_cache else CheckCache(default_cache_path()),
+        mount_timeout=args.mount_timeout,
+        fstypes=args.fstype,
+        exclude_fstypes=args.exclude_fstype,
+        profile_dir=args.profile_dir if args.profile else None,
+        trace_memory=args.profile_memory
+    )
     
-    toolkit = ITSupportToolkit()
+    toolkit.console_mode = args.console
+    toolkit.compression = args.compress
+    toolkit.log_files = args.log_file
+    if args.log_patterns:
+        from log_scanner import load_log_patterns
+        toolkit.log_patterns = load_log_patterns(args.log_patterns)
     
     # Check if any specific check is requested
-    specific_checks = args.disk or args.cpu or args.users or args.network or args.password
+    selected = list(dict.fromkeys(args.selected or []))
+    if args.analyze_path:
+        toolkit.analyze_paths = args.analyze_path
+        if 'check_largest_directories' not in selected:
+            selected.append('check_largest_directories')
+    for path in args.plugin or []:
+        selected.append(register_plugin(path).name)
+    
+    if args.watch:
+        cadence = {check_name: get_check(check_name).cadence
+                   for check_name in selected or DEFAULT_CHECKS}
+        if args.console != CONSOLE_QUIET:
+            print(f"Watching {toolkit.report_data['hostname']} every {args.watch:g}s "
+                  f"(history: {args.history_file}). Press Ctrl+C to stop.")
+        daemon = WatchDaemon(toolkit, args.watch, cadence=cadence,
+                             history_size=args.history_size,
+                             history_file=args.history_file,
+                             flush_interval=args.flush_interval,
+                             history_db=args.history_db,
+                             post_url=args.post,
+                             console_mode=args.console)
+        # Service managers stop daemons with SIGTERM; flush history before exiting
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        daemon.run()
+        toolkit.cache.save()
+        return
     
-    if not specific_checks:
-        # Run all checks
-        toolkit.run_all_checks(export_format=args.format)
+    output = args.output
+    if output == '-':
+        # Keep stdout clean for the streamed report; console output goes to stderr
+        output = sys.stdout
+        console = contextlib.redirect_stdout(sys.stderr)
     else:
-        # Run specific checks
-        print("=" * 60)
-        print("IT SUPPORT AUTOMATION TOOLKIT")
-        print("=" * 60)
-        print(f"Hostname: {toolkit.report_data['hostname']}")
-        print(f"OS: {toolkit.report_data['os']}")
-        
-        if args.disk:
-            toolkit.check_disk_space()
-        if args.cpu:
-            toolkit.check_cpu_ram()
-        if args.users:
-            toolkit.list_users()
-        if args.network:
-            toolkit.check_network_connectivity()
-        if args.password:
-            toolkit.check_password_expiry()
-        
-        # Export results
-        print("\n" + "=" * 60)
-        print("EXPORTING REPORT")
-        print("=" * 60)
-        
-        if args.output:
-            if args.format == 'txt':
-                toolkit.export_report_txt(f"{args.output}.txt")
-            elif args.format == 'csv':
-                toolkit.export_report_csv(f"{args.output}.csv")
-            elif args.format == 'json':
-                toolkit.export_report_json(f"{args.output}.json")
-            elif args.format == 'all':
-                toolkit.export_report_txt(f"{args.output}.txt")
-                toolkit.export_report_csv(f"{args.output}.csv")
-                toolkit.export_report_json(f"{args.output}.json")
-        else:
-            if args.format == 'txt':
-                toolkit.export_report_txt()
-            elif args.format == 'csv':
-                toolkit.export_report_csv()
-            elif args.format == 'json':
-                toolkit.export_report_json()
-            elif args.format == 'all':
-                toolkit.export_report_txt()
-                toolkit.export_report_csv()
-                toolkit.export_report_json()
+        console = contextlib.nullcontext()
+    
+    with console:
+        # All checks unless specific ones were requested
+        toolkit.run_selected_checks(selected or DEFAULT_CHECKS, export_format=args.format,
+                                    output=output)
+        if args.keep_days is not None and output is not sys.stdout:
+            toolkit.apply_retention(os.path.dirname(output or '') or '.', args.keep_days,
+                                    args.rollup, args.max_days)
+    
+    toolkit.cache.save()
+    if args.profile or args.profile_memory:
+        with console:
+            toolkit.spans.print_report()
+        toolkit.spans.stop()
+    if args.history_db:
+        toolkit.export_report_sqlite(args.history_db)
+    if args.post:
+        toolkit.post_report(args.post)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Log Scanner - Count errors and authentication failures in system logs
+
+Each run reads only what was appended since the previous run. The byte
+offset, device and inode of every log are persisted in the toolkit state
+directory, and new bytes are read through ``mmap`` and matched by one
+precompiled regex that combines all patterns, so a run costs a single
+pass over the new data however many patterns are configured. Only the
+lines it finds are tested against the individual patterns, to count each
+under the first pattern (in configured order) that matches it.
+
+Rotation is detected from the inode: when a log was renamed away
+(logrotate's default), the rest of the old file is read from its rotated
+name (``syslog.1``) before the new file is read from the start. A log
+truncated in place (``copytruncate``) is read again from the start; it is
+recognised by its size, or by a checksum of the bytes before the saved
+offset if it has already grown past it again. On the first run only the
+last ``DEFAULT_INITIAL_BYTES`` of each log are read, so a multi-gigabyte
+history is never scanned in full.
+"""
+
+import mmap
+import os
+import re
+import zlib
+from collections import deque
+
+from check_cache import state_dir, write_state_file
+
+
+DEFAULT_LOG_FILES = (
+    '/var/log/syslog',
+    '/var/log/messages',
+    '/var/log/auth.log',
+    '/var/log/secure',
+    '/var/log/kern.log',
+)
+
+# Pattern name -> regex; a line is counted once, under the first pattern that
+# matches it, so more specific patterns go first
+DEFAULT_LOG_PATTERNS = {
+    'auth_failure': r'authentication failure|failed password|invalid user|'
+                    r'failed su|pam_unix\([^)]*\): auth could not',
+    'error': r'\b(?:error|critical|panic|segfault|i/o error|out of memory|oom-killer)\b',
+}
+
+DEFAULT_INITIAL_BYTES = 16 * 1024 * 1024
+DEFAULT_SAMPLES = 5
+MAX_SAMPLE_LENGTH = 300
+# Bytes before the saved offset whose checksum must still match on the next run
+TAIL_CHECK_BYTES = 64
+LOG_STATE_FILENAME = 'log_offsets.json'
+LOG_STATE_VERSION = 1
+
+
+def default_log_state_path():
+    return os.path.join(state_dir(), LOG_STATE_FILENAME)
+
+
+def _tail_checksum(f, offset):
+    """Checksum of the bytes just before ``offset``; detects logs rewritten in place."""
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    f.seek(start)
+    return zlib.crc32(f.read(offset - start))
+
+
+def load_log_patterns(path):
+    """Load ``{"name": "regex", ...}`` log patterns from a JSON file."""
+    import json
+    with open(path) as f:
+        patterns = json.load(f)
+    if not isinstance(patterns, dict) or not patterns:
+        raise ValueError(f"{path}: expected an object mapping pattern names to regexes")
+    return {str(name): str(regex) for name, regex in patterns.items()}
+
+
+def compile_patterns(patterns):
+    """
+    Combine named patterns into one case-insensitive bytes regex.
+    
+    Each pattern becomes a named group, so ``match.lastgroup`` tells which
+    one matched. That is the pattern matching leftmost on the line, not
+    necessarily the first in order; see ``LogScanner._pattern_index``.
+    """
+    groups = []
+    for index, regex in enumerate(patterns.values()):
+        re.compile(regex)  # Report a bad pattern on its own, not inside the union
+        groups.append(f'(?P<p{index}>{regex})')
+    return re.compile('|'.join(groups).encode('utf-8'), re.IGNORECASE)
+
+
+class LogScanner:
+    """Incremental pattern counter for append-only log files."""
+    
+    def __init__(self, state_path=None, patterns=None, initial_bytes=DEFAULT_INITIAL_BYTES,
+                 samples=DEFAULT_SAMPLES):
+        self.state_path = os.fspath(state_path) if state_path else None
+        self.patterns = dict(patterns or DEFAULT_LOG_PATTERNS)
+        self._names = list(self.patterns)
+        self._regex = compile_patterns(self.patterns)
+        self._pattern_regexes = [re.compile(regex.encode('utf-8'), re.IGNORECASE)
+                                 for regex in self.patterns.values()]
+        self.initial_bytes = initial_bytes
+        self.samples = samples
+        self._state = {}
+        self._dirty = False
+        if self.state_path is not None:
+            self._load()
+    
+    def _load(self):
+        import json
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == LOG_STATE_VERSION:
+            self._state = data.get('files', {})
+    
+    def save(self):
+        if self.state_path is None or not self._dirty:
+            return
+        try:
+            write_state_file(self.state_path, {'version': LOG_STATE_VERSION,
+                                               'files': self._state})
+            self._dirty = False
+        except (OSError, TypeError) as e:
+            print(f"⚠️  Could not save log offsets {self.state_path}: {e}")
+    
+    def _pattern_index(self, match, line):
+        """Index of the first pattern matching ``line``, given the combined ``match`` in it."""
+        index = int(match.lastgroup[1:])
+        # An earlier pattern may match further right on the same line
+        for earlier in range(index):
+            if self._pattern_regexes[earlier].search(line):
+                return earlier
+        return index
+    
+    def _scan_range(self, f, start, end, counts, samples):
+        """Match complete lines in ``[start, end)``; returns the offset after the last one."""
+        if end <= start:
+            return start
+        # mmap offsets must be multiples of the allocation granularity
+        base = start - start % mmap.ALLOCATIONGRANULARITY
+        with mmap.mmap(f.fileno(), end - base, access=mmap.ACCESS_READ, offset=base) as data:
+            limit = data.rfind(b'\n', start - base) + 1
+            if limit <= 0:
+                return start  # No complete line yet
+            
+            regex, names = self._regex, self._names
+            pos = start - base
+            while True:
+                match = regex.search(data, pos, limit)
+                if match is None:
+                    break
+                line_start = data.rfind(b'\n', 0, match.start()) + 1
+                line_end = data.find(b'\n', match.end(), limit)
+                if line_end < 0:
+                    line_end = limit - 1  # The match swallowed the final newline
+                line = data[line_start:line_end]
+                name = names[self._pattern_index(match, line)]
+                counts[name] += 1
+                samples[name].append(line[:MAX_SAMPLE_LENGTH].decode('utf-8', 'replace').strip())
+                # One count per line: continue after the matched line
+                pos = line_end + 1
+            return base + limit
+    
+    def scan(self, path):
+        """
+        Scan what was appended to ``path`` since the last call.
+        
+        Returns ``{'path', 'status', 'bytes_read', 'rotated', 'matches',
+        'samples'}``; status is 'ok', 'missing' or 'unreadable'.
+        """
+        result = {'path': path, 'status': 'ok', 'bytes_read': 0, 'rotated': False,
+                  'matches': {name: 0 for name in self.patterns},
+                  'samples': {}}
+        samples = {name: deque(maxlen=self.samples) for name in self.patterns}
+        previous = self._state.get(path)
+        
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            result['status'] = 'missing'
+            return result
+        except OSError as e:
+            result['status'] = 'unreadable'
+            result['error'] = str(e)
+            return result
+        
+        with f:
+            st = os.fstat(f.fileno())
+            identity = [st.st_dev, st.st_ino]
+            if previous is None:
+                # First sight of this log: only read its tail
+                offset = max(0, st.st_size - self.initial_bytes)
+                if offset:
+                    f.seek(offset - 1)
+                    offset += len(f.readline()) - 1  # Start at a line boundary
+            elif previous['identity'] != identity:
+                result['rotated'] = True
+                result['bytes_read'] += self._finish_rotated(path, previous, result['matches'],
+                                                             samples)
+                offset = 0
+            elif (st.st_size < previous['offset']
+                  or _tail_checksum(f, previous['offset']) != previous['tail']):
+                # Truncated in place (copytruncate), possibly already refilled
+                result['rotated'] = True
+                offset = 0
+            else:
+                offset = previous['offset']
+            
+            try:
+                new_offset = self._scan_range(f, offset, st.st_size, result['matches'], samples)
+            except (OSError, ValueError) as e:
+                # Not mappable, e.g. a FIFO or a file on a filesystem without mmap
+                result['status'] = 'unreadable'
+                result['error'] = str(e)
+                return result
+            result['bytes_read'] += new_offset - offset
+            
+            tail = _tail_checksum(f, new_offset)
+        
+        self._state[path] = {'identity': identity, 'offset': new_offset, 'tail': tail}
+        self._dirty = True
+        result['samples'] = {name: list(lines) for name, lines in samples.items() if lines}
+        return result
+    
+    def _finish_rotated(self, path, previous, counts, samples):
+        """Read the unscanned tail of a rotated-away log, if it is still at ``path.1``."""
+        rotated_path = f'{path}.1'
+        try:
+            with open(rotated_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if [st.st_dev, st.st_ino] != previous['identity']:
+                    return 0
+                start = min(previous['offset'], st.st_size)
+                return self._scan_range(f, start, st.st_size, counts, samples) - start
+        except OSError:
+            return 0
+    
+    def scan_files(self, paths):
+        """Scan several logs; returns one result per path, in order."""
+        return [self.scan(path) for path in paths]
+
+
+def main():
+    """Scan logs from the command line, remembering offsets between runs."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Count errors and authentication failures appended to system logs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                            # Scan the default system logs
+  %(prog)s /var/log/nginx/error.log --patterns patterns.json
+  %(prog)s --reset                    # Forget saved offsets first
+        """
+    )
+    parser.add_argument('paths', nargs='*', metavar='LOG',
+                       help='Log files to scan (default: common system logs)')
+    parser.add_argument('--patterns', metavar='FILE',
+                       help='JSON file mapping pattern names to regexes')
+    parser.add_argument('--reset', action='store_true',
+                       help='Ignore saved offsets and start from the tail of each log')
+    args = parser.parse_args()
+    
+    state_path = default_log_state_path()
+    if args.reset and os.path.exists(state_path):
+        os.remove(state_path)
+    scanner = LogScanner(state_path,
+                         load_log_patterns(args.patterns) if args.patterns else None)
+    for result in scanner.scan_files(args.paths or DEFAULT_LOG_FILES):
+        if result['status'] == 'missing':
+            continue
+        if result['status'] != 'ok':
+            print(f"✗ {result['path']}: {result.get('error', result['status'])}")
+            continue
+        found = sum(result['matches'].values())
+        status = "⚠️" if found else "✓"
+        print(f"{status} {result['path']}: {result['bytes_read']} new bytes"
+              f"{' (rotated)' if result['rotated'] else ''} - " +
+              ", ".join(f"{name}: {count}" for name, count in result['matches'].items()))
+        for name, lines in result['samples'].items():
+            for line in lines:
+                print(f"   [{name}] {line}")
+    scanner.save()
+
+
+if __name__ == '__main__':
+    main()
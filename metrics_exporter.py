@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter - Serve IT support health checks as OpenMetrics
+
+A background thread re-runs the checks every ``ttl`` seconds and renders
+the results into a ready-to-send OpenMetrics payload. Scrapes of
+``/metrics`` only return the latest pre-rendered bytes, so they never wait
+for a CPU sample, a network probe or any other check.
+"""
+
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+from http_handlers import KeepAliveHandler
+from it_support_toolkit import ITSupportToolkit, load_probe_targets
+
+
+DEFAULT_PORT = 9740
+DEFAULT_TTL = 15
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Checks refreshed for the snapshot; password expiry is too slow-moving to scrape
+METRIC_CHECKS = (
+    'check_disk_space',
+    'check_cpu_ram',
+    'list_users',
+    'check_network_connectivity',
+    'check_interface_traffic',
+)
+
+
+def _escape(value):
+    """Escape a label value for the OpenMetrics text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _MetricWriter:
+    """Collect samples grouped by metric family, then render them in one string."""
+    
+    def __init__(self):
+        self._families = {}
+    
+    def add(self, name, help_text, value, **labels):
+        if not isinstance(value, (int, float)):
+            return
+        family = self._families.setdefault(name, (help_text, []))
+        family[1].append(f"{name}{_labels(**labels)} {float(value)!r}")
+    
+    def render(self):
+        lines = []
+        for name, (help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def render_openmetrics(report_data, duration=None):
+    """Render a toolkit ``report_data`` dict as OpenMetrics text."""
+    checks = report_data.get('checks', {})
+    metrics = _MetricWriter()
+    
+    for disk in checks.get('disk_space') or []:
+        metrics.add('it_support_disk_used_percent', 'Disk space used per mountpoint.',
+                    disk.get('percent_used'), mountpoint=disk['mountpoint'],
+                    device=disk['device'], fstype=disk['filesystem'])
+    
+    cpu = checks.get('cpu')
+    if cpu:
+        metrics.add('it_support_cpu_usage_percent', 'CPU utilisation.',
+                    cpu.get('usage_percent'))
+        for window, percent in (cpu.get('average_percent') or {}).items():
+            metrics.add('it_support_cpu_usage_average_percent',
+                        'CPU utilisation averaged over a rolling window.',
+                        percent, window=window)
+        for core, percent in enumerate(cpu.get('per_core_percent') or []):
+            metrics.add('it_support_cpu_core_usage_percent', 'Per-core CPU utilisation.',
+                        percent, core=core)
+    
+    ram = checks.get('ram')
+    if ram:
+        metrics.add('it_support_ram_used_percent', 'RAM used.', ram.get('percent_used'))
+    
+    users = checks.get('users')
+    if isinstance(users, list):
+        metrics.add('it_support_logged_in_users', 'Logged-in user sessions.', len(users))
+    
+    net = checks.get('network') or {}
+    for test in net.get('connectivity_tests', []):
+        labels = {'target': test['description'], 'host': test['host'],
+                  'port': test['port']}
+        metrics.add('it_support_probe_up', 'Whether the TCP probe connected (1) or not (0).',
+                    1 if test['reachable'] else 0, **labels)
+        if test.get('latency_ms') is not None:
+            metrics.add('it_support_probe_latency_seconds',
+                        'Total probe time (name resolution plus connect).',
+                        test['latency_ms'] / 1000, **labels)
+        # Cached answers took no lookup; only report real resolution times
+        if test.get('dns_ms') is not None and not test.get('dns_cached'):
+            metrics.add('it_support_probe_dns_seconds', 'Name resolution time of the probe.',
+                        test['dns_ms'] / 1000, **labels)
+        if test.get('connect_ms') is not None:
+            metrics.add('it_support_probe_connect_seconds',
+                        'TCP handshake time of the probe, excluding name resolution.',
+                        test['connect_ms'] / 1000, **labels)
+    
+    traffic = checks.get('traffic') or {}
+    for nic in traffic.get('interfaces', []):
+        for direction in ('recv', 'sent'):
+            metrics.add('it_support_interface_bytes_per_second',
+                        'Interface throughput since the previous sample.',
+                        nic[f'bytes_{direction}_per_s'], interface=nic['interface'],
+                        direction=direction)
+        metrics.add('it_support_interface_utilization_percent',
+                    'Interface throughput as a share of link speed.',
+                    nic['utilization_percent'], interface=nic['interface'])
+        for kind in ('errors', 'drops'):
+            for direction in ('in', 'out'):
+                metrics.add(f'it_support_interface_{kind}',
+                            f'Interface {kind} since the previous sample.',
+                            nic[f'{kind}_{direction}'], interface=nic['interface'],
+                            direction=direction)
+    
+    for name, timing in (report_data.get('timings') or {}).items():
+        metrics.add('it_support_check_duration_seconds',
+                    'Wall time of the latest run of each check or export.',
+                    timing['wall_ms'] / 1000, check=name)
+    
+    if duration is not None:
+        metrics.add('it_support_snapshot_duration_seconds',
+                    'Time taken to refresh the snapshot.', duration)
+    metrics.add('it_support_snapshot_timestamp_seconds',
+                'Unix time the snapshot was taken.', time.time())
+    return metrics.render()
+
+
+class MetricsSnapshot:
+    """
+    OpenMetrics payload refreshed in the background every ``ttl`` seconds.
+    
+    The payload is rendered once per refresh and swapped in atomically, so
+    readers never block on a refresh in progress.
+    """
+    
+    def __init__(self, toolkit=None, ttl=DEFAULT_TTL, checks=METRIC_CHECKS):
+        self.toolkit = toolkit or ITSupportToolkit()
+        self.ttl = ttl
+        self.checks = tuple(checks)
+        self.refreshes = 0
+        self._payload = b'# EOF\n'
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def payload(self):
+        """Latest rendered payload (bytes)."""
+        return self._payload
+    
+    def refresh(self):
+        """Re-run the checks and re-render the payload."""
+        start = time.perf_counter()
+        self.toolkit.report_data['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.toolkit.run_checks(self.checks, echo=False)
+        duration = time.perf_counter() - start
+        self._payload = render_openmetrics(self.toolkit.report_data, duration).encode('utf-8')
+        self.refreshes += 1
+    
+    def _run(self):
+        while not self._stop.wait(self.ttl):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Metrics refresh failed: {e}")
+    
+    def start(self):
+        """Take the first snapshot, then keep refreshing in a background thread."""
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name='metrics-refresh',
+                                        daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.toolkit.cpu_sampler.stop()
+
+
+class _MetricsHandler(KeepAliveHandler):
+    """Serve the snapshot payload; ``server.snapshot`` is the MetricsSnapshot."""
+    
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            body = b'Not found\n'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain')
+        else:
+            body = self.server.snapshot.payload
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """HTTP server exposing a MetricsSnapshot on /metrics."""
+    
+    def __init__(self, snapshot, host='0.0.0.0', port=DEFAULT_PORT):
+        self.snapshot = snapshot
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.snapshot = snapshot
+        self._thread = None
+    
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+    
+    def start(self):
+        self.snapshot.start()
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name='metrics-http', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+        self.snapshot.stop()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    """Serve /metrics until interrupted."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='Expose IT support health checks as OpenMetrics for Prometheus',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                          # Serve on 0.0.0.0:9740/metrics
+  %(prog)s --port 9100 --ttl 30
+  %(prog)s --targets targets.json   # Probe custom connectivity targets
+        """
+    )
+    parser.add_argument('--bind', default='0.0.0.0',
+                       help='Address to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                       help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL,
+                       help=f'Seconds between snapshot refreshes (default: {DEFAULT_TTL})')
+    parser.add_argument('--targets', metavar='FILE',
+                       help='JSON file listing connectivity probe targets')
+    args = parser.parse_args()
+    
+    toolkit = ITSupportToolkit(
+        probe_targets=load_probe_targets(args.targets) if args.targets else None
+    )
+    server = MetricsServer(MetricsSnapshot(toolkit, ttl=args.ttl), args.bind, args.port)
+    server.start()
+    host, port = server.address
+    print(f"✓ Serving metrics on http://{host}:{port}/metrics (refresh every {args.ttl:g}s)")
+    print("Press Ctrl+C to stop.")
+    
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nStopping metrics exporter...")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Report Files - Compressed report streams and retention planning
+
+Reports can be written as ``.gz`` or ``.xz`` files. ``open_report`` picks
+the codec from the file name and returns a text stream that compresses
+(or decompresses) as it goes, so exporters write straight into the
+compressor and readers never unpack a report to disk or into memory first.
+
+``plan_retention`` decides which reports of a directory to keep: every
+report for ``keep_days``, then only the newest report of each host and
+format per hour or per day, and nothing older than ``max_days`` (if set).
+The rollups it keeps are compressed.
+"""
+
+import os
+import shutil
+from datetime import datetime, timedelta
+
+
+# Compression name -> file suffix
+COMPRESSIONS = {'gzip': '.gz', 'xz': '.xz'}
+DEFAULT_COMPRESSION = 'gzip'
+# gzip's default level 9 is several times slower for a few percent smaller files
+GZIP_LEVEL = 6
+
+ROLLUPS = {'hourly': 13, 'daily': 10}  # Length of the 'YYYY-MM-DD HH' bucket prefix
+DEFAULT_KEEP_DAYS = 7
+DEFAULT_ROLLUP = 'daily'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def compression_of(path):
+    """Return 'gzip', 'xz' or None for a report path."""
+    name = os.fspath(path)
+    for compression, suffix in COMPRESSIONS.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def strip_compression(name):
+    """Return ``name`` without its compression suffix."""
+    compression = compression_of(name)
+    return name[:-len(COMPRESSIONS[compression])] if compression else name
+
+
+def open_report(path, mode='r', newline=None, buffering=-1):
+    """
+    Open a report as a text stream, compressing or decompressing by suffix.
+    
+    ``mode`` is 'r', 'w' or 'a'; ``buffering`` only applies to
+    uncompressed files.
+    """
+    compression = compression_of(path)
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, mode + 't', compresslevel=GZIP_LEVEL, newline=newline,
+                         errors='replace' if mode == 'r' else None)
+    if compression == 'xz':
+        import lzma
+        return lzma.open(path, mode + 't', newline=newline,
+                         errors='replace' if mode == 'r' else None)
+    return open(path, mode, buffering=buffering, newline=newline,
+                errors='replace' if mode == 'r' else None)
+
+
+def compress_file(path, compression=DEFAULT_COMPRESSION):
+    """
+    Compress ``path`` next to itself, keeping its timestamps, then remove it.
+    
+    Returns the new path.
+    """
+    path = os.fspath(path)
+    target = path + COMPRESSIONS[compression]
+    stat = os.stat(path)
+    if compression == 'gzip':
+        import gzip
+        compressed = gzip.open(target, 'wb', compresslevel=GZIP_LEVEL)
+    else:
+        import lzma
+        compressed = lzma.open(target, 'wb')
+    try:
+        with open(path, 'rb') as source, compressed:
+            shutil.copyfileobj(source, compressed)
+    except BaseException:
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.remove(path)
+    return target
+
+
+def plan_retention(entries, keep_days=DEFAULT_KEEP_DAYS, rollup=DEFAULT_ROLLUP,
+                   max_days=None, now=None):
+    """
+    Decide what to do with each report.
+    
+    ``entries`` maps file name to ``{'timestamp', 'host', 'format'}`` (as
+    in the view_reports catalogue). Returns ``(delete, compress)``: names
+    to remove, and names of uncompressed rollups to compress. Reports newer
+    than ``keep_days`` are all kept as they are.
+    """
+    if rollup not in ROLLUPS:
+        raise ValueError(f"Unknown rollup {rollup!r}; expected one of {', '.join(ROLLUPS)}")
+    now = now or datetime.now()
+    keep_after = (now - timedelta(days=keep_days)).strftime(TIMESTAMP_FORMAT)
+    drop_before = ((now - timedelta(days=max_days)).strftime(TIMESTAMP_FORMAT)
+                   if max_days is not None else None)
+    
+    delete, newest = [], {}
+    for name, entry in entries.items():
+        timestamp = entry['timestamp']
+        if timestamp >= keep_after:
+            continue
+        if drop_before is not None and timestamp < drop_before:
+            delete.append(name)
+            continue
+        bucket = (entry.get('host'), entry['format'], timestamp[:ROLLUPS[rollup]])
+        best = newest.get(bucket)
+        if best is None or (timestamp, name) > (entries[best]['timestamp'], best):
+            if best is not None:
+                delete.append(best)
+            newest[bucket] = name
+        else:
+            delete.append(name)
+    
+    compress = sorted(name for name in newest.values() if compression_of(name) is None)
+    return sorted(delete), compress
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Report Records - Compact record types for per-item check results
+
+Disk partitions, processes, user sessions, interfaces and probe results
+are the bulk of a report, and as plain dicts each one carries its own key
+table. The record types here store their fields in ``__slots__`` and
+intern strings that repeat across records and hosts (filesystem types,
+devices, terminals, probe targets), which makes a report several times
+smaller when many are held in one process, e.g. by the fleet aggregator.
+
+Records are read-only mappings, so code that reads ``disk['mountpoint']``
+or ``test.get('error')`` keeps working, and they serialise to the same
+JSON objects as the dicts they replace (pass ``default=record_default`` to
+``json.dump``).
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+class _Missing:
+    """Marker for optional fields that are left out of the mapping."""
+    
+    __slots__ = ()
+    
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+
+class Record(Mapping):
+    """
+    Base class for slot-based report records.
+    
+    Subclasses list their keys in ``__slots__`` (in JSON key order), the
+    keys only present when set in ``_optional`` and the string fields worth
+    interning in ``_interned``.
+    """
+    
+    __slots__ = ()
+    _optional = frozenset()
+    _interned = frozenset()
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields.pop(name, MISSING)
+            if value is MISSING and name not in self._optional:
+                raise TypeError(f"{type(self).__name__} missing field {name!r}")
+            if name in self._interned and type(value) is str:
+                value = sys.intern(value)
+            object.__setattr__(self, name, value)
+        if fields:
+            raise TypeError(f"{type(self).__name__} got unexpected field(s) "
+                            f"{', '.join(sorted(fields))}")
+    
+    @classmethod
+    def from_mapping(cls, data):
+        """Build a record from a dict, or return None if its keys do not fit."""
+        if not isinstance(data, Mapping):
+            return None
+        if isinstance(data, cls):
+            return data
+        try:
+            return cls(**data)
+        except TypeError:
+            return None
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+    
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return (name for name in self.__slots__ if getattr(self, name) is not MISSING)
+    
+    def __len__(self):
+        return sum(1 for _ in self)
+    
+    def __reduce__(self):
+        return type(self)._from_dict, (dict(self),)
+    
+    @classmethod
+    def _from_dict(cls, data):
+        return cls(**data)
+    
+    def to_dict(self):
+        return dict(self)
+    
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+
+class DiskRecord(Record):
+    """One partition from the disk space check."""
+    
+    __slots__ = ('device', 'mountpoint', 'filesystem', 'total_gb', 'used_gb',
+                 'free_gb', 'percent_used', 'status', 'error')
+    _optional = frozenset(('error',))
+    _interned = frozenset(('device', 'mountpoint', 'filesystem', 'status'))
+
+
+class ProcessRecord(Record):
+    """One process from the top-processes check."""
+    
+    __slots__ = ('pid', 'name', 'username', 'cpu_percent', 'rss_mb', 'memory_percent')
+    _interned = frozenset(('name', 'username'))
+
+
+class UserSession(Record):
+    """One logged-in user session."""
+    
+    __slots__ = ('name', 'terminal', 'host', 'started')
+    _interned = frozenset(('name', 'terminal', 'host'))
+
+
+class InterfaceRecord(Record):
+    """One IPv4 address of a network interface."""
+    
+    __slots__ = ('interface', 'ip_address', 'netmask')
+    _interned = frozenset(('interface', 'netmask'))
+
+
+class TrafficRecord(Record):
+    """Throughput and error counts of one network interface."""
+    
+    __slots__ = ('interface', 'status', 'bytes_recv_per_s', 'bytes_sent_per_s',
+                 'packets_recv_per_s', 'packets_sent_per_s', 'errors_in', 'errors_out',
+                 'drops_in', 'drops_out', 'speed_mbps', 'utilization_percent')
+    _interned = frozenset(('interface', 'status'))
+
+
+class ProbeResult(Record):
+    """Outcome of one TCP connectivity probe."""
+    
+    __slots__ = ('host', 'port', 'description', 'reachable', 'latency_ms', 'dns_ms',
+                 'dns_cached', 'connect_ms', 'address', 'error')
+    # Reports from before the resolver timings lack the middle fields
+    _optional = frozenset(('dns_ms', 'dns_cached', 'connect_ms', 'address', 'error'))
+    _interned = frozenset(('host', 'description', 'error'))
+
+
+def record_default(value):
+    """``json.dump(default=...)`` hook that serialises records as plain objects."""
+    if isinstance(value, Record):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _compact_list(record_type, items):
+    if not isinstance(items, list):
+        return items
+    # Items that do not fit the record (e.g. from a newer agent) stay dicts
+    return [record_type.from_mapping(item) or item for item in items]
+
+
+def compact_report(report):
+    """
+    Replace the per-item dicts of a decoded report with record types, in place.
+    
+    Returns the report, so it can wrap ``json.loads`` directly.
+    """
+    checks = report.get('checks')
+    if not isinstance(checks, dict):
+        return report
+    if 'disk_space' in checks:
+        checks['disk_space'] = _compact_list(DiskRecord, checks['disk_space'])
+    processes = checks.get('processes')
+    if isinstance(processes, dict):
+        for key in ('top_cpu', 'top_memory'):
+            if key in processes:
+                processes[key] = _compact_list(ProcessRecord, processes[key])
+    if 'users' in checks:
+        checks['users'] = _compact_list(UserSession, checks['users'])
+    traffic = checks.get('traffic')
+    if isinstance(traffic, dict) and 'interfaces' in traffic:
+        traffic['interfaces'] = _compact_list(TrafficRecord, traffic['interfaces'])
+    network = checks.get('network')
+    if isinstance(network, dict):
+        if 'interfaces' in network:
+            network['interfaces'] = _compact_list(InterfaceRecord, network['interfaces'])
+        if 'connectivity_tests' in network:
+            network['connectivity_tests'] = _compact_list(ProbeResult,
+                                                          network['connectivity_tests'])
+    return report
@@ -3,11 +3,37 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import sys
 import os
+import io
+import time
+import json
+import socket
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from collections import namedtuple
+from datetime import date
+from pathlib import Path
+from contextlib import redirect_stdout
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from it_support_toolkit import ITSupportToolkit
+import view_reports
+from history_store import HistoryStore
+from fleet_aggregator import FleetAggregator
+from metrics_exporter import MetricsServer, MetricsSnapshot, render_openmetrics
+from check_cache import CheckCache
+from dir_analyzer import DirectorySizeCache, analyze_directory
+from log_scanner import LogScanner
+from report_records import DiskRecord, ProbeResult, compact_report, record_default
+from benchmark_toolkit import compare_results, run_benchmarks
+from it_support_toolkit import (ITSupportToolkit, CPUSampler, WatchDaemon,
+                                ReportPoster, ReportPostError,
+                                load_probe_targets, probe_targets, read_password_expiry,
+                                stat_mounts, counter_delta, register_check, register_plugin,
+                                schedule_checks, CHECK_REGISTRY, ConsoleRenderer,
+                                CONSOLE_QUIET, CONSOLE_SUMMARY)
 
 
 class TestITSupportToolkit(unittest.TestCase):
@@ -17,6 +43,10 @@ class TestITSupportToolkit(unittest.TestCase):
         """Set up test fixtures."""
         self.toolkit = ITSupportToolkit()
     
+    def tearDown(self):
+        """Stop background samplers started by the checks."""
+        self.toolkit.cpu_sampler.stop()
+    
     def test_initialization(self):
         """Test toolkit initialization."""
         self.assertIsNotNone(self.toolkit.report_data)
@@ -51,14 +81,15 @@ class TestITSupportToolkit(unittest.TestCase):
         self.assertEqual(result[0]['device'], '/dev/sda1')
         self.assertEqual(result[0]['percent_used'], 50.0)
     
-    @patch('psutil.cpu_percent')
+    @patch.object(CPUSampler, 'usage')
     @patch('psutil.cpu_count')
     @patch('psutil.cpu_freq')
     @patch('psutil.virtual_memory')
     def test_check_cpu_ram(self, mock_vmem, mock_cpu_freq, mock_cpu_count, mock_cpu_percent):
         """Test CPU and RAM checking."""
         # Mock CPU
-        mock_cpu_percent.return_value = 25.5
+        mock_cpu_percent.return_value = {'percent': 25.5, 'per_core': [20.0, 31.0],
+                                         'seconds': 60.0}
         mock_cpu_count.side_effect = [4, 8]  # physical, logical
         
         mock_freq = Mock()
@@ -77,12 +108,138 @@ class TestITSupportToolkit(unittest.TestCase):
         cpu_data, ram_data = self.toolkit.check_cpu_ram()
         
         self.assertEqual(cpu_data['usage_percent'], 25.5)
+        self.assertEqual(cpu_data['per_core_percent'], [20.0, 31.0])
+        self.assertEqual(cpu_data['average_percent'], {'1s': 25.5, '10s': 25.5, '60s': 25.5})
         self.assertEqual(cpu_data['physical_cores'], 4)
         self.assertEqual(cpu_data['logical_cores'], 8)
         
         self.assertEqual(ram_data['percent_used'], 50.0)
         self.assertEqual(ram_data['total_gb'], 16.0)
     
+    def test_stat_mounts_deadline(self):
+        """Test that a hung mount is reported as a timeout without stalling the rest."""
+        release = threading.Event()
+        usage = Mock(total=1, used=0, free=1, percent=0.0)
+        with tempfile.TemporaryDirectory() as hung, tempfile.TemporaryDirectory() as fine:
+            def fake_usage(mountpoint):
+                if mountpoint == hung:
+                    release.wait(10)
+                return usage
+            
+            try:
+                with patch('psutil.disk_usage', side_effect=fake_usage):
+                    start = time.monotonic()
+                    results = stat_mounts([hung, fine], timeout=0.2, workers=1)
+                    elapsed = time.monotonic() - start
+            finally:
+                release.set()
+        
+        self.assertIsNone(results[hung])
+        self.assertIs(results[fine][1], usage)
+        self.assertLess(elapsed, 2)
+    
+    @patch('psutil.disk_partitions')
+    def test_check_disk_space_filters_and_bind_mounts(self, mock_disk_partitions):
+        """Test fstype filters and that bind mounts of one filesystem are listed once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original = os.path.join(tmpdir, 'data')
+            bind = os.path.join(tmpdir, 'bind')
+            os.mkdir(original)
+            os.mkdir(bind)
+            mock_disk_partitions.return_value = [
+                Mock(device='/dev/sdb1', mountpoint=original, fstype='ext4'),
+                Mock(device='/dev/sdb1', mountpoint=bind, fstype='ext4'),
+                Mock(device='/dev/loop0', mountpoint=tmpdir, fstype='squashfs'),
+            ]
+            self.toolkit.exclude_fstypes = {'squashfs'}
+            
+            with redirect_stdout(io.StringIO()):
+                result = self.toolkit.check_disk_space()
+        
+        self.assertEqual([disk['mountpoint'] for disk in result], [original])
+        self.assertEqual(result[0]['status'], 'ok')
+    
+    @patch('time.sleep')
+    @patch('psutil.process_iter')
+    def test_top_processes_share_one_interval(self, mock_process_iter, mock_sleep):
+        """Test that CPU is sampled in two passes and only the top N are kept."""
+        cpu_times = namedtuple('pcputimes', 'user system')
+        memory_info = namedtuple('pmem', 'rss vms')
+        
+        def processes(cpu_used):
+            procs = []
+            for pid, (cpu, rss_mb) in enumerate(zip(cpu_used, (10, 500, 20, 300)), 1):
+                proc = Mock(pid=pid, info={
+                    'name': f'proc{pid}', 'create_time': 1.0,
+                    'cpu_times': cpu_times(cpu, 0.0),
+                    'memory_info': memory_info(rss_mb * 1024**2, 0)})
+                proc.username.return_value = 'alice'
+                procs.append(proc)
+            return iter(procs)
+        
+        mock_process_iter.side_effect = [processes((1.0, 1.0, 1.0, 1.0)),
+                                         processes((5.0, 1.0, 2.0, 1.0)),
+                                         processes((6.0, 1.0, 9.0, 1.0))]
+        self.toolkit.top_processes = 2
+        
+        with redirect_stdout(io.StringIO()):
+            result = self.toolkit.check_top_processes()
+        
+        self.assertEqual(mock_process_iter.call_count, 2)
+        mock_sleep.assert_called_once_with(self.toolkit.process_interval)
+        self.assertEqual(result['total'], 4)
+        self.assertEqual([proc['pid'] for proc in result['top_cpu']], [1, 3])
+        self.assertEqual([proc['pid'] for proc in result['top_memory']], [2, 4])
+        self.assertEqual(result['top_memory'][0]['rss_mb'], 500.0)
+        self.assertEqual(result['top_cpu'][0]['username'], 'alice')
+        
+        # The next run measures against the previous sample instead of sleeping
+        with redirect_stdout(io.StringIO()):
+            result = self.toolkit.check_top_processes()
+        
+        self.assertEqual(mock_process_iter.call_count, 3)
+        mock_sleep.assert_called_once()
+        self.assertEqual(result['top_cpu'][0]['pid'], 3)
+    
+    @patch('time.sleep')
+    @patch('psutil.net_if_stats')
+    @patch('psutil.net_io_counters')
+    def test_interface_traffic_from_counter_deltas(self, mock_counters, mock_stats, mock_sleep):
+        """Test that traffic comes from counter deltas across wraps and NIC changes."""
+        counters = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv '
+                                        'errin errout dropin dropout')
+        mock_stats.return_value = {'eth0': Mock(speed=1000), 'eth1': Mock(speed=0)}
+        mock_counters.side_effect = [
+            {'eth0': counters(2**32 - 100, 5000, 10, 20, 0, 0, 0, 0),
+             'eth1': counters(100, 100, 1, 1, 0, 0, 0, 0)},
+            {'eth0': counters(2**32 - 100, 5000, 10, 20, 0, 0, 0, 0),
+             'eth1': counters(100, 100, 1, 1, 0, 0, 0, 0)},
+            {'eth0': counters(400, 9000, 15, 30, 2, 0, 1, 0),
+             'wlan0': counters(1, 1, 1, 1, 0, 0, 0, 0)},
+        ]
+        
+        with redirect_stdout(io.StringIO()):
+            self.toolkit.check_interface_traffic()
+            # The next run measures against the saved snapshot instead of sleeping
+            result = self.toolkit.check_interface_traffic()
+        
+        mock_sleep.assert_called_once_with(self.toolkit.traffic_interval)
+        self.assertEqual(counter_delta(2**32 - 100, 400), 500)
+        self.assertEqual(counter_delta(2**40, 400), 400)  # Reset, not a wrap
+        eth0, wlan0 = result['interfaces']
+        self.assertEqual((eth0['errors_in'], eth0['drops_in']), (2, 1))
+        self.assertEqual(eth0['speed_mbps'], 1000)
+        self.assertGreater(eth0['bytes_sent_per_s'], 0)
+        self.assertEqual(wlan0['status'], 'new')
+        self.assertIsNone(wlan0['bytes_recv_per_s'])
+        self.assertEqual(result['removed'], ['eth1'])
+        
+        # Like every other CSV section, traffic ends with a blank separator row
+        from it_support_toolkit import EXPORT_SINKS
+        stream = io.StringIO()
+        EXPORT_SINKS['csv'](stream).section('traffic', result)
+        self.assertTrue(stream.getvalue().endswith('eth1,removed\r\n\r\n'))
+    
     @patch('psutil.users')
     def test_list_users(self, mock_users):
         """Test user listing."""
@@ -101,6 +258,42 @@ class TestITSupportToolkit(unittest.TestCase):
         self.assertEqual(result[0]['name'], 'testuser')
         self.assertEqual(result[0]['terminal'], 'pts/0')
     
+    @patch('psutil.users')
+    def test_checks_return_data_and_render_by_mode(self, mock_users):
+        """Test that checks print nothing and run_checks renders per console mode."""
+        mock_users.return_value = [Mock(terminal='pts/0', host='10.0.0.5',
+                                        started=1234567890.0)]
+        mock_users.return_value[0].name = 'alice'
+        
+        outputs = {}
+        for mode in ('full', CONSOLE_SUMMARY, CONSOLE_QUIET):
+            self.toolkit.console_mode = mode
+            output = io.StringIO()
+            with redirect_stdout(output):
+                self.toolkit.run_checks(['list_users'])
+            outputs[mode] = output.getvalue()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.toolkit.list_users()
+        
+        self.assertEqual(output.getvalue(), '')
+        self.assertIn('=== LOGGED IN USERS ===', outputs['full'])
+        self.assertIn('✓ User: alice', outputs['full'])
+        self.assertEqual(outputs[CONSOLE_SUMMARY], '✓ Users: 1 logged in\n')
+        self.assertEqual(outputs[CONSOLE_QUIET], '')
+        
+        # Quiet mode still reports what needs attention
+        disk = {'device': '/dev/sda1', 'mountpoint': '/', 'filesystem': 'ext4',
+                'total_gb': 100.0, 'used_gb': 95.0, 'free_gb': 5.0, 'percent_used': 95.0,
+                'status': 'ok'}
+        self.assertEqual(ConsoleRenderer(CONSOLE_QUIET).section('disk_space', [disk]),
+                         '⚠️ Disk: 1 mounts, above 80%: / 95.0%\n')
+        
+        # A host without the configured log files (journald only) is healthy
+        logs = {'files': [], 'totals': {'auth_failure': 0, 'error': 0}}
+        self.assertEqual(ConsoleRenderer(CONSOLE_QUIET).section('logs', logs), '')
+        self.assertIn('✓', ConsoleRenderer('full').section('logs', logs))
+    
     @patch('psutil.users')
     def test_list_users_empty(self, mock_users):
         """Test user listing when no users logged in."""
@@ -180,6 +373,1322 @@ class TestITSupportToolkit(unittest.TestCase):
         
         # Cleanup
         os.remove(filepath)
+    
+    @patch('psutil.cpu_times')
+    def test_cpu_sampler_window(self, mock_cpu_times):
+        """Test that the sampler averages utilisation deltas over its window."""
+        cpu_times = namedtuple('scputimes', 'user system idle')
+        
+        def snapshot(user, idle):
+            return [cpu_times(user, 0.0, idle)]
+        
+        with patch.object(CPUSampler, 'MIN_SAMPLE_INTERVAL', 0):
+            mock_cpu_times.return_value = snapshot(0.0, 0.0)
+            sampler = CPUSampler(interval=1, max_window=10)
+            # 100% busy, then 50% busy, then idle
+            for user, idle in ((1.0, 0.0), (2.0, 1.0), (2.0, 2.0)):
+                mock_cpu_times.return_value = snapshot(user, idle)
+                sampler.sample()
+        
+        with patch('time.sleep'):
+            usage = sampler.usage(1)
+            self.assertEqual((usage['percent'], usage['per_core']), (0.0, [0.0]))
+            self.assertLessEqual(usage['seconds'], sampler.usage(10)['seconds'])
+            self.assertEqual(sampler.usage(2)['percent'], 33.3)
+            self.assertEqual(sampler.usage(10)['percent'], 50.0)
+    
+    @patch('psutil.cpu_times')
+    def test_cpu_averages_only_cover_sampled_windows(self, mock_cpu_times):
+        """Test that a one-shot run does not label its short sample as 10s/60s averages."""
+        cpu_times = namedtuple('scputimes', 'user system idle')
+        mock_cpu_times.return_value = [cpu_times(1.0, 0.0, 1.0)]
+        sampler = CPUSampler(interval=1, max_window=60)
+        sampler.start = Mock(return_value=sampler)  # No background samples
+        self.toolkit._cpu_sampler = sampler
+        
+        cpu_data, _ = self.toolkit.check_cpu_ram()
+        
+        self.assertEqual(cpu_data['average_percent'], {})
+        self.assertLess(cpu_data['sampled_seconds'], 1)
+        rendered = ConsoleRenderer('full').section('cpu', cpu_data)
+        self.assertIn(f"Sampled over {cpu_data['sampled_seconds']} s", rendered)
+        self.assertNotIn('Averages', rendered)
+    
+    def test_probe_targets_local_listeners(self):
+        """Test the probe engine against local listeners on 127.0.0.1."""
+        listeners = []
+        for _ in range(20):
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.bind(('127.0.0.1', 0))
+            listener.listen(5)
+            listeners.append(listener)
+        
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        closed_port = closed.getsockname()[1]
+        closed.close()
+        
+        targets = [{'host': '127.0.0.1', 'port': l.getsockname()[1], 'description': f'svc{i}'}
+                   for i, l in enumerate(listeners)]
+        targets.append({'host': '127.0.0.1', 'port': closed_port, 'description': 'closed'})
+        
+        try:
+            results = probe_targets(targets, concurrency=8, timeout=2)
+        finally:
+            for listener in listeners:
+                listener.close()
+        
+        self.assertEqual([r['description'] for r in results],
+                         [t['description'] for t in targets])
+        for result in results[:-1]:
+            self.assertTrue(result['reachable'])
+            self.assertIsInstance(result['latency_ms'], float)
+        self.assertFalse(results[-1]['reachable'])
+        self.assertIsNone(results[-1]['latency_ms'])
+        self.assertIn('error', results[-1])
+    
+    def test_probe_targets_resolve_once_and_cache(self):
+        """Test that names are resolved once per run, then served from the cache."""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(5)
+        port = listener.getsockname()[1]
+        lookups = []
+        
+        def fake_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+            lookups.append((host, family))
+            if host != 'svc.test' or family != socket.AF_INET:
+                raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 0))]
+        
+        targets = [{'host': 'svc.test', 'port': port, 'description': 'svc'},
+                   {'host': 'svc.test', 'port': port, 'description': 'svc again'},
+                   {'host': 'missing.test', 'port': port, 'description': 'missing'}]
+        cache = CheckCache()
+        try:
+            with patch('socket.getaddrinfo', side_effect=fake_getaddrinfo):
+                first = probe_targets(targets, timeout=2, cache=cache)
+                second = probe_targets(targets, timeout=2, cache=cache)
+        finally:
+            listener.close()
+        
+        # Both families once per name on the first run, nothing on the second
+        self.assertEqual(sorted(lookups), sorted(
+            (host, family) for host in ('svc.test', 'missing.test')
+            for family in (socket.AF_INET, socket.AF_INET6)))
+        self.assertTrue(first[0]['reachable'])
+        self.assertEqual(first[0]['address'], '127.0.0.1')
+        self.assertFalse(first[0]['dns_cached'])
+        self.assertIsInstance(first[0]['connect_ms'], float)
+        self.assertTrue(first[2]['error'].startswith('DNS lookup failed'))
+        self.assertIsNone(first[2]['connect_ms'])
+        self.assertTrue(all(result['dns_cached'] for result in second))
+        self.assertTrue(second[1]['reachable'])
+        self.assertFalse(second[2]['reachable'])
+    
+    def test_load_probe_targets(self):
+        """Test loading probe targets from a JSON config file."""
+        config = {'targets': [
+            {'host': 'db.internal', 'port': 5432, 'description': 'Database'},
+            'cache.internal:6379',
+        ]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(config, f)
+        try:
+            targets = load_probe_targets(f.name)
+        finally:
+            os.remove(f.name)
+        
+        self.assertEqual(targets, [
+            {'host': 'db.internal', 'port': 5432, 'description': 'Database'},
+            {'host': 'cache.internal', 'port': 6379, 'description': 'cache.internal:6379'},
+        ])
+    
+    def _write_fixture(self, content):
+        """Write a temporary fixture file and schedule its removal."""
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+    
+    def test_read_password_expiry(self):
+        """Test computing password expiry from passwd/shadow fixture files."""
+        passwd = self._write_fixture(
+            "root:x:0:0:root:/root:/bin/bash\n"
+            "alice:x:1000:1000::/home/alice:/bin/bash\n"
+            "bob:x:1001:1001::/home/bob:/bin/bash\n"
+            "carol:x:1002:1002::/home/carol:/bin/bash\n"
+            "dave:x:1003:1003::/home/dave:/bin/bash\n"
+            "erin:x:1004:1004::/home/erin:/bin/bash\n"
+        )
+        shadow = self._write_fixture(
+            "root:*:19000:0:99999:7:::\n"
+            "alice:$6$x:19000:0:90:7:::\n"   # changed 2022-01-08, max 90 days
+            "bob:$6$x:19000:0:99999:7:::\n"
+            "carol:$6$x:0:0:90:7:::\n"
+            "dave:$6$x:19000::::::\n"
+        )
+        
+        result = read_password_expiry(passwd, shadow, today=date(2022, 4, 2))
+        
+        self.assertEqual(result, [
+            {'username': 'alice', 'password_expires': 'Apr 08, 2022', 'warning': True},
+            {'username': 'bob', 'password_expires': 'never', 'warning': False},
+            {'username': 'carol', 'password_expires': 'password must be changed',
+             'warning': True},
+            {'username': 'dave', 'password_expires': 'never', 'warning': False},
+        ])
+        
+        result = read_password_expiry(passwd, shadow, today=date(2022, 1, 1))
+        self.assertFalse(result[0]['warning'])
+    
+    @patch('platform.system', return_value='Linux')
+    @patch('subprocess.run')
+    def test_check_password_expiry_chage_fallback(self, mock_run, mock_system):
+        """Test falling back to chage when the shadow file is unreadable."""
+        self.toolkit.passwd_path = self._write_fixture(
+            "alice:x:1000:1000::/home/alice:/bin/bash\n")
+        mock_run.return_value = Mock(returncode=0,
+                                     stdout="Password expires\t\t\t\t\t: never\n")
+        
+        with patch('it_support_toolkit.read_password_expiry', side_effect=PermissionError):
+            with redirect_stdout(io.StringIO()):
+                result = self.toolkit.check_password_expiry()
+        
+        self.assertEqual(result, [{'username': 'alice', 'password_expires': 'never'}])
+        mock_run.assert_called_once()
+    
+    def test_export_reports_fans_out_to_sinks(self):
+        """Test exporting several formats at once, streaming NDJSON."""
+        self.toolkit.report_data['checks']['disk_space'] = [
+            {'device': f'/dev/sd{c}', 'mountpoint': f'/mnt/{c}', 'filesystem': 'ext4',
+             'total_gb': 100.0, 'used_gb': 50.0, 'free_gb': 50.0, 'percent_used': 50.0}
+            for c in 'abc'
+        ]
+        self.toolkit.report_data['checks']['network'] = {
+            'interfaces': [{'interface': 'eth0', 'ip_address': '10.0.0.5',
+                            'netmask': '255.255.255.0'}],
+            'connectivity_tests': []
+        }
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        txt_path = os.path.join(tmpdir.name, 'report.txt')
+        csv_path = os.path.join(tmpdir.name, 'report.csv')
+        stream = io.StringIO()
+        
+        with redirect_stdout(io.StringIO()):
+            paths = self.toolkit.export_reports({'txt': txt_path, 'csv': csv_path,
+                                                 'ndjson': stream})
+        
+        self.assertEqual(paths['ndjson'], '-')
+        with open(txt_path) as f:
+            self.assertIn('Device: /dev/sdc (/mnt/c)', f.read())
+        with open(csv_path) as f:
+            self.assertIn('/dev/sdb,/mnt/b,ext4', f.read())
+        
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([r['type'] for r in records],
+                         ['report', 'disk_space', 'disk_space', 'disk_space',
+                          'network_interface'])
+        self.assertEqual(records[1]['hostname'], self.toolkit.report_data['hostname'])
+        self.assertEqual(records[3]['device'], '/dev/sdc')
+        
+        # Several formats cannot share one stream without interleaving
+        with self.assertRaises(ValueError):
+            self.toolkit.export('all', io.StringIO())
+    
+    def test_watch_daemon_cadence_and_flush(self):
+        """Test watch mode cadences, ring-buffer bound and history flushes."""
+        calls = {'fast': 0, 'slow': 0}
+        
+        def make_check(name):
+            def check():
+                calls[name] += 1
+                print(f"{name} output")
+                self.toolkit._store_check(name, calls[name])
+            return check
+        
+        self.toolkit.check_fast = make_check('fast')
+        self.toolkit.check_slow = make_check('slow')
+        history_file = self._write_fixture('')
+        
+        daemon = WatchDaemon(self.toolkit, interval=0, history_size=3,
+                             cadence={'check_fast': 1, 'check_slow': 2},
+                             history_file=history_file, flush_interval=3600)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for _ in range(4):
+                daemon.tick()
+        
+        self.assertEqual(calls, {'fast': 4, 'slow': 2})
+        self.assertEqual(output.getvalue(), '')
+        self.assertEqual(len(daemon.history), 3)
+        self.assertEqual(daemon.history[-1]['checks'], {'fast': 4})
+        self.assertEqual(daemon.history[-2]['checks'], {'fast': 3, 'slow': 2})
+        
+        self.assertEqual(daemon.flush(), 3)
+        self.assertEqual(daemon.flush(), 0)
+        with open(history_file) as f:
+            samples = [json.loads(line) for line in f]
+        self.assertEqual([sample['checks'] for sample in samples],
+                         [{'fast': 2}, {'fast': 3, 'slow': 2}, {'fast': 4}])
+    
+    def test_watch_daemon_quiet_prints_nothing_per_tick(self):
+        """Test that --quiet silences the per-tick lines of watch mode."""
+        self.toolkit.check_fast = lambda: self.toolkit._store_check('fast', 1)
+        self.toolkit._cpu_sampler = Mock()
+        outputs = {}
+        for mode in (CONSOLE_SUMMARY, CONSOLE_QUIET):
+            daemon = WatchDaemon(self.toolkit, interval=0, cadence={'check_fast': 1},
+                                 history_file=None, console_mode=mode)
+            outputs[mode] = io.StringIO()
+            with redirect_stdout(outputs[mode]):
+                daemon.run(max_ticks=2)
+        
+        self.assertEqual(outputs[CONSOLE_SUMMARY].getvalue().count('Sampled: fast'), 2)
+        self.assertEqual(outputs[CONSOLE_QUIET].getvalue(), '')
+    
+    def test_run_checks_concurrently(self):
+        """Test that the scheduler overlaps independent checks."""
+        def make_check(name, delay):
+            def check():
+                time.sleep(delay)
+                print(f"{name} done")
+                self.toolkit._store_check(name, delay)
+                return name
+            return check
+        
+        for name in ('check_a', 'check_b', 'check_c'):
+            setattr(self.toolkit, name, make_check(name, 0.2))
+        
+        output = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            results = self.toolkit.run_checks(['check_a', 'check_b', 'check_c'],
+                                              max_workers=3)
+        elapsed = time.perf_counter() - start
+        
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(results, {'check_a': 'check_a', 'check_b': 'check_b',
+                                   'check_c': 'check_c'})
+        # Each check's own output is followed by its rendered result, in request order
+        self.assertEqual(output.getvalue(), "".join(
+            f"check_{c} done\n\n=== CHECK {c.upper()} ===\n   value: 0.2\n" for c in 'abc'))
+        self.assertEqual(set(self.toolkit.report_data['checks']),
+                         {'check_a', 'check_b', 'check_c'})
+    
+    def test_run_checks_reports_failures(self):
+        """Test that a failing check does not abort the other checks."""
+        def broken():
+            raise RuntimeError('boom')
+        
+        self.toolkit.check_a = broken
+        self.toolkit.check_b = lambda: 'ok'
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            results = self.toolkit.run_checks(['check_a', 'check_b'], max_workers=2)
+        
+        self.assertIsNone(results['check_a'])
+        self.assertEqual(results['check_b'], 'ok')
+        self.assertIn('check_a failed: boom', output.getvalue())
+    
+    def test_timing_spans_for_checks_and_exports(self):
+        """Test that checks and exports record wall/CPU time and subprocess counts."""
+        def spawning_check():
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+            return 'spawned'
+        
+        self.toolkit.check_spawn = spawning_check
+        self.toolkit.check_idle = lambda: time.sleep(0.05)
+        with redirect_stdout(io.StringIO()):
+            self.toolkit.run_checks(['check_spawn', 'check_idle'], max_workers=2)
+        
+        timings = self.toolkit.report_data['timings']
+        self.assertEqual(timings['check_spawn']['subprocesses'], 1)
+        self.assertEqual(timings['check_idle']['subprocesses'], 0)
+        self.assertGreaterEqual(timings['check_idle']['wall_ms'], 50)
+        self.assertLess(timings['check_idle']['cpu_ms'], timings['check_idle']['wall_ms'])
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'report.json')
+            with redirect_stdout(io.StringIO()):
+                self.toolkit.export_reports({'json': filepath, 'txt': os.devnull})
+            with open(filepath) as f:
+                self.assertIn('check_spawn', json.load(f)['timings'])
+        self.assertIn('export_json', timings)
+        self.assertIn('export_txt', timings)
+    
+    def test_profile_dumps_stats_and_allocations(self):
+        """Test that profiling writes a cProfile dump and top allocations per check."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            toolkit = ITSupportToolkit(profile_dir=tmpdir, trace_memory=True)
+            self.addCleanup(toolkit.spans.stop)
+            toolkit.check_alloc = lambda: [str(i) * 10 for i in range(10000)]
+            with redirect_stdout(io.StringIO()):
+                toolkit.run_checks(['check_alloc'])
+            
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'check_alloc.prof')))
+            self.assertTrue(toolkit.spans.allocations['check_alloc'])
+            
+            output = io.StringIO()
+            with redirect_stdout(output):
+                toolkit.spans.print_report()
+        
+        self.assertIn('check_alloc', output.getvalue())
+        self.assertIn('Top allocations', output.getvalue())
+    
+    def test_schedule_checks_dependencies_and_cost(self):
+        """Test that dependencies are added and expensive checks start first."""
+        self.addCleanup(lambda: [CHECK_REGISTRY.pop(name, None)
+                                 for name in ('cheap', 'costly', 'report', 'serial')])
+        register_check('cheap', cost=0.1)
+        register_check('costly', cost=5)
+        register_check('report', cost=1, deps=('cheap',))
+        register_check('serial', cost=9, parallel_safe=False)
+        
+        display_order, run_order = schedule_checks(['serial', 'report', 'costly'])
+        
+        self.assertEqual(display_order, ['serial', 'cheap', 'report', 'costly'])
+        self.assertEqual(run_order, ['costly', 'cheap', 'report', 'serial'])
+        
+        register_check('cheap', deps=('report',))
+        with self.assertRaises(ValueError):
+            schedule_checks(['report'])
+    
+    def test_plugin_check_is_imported_lazily(self):
+        """Test that plugin modules are only imported when their check runs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'site_checks_fixture.py'), 'w') as f:
+                f.write("def check_raid(toolkit):\n"
+                        "    print('md0 clean')\n"
+                        "    return {'md0': 'clean'}\n")
+            sys.path.insert(0, tmpdir)
+            self.addCleanup(sys.path.remove, tmpdir)
+            self.addCleanup(sys.modules.pop, 'site_checks_fixture', None)
+            self.addCleanup(CHECK_REGISTRY.pop, 'check_raid', None)
+            
+            spec = register_plugin('site_checks_fixture:check_raid')
+            self.assertNotIn('site_checks_fixture', sys.modules)
+            
+            output = io.StringIO()
+            with redirect_stdout(output):
+                results = self.toolkit.run_checks([spec.name])
+        
+        self.assertEqual(results, {'check_raid': {'md0': 'clean'}})
+        self.assertEqual(self.toolkit.report_data['checks']['check_raid'], {'md0': 'clean'})
+        self.assertEqual(output.getvalue(), 'md0 clean\n\n=== CHECK RAID ===\n   md0: clean\n')
+        
+        # Plugin results appear in every export format and on the console
+        exports = {export_format: io.StringIO() for export_format in ('txt', 'csv', 'ndjson')}
+        for export_format, stream in exports.items():
+            self.toolkit.export(export_format, stream)
+        self.assertIn('CHECK RAID\n' + '-' * 60 + '\nmd0: clean\n', exports['txt'].getvalue())
+        self.assertIn('CHECK RAID\r\nField,Value\r\nmd0,clean\r\n\r\n', exports['csv'].getvalue())
+        record = json.loads(exports['ndjson'].getvalue().splitlines()[-1])
+        self.assertEqual((record['type'], record['md0']), ('check_raid', 'clean'))
+        self.assertEqual(ConsoleRenderer(CONSOLE_SUMMARY).section('check_raid', {'md0': 'clean'}),
+                         '✓ check_raid: md0 clean\n')
+        self.assertIn('   md0: clean',
+                      ConsoleRenderer('full').report(self.toolkit.report_data))
+        self.assertEqual(ConsoleRenderer(CONSOLE_QUIET).section(
+            'check_raid', {'md0': 'degraded', 'status': 'degraded'}),
+            '⚠️ check_raid: md0 degraded, status degraded\n')
+    
+    def test_unsafe_check_runs_alone(self):
+        """Test that a check that is not parallel-safe never overlaps another."""
+        self.addCleanup(lambda: [CHECK_REGISTRY.pop(name, None)
+                                 for name in ('check_a', 'check_b', 'check_serial')])
+        running, overlaps = set(), []
+        lock = threading.Lock()
+        
+        def make_check(name):
+            def check():
+                with lock:
+                    running.add(name)
+                    overlaps.append(set(running))
+                time.sleep(0.05)
+                with lock:
+                    running.discard(name)
+                return name
+            return check
+        
+        for name in ('check_a', 'check_b', 'check_serial'):
+            setattr(self.toolkit, name, make_check(name))
+        register_check('check_serial', cost=10, parallel_safe=False)
+        
+        with redirect_stdout(io.StringIO()):
+            self.toolkit.run_checks(['check_a', 'check_serial', 'check_b'], max_workers=3)
+        
+        self.assertIn({'check_serial'}, overlaps)
+        self.assertFalse([seen for seen in overlaps
+                          if 'check_serial' in seen and len(seen) > 1])
+
+
+class TestColdStart(unittest.TestCase):
+    """Startup budget for the CLI, which cron and config management run constantly."""
+    
+    # Modules that must only be imported by the checks/exports that need them
+    LAZY_MODULES = ('psutil', 'asyncio', 'http.client', 'subprocess', 'csv', 'json',
+                    'platform', 'socket', 'pathlib', 'concurrent.futures')
+    # Generous so loaded CI machines do not flake; a cached import takes ~20 ms
+    IMPORT_BUDGET_SECONDS = 0.25
+    
+    def run_python(self, code):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return json.loads(result.stdout)
+    
+    def test_import_and_construction_stay_lazy(self):
+        """Test that importing and constructing the toolkit skip heavy modules."""
+        measured = self.run_python(
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import it_support_toolkit\n"
+            "elapsed = time.perf_counter() - start\n"
+            "toolkit = it_support_toolkit.ITSupportToolkit()\n"
+            f"loaded = [m for m in {self.LAZY_MODULES!r} if m in sys.modules]\n"
+            "import json\n"
+            "print(json.dumps({'elapsed': elapsed, 'loaded': loaded, "
+            "'hostname': toolkit.report_data['hostname']}))\n"
+        )
+        
+        self.assertEqual(measured['loaded'], [])
+        self.assertEqual(measured['hostname'], socket.gethostname())
+        self.assertLess(measured['elapsed'], self.IMPORT_BUDGET_SECONDS)
+    
+    def test_single_cheap_check_skips_network_stack(self):
+        """Test that a users-only run does not import the probe or HTTP machinery."""
+        loaded = self.run_python(
+            "import io, sys, contextlib, it_support_toolkit\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            "    it_support_toolkit.ITSupportToolkit().run_checks(['list_users'])\n"
+            "import json\n"
+            "print(json.dumps([m for m in ('asyncio', 'http.client', 'csv') "
+            "if m in sys.modules]))\n"
+        )
+        self.assertEqual(loaded, [])
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test cases for the synthetic-host benchmark suite."""
+    
+    def test_run_benchmarks_small_host(self):
+        """Test that every check and exporter is timed and measured."""
+        report = run_benchmarks(scale=0.002, repeats=1)
+        
+        self.assertEqual(report['sizes'], {'partitions': 10, 'sessions': 20,
+                                           'passwd_entries': 100, 'interfaces': 1,
+                                           'processes': 100, 'log_lines': 200})
+        self.assertEqual(set(report['results']), {
+            'check_disk_space', 'check_cpu_ram', 'check_top_processes', 'list_users',
+            'check_network_connectivity', 'check_interface_traffic',
+            'check_password_expiry', 'check_logs', 'export_report_txt', 'export_report_csv', 'export_report_json',
+            'export_report_ndjson', 'export_report_sqlite',
+        })
+        disk = report['results']['check_disk_space']
+        self.assertEqual(disk['items'], 10)
+        self.assertGreater(disk['peak_memory_bytes'], 0)
+        self.assertEqual(report['results']['export_report_csv']['items'],
+                         10 + 10 + 10 + 20 + 100 + 1 + 1 + 1 + 2)
+        json.dumps(report)
+    
+    def test_compare_results_flags_regressions(self):
+        """Test that slowdowns above the threshold are reported."""
+        def run(seconds, peak):
+            return {'results': {'list_users': {'min_seconds': seconds,
+                                               'peak_memory_bytes': peak}}}
+        
+        rows, regressions = compare_results(run(0.10, 1000), run(0.13, 1100), threshold=0.2)
+        
+        self.assertEqual(len(rows), 2)
+        self.assertEqual([(name, metric) for name, metric, *_ in regressions],
+                         [('list_users', 'min_seconds')])
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Test cases for the SQLite history store."""
+    
+    def setUp(self):
+        """Create a store in a temporary directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'history.db')
+        self.store = HistoryStore(self.db_path)
+    
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+    
+    def make_report(self, hostname, timestamp, ram_percent, var_percent):
+        return {
+            'timestamp': timestamp,
+            'hostname': hostname,
+            'os': 'Linux 6.1',
+            'checks': {
+                'ram': {'total_gb': 16.0, 'available_gb': 8.0, 'used_gb': 8.0,
+                        'percent_used': ram_percent},
+                'disk_space': [
+                    {'device': '/dev/sda1', 'mountpoint': '/', 'filesystem': 'ext4',
+                     'total_gb': 100.0, 'used_gb': 50.0, 'free_gb': 50.0,
+                     'percent_used': 50.0},
+                    {'device': '/dev/sda2', 'mountpoint': '/var', 'filesystem': 'ext4',
+                     'total_gb': 100.0, 'used_gb': var_percent, 'free_gb': 100 - var_percent,
+                     'percent_used': var_percent},
+                ],
+                'network': {
+                    'interfaces': [{'interface': 'eth0', 'ip_address': '10.0.0.5',
+                                    'netmask': '255.255.255.0'}],
+                    'connectivity_tests': [{'host': '8.8.8.8', 'port': 53,
+                                            'description': 'Google DNS', 'reachable': True,
+                                            'latency_ms': 4.2}],
+                },
+            }
+        }
+    
+    def test_record_and_range_query(self):
+        """Test batched inserts and host/time range queries."""
+        reports = [self.make_report('web1', f'2025-12-{day:02d} 09:00:00', 40 + day, 60 + day)
+                   for day in range(1, 11)]
+        reports.append(self.make_report('web2', '2025-12-05 09:00:00', 99.0, 99.0))
+        
+        self.assertEqual(self.store.record_many(reports), 11)
+        
+        series = self.store.metric_series('ram', 'percent_used', host='web1',
+                                          since='2025-12-04 00:00:00',
+                                          until='2025-12-06 23:59:59')
+        self.assertEqual(series, [('2025-12-04 09:00:00', 44.0),
+                                  ('2025-12-05 09:00:00', 45.0),
+                                  ('2025-12-06 09:00:00', 46.0)])
+        
+        var = self.store.metric_series('disk_space', 'percent_used', host='web1',
+                                       mountpoint='/var')
+        self.assertEqual(len(var), 10)
+        self.assertEqual(var[-1], ('2025-12-10 09:00:00', 70.0))
+        
+        probes = self.store.query('connectivity', host='web2')
+        self.assertEqual(probes[0]['latency_ms'], 4.2)
+        self.assertEqual(self.store.hosts(), ['web1', 'web2'])
+    
+    def test_record_many_is_one_transaction(self):
+        """Test that a batch commits once and only malformed reports are skipped."""
+        import sqlite3
+        reports = [self.make_report('web1', f'2025-12-{day:02d} 09:00:00', 40, 60)
+                   for day in range(1, 4)]
+        bad = self.make_report('broken', '2025-12-02 09:00:00', 40, 60)
+        bad['checks']['disk_space'] = [{'mountpoint': '/'}]
+        statements = []
+        self.store._conn.set_trace_callback(statements.append)
+        skipped = []
+        
+        count = self.store.record_many(reports[:1] + [bad] + reports[1:],
+                                       on_error=lambda report, e: skipped.append(report))
+        
+        self.store._conn.set_trace_callback(None)
+        self.assertEqual(count, 3)
+        self.assertEqual(skipped, [bad])
+        self.assertEqual([s for s in statements if s in ('BEGIN', 'COMMIT')],
+                         ['BEGIN', 'COMMIT'])
+        self.assertEqual(self.store.hosts(), ['web1'])
+        
+        # Any other error rolls back the whole batch, including reports already inserted
+        insert = self.store._insert_report
+        calls = []
+        
+        def failing_insert(report):
+            calls.append(report)
+            if len(calls) == 2:
+                raise sqlite3.OperationalError('database or disk is full')
+            return insert(report)
+        
+        with patch.object(self.store, '_insert_report', side_effect=failing_insert):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.store.record_many([self.make_report('web2', '2025-12-05 09:00:00', 1, 1),
+                                        self.make_report('web3', '2025-12-05 09:00:00', 1, 1)])
+        self.assertFalse(self.store._conn.in_transaction)
+        self.assertEqual(self.store.hosts(), ['web1'])
+    
+    def test_range_query_uses_index(self):
+        """Test that host/time range queries are served from an index."""
+        plan = self.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM ram WHERE host = ? AND ts >= ?",
+            ('web1', '2025-12-01')).fetchall()
+        self.assertIn('idx_ram_host_ts', ' '.join(row['detail'] for row in plan))
+    
+    def test_toolkit_export_report_sqlite(self):
+        """Test exporting a toolkit report into the history database."""
+        toolkit = ITSupportToolkit()
+        toolkit.report_data['checks']['ram'] = {
+            'total_gb': 16.0, 'used_gb': 8.0, 'available_gb': 8.0, 'percent_used': 50.0
+        }
+        
+        with redirect_stdout(io.StringIO()):
+            toolkit.export_report_sqlite(self.db_path)
+        
+        rows = self.store.query('ram', host=toolkit.report_data['hostname'])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['percent_used'], 50.0)
+
+
+
+class TestCheckCache(unittest.TestCase):
+    """Test cases for the static-fact check cache."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, 'check_cache.json')
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_fingerprint_and_ttl_invalidate(self):
+        """Test that entries are reused until their fingerprint or TTL changes."""
+        cache = CheckCache()
+        compute = Mock(side_effect=[1, 2, 3])
+        
+        self.assertEqual(cache.get_or_compute('facts', compute, fingerprint=['boot-a'], ttl=60), 1)
+        self.assertEqual(cache.get_or_compute('facts', compute, fingerprint=['boot-a'], ttl=60), 1)
+        self.assertEqual(cache.get_or_compute('facts', compute, fingerprint=['boot-b'], ttl=60), 2)
+        cache.put('facts', 2, fingerprint=['boot-b'], ttl=0)
+        self.assertEqual(cache.get_or_compute('facts', compute, fingerprint=['boot-b']), 3)
+        self.assertEqual(compute.call_count, 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+    
+    def test_persisted_between_runs(self):
+        """Test that a saved cache is reused by a new instance."""
+        cache = CheckCache(self.cache_path)
+        cache.get_or_compute('partitions', lambda: [['/dev/sda1', '/', 'ext4']],
+                             fingerprint=['boot-a', 1234])
+        cache.save()
+        self.assertEqual(os.stat(self.cache_path).st_mode & 0o777, 0o600)
+        
+        reloaded = CheckCache(self.cache_path)
+        compute = Mock()
+        value = reloaded.get_or_compute('partitions', compute, fingerprint=['boot-a', 1234])
+        self.assertEqual(value, [['/dev/sda1', '/', 'ext4']])
+        compute.assert_not_called()
+    
+    @patch('psutil.cpu_count', return_value=4)
+    @patch('psutil.cpu_freq', return_value=None)
+    @patch('psutil.disk_partitions')
+    @patch('psutil.disk_usage')
+    def test_toolkit_reuses_static_facts(self, mock_disk_usage, mock_disk_partitions,
+                                         mock_cpu_freq, mock_cpu_count):
+        """Test that repeated checks only recompute values that change."""
+        mock_disk_partitions.return_value = [Mock(device='/dev/sda1', mountpoint='/',
+                                                  fstype='ext4')]
+        mock_disk_usage.return_value = Mock(total=100 * 1024**3, used=50 * 1024**3,
+                                            free=50 * 1024**3, percent=50.0)
+        toolkit = ITSupportToolkit()
+        try:
+            with redirect_stdout(io.StringIO()), \
+                    patch.object(CPUSampler, 'usage',
+                                 return_value={'percent': 10.0, 'per_core': [10.0],
+                                               'seconds': 60.0}):
+                for _ in range(3):
+                    toolkit.check_disk_space()
+                    toolkit.check_cpu_ram()
+        finally:
+            toolkit.cpu_sampler.stop()
+        
+        self.assertEqual(mock_disk_partitions.call_count, 1)
+        self.assertEqual(mock_disk_usage.call_count, 3)
+        self.assertEqual(mock_cpu_count.call_count, 2)
+        
+        toolkit.cache.invalidate('partitions')
+        with redirect_stdout(io.StringIO()):
+            toolkit.check_disk_space()
+        self.assertEqual(mock_disk_partitions.call_count, 2)
+
+
+class TestDirectoryAnalyzer(unittest.TestCase):
+    """Test cases for the largest-directory analyzer."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        for relpath, size in (('logs/app.log', 512 * 1024), ('logs/old/app.1.log', 256 * 1024),
+                              ('data/blob.bin', 1024 * 1024), ('data/small.txt', 4096),
+                              ('readme.txt', 4096)):
+            self._write(relpath, size)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def _write(self, relpath, size):
+        path = os.path.join(self.root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+    
+    def test_largest_directories_and_files(self):
+        """Test subtree totals and that only the top K entries are returned."""
+        result = analyze_directory(self.root, top=2, workers=4)
+        
+        self.assertEqual([path for _, path in result['largest_directories']],
+                         [os.path.join(self.root, 'data'), os.path.join(self.root, 'logs')])
+        self.assertEqual([path for _, path in result['largest_files']],
+                         [os.path.join(self.root, 'data', 'blob.bin'),
+                          os.path.join(self.root, 'logs', 'app.log')])
+        logs_total = dict((path, size) for size, path in result['largest_directories'])[
+            os.path.join(self.root, 'logs')]
+        self.assertGreaterEqual(logs_total, (512 + 256) * 1024)
+        self.assertEqual(result['scanned'], 4)
+        self.assertEqual(result['errors'], 0)
+    
+    def test_unchanged_directories_are_reused(self):
+        """Test that directories with an unchanged mtime are not listed again."""
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_path = os.path.join(cache_dir.name, 'dir_sizes.json')
+        cache = DirectorySizeCache(cache_path)
+        first = analyze_directory(self.root, cache=cache)
+        cache.save()
+        
+        self._write('logs/old/app.2.log', 2 * 1024 * 1024)
+        second = analyze_directory(self.root, cache=DirectorySizeCache(cache_path))
+        
+        self.assertEqual(first['reused'], 0)
+        self.assertEqual(second['scanned'], 1)
+        self.assertEqual(second['reused'], 3)
+        self.assertEqual(second['largest_files'][0][1],
+                         os.path.join(self.root, 'logs', 'old', 'app.2.log'))
+        self.assertEqual(second['largest_directories'][0][1], os.path.join(self.root, 'logs'))
+    
+    def test_check_analyzes_only_warned_mounts(self):
+        """Test that the toolkit check analyzes mounts above the warning threshold."""
+        toolkit = ITSupportToolkit()
+        toolkit.report_data['checks']['disk_space'] = [
+            {'mountpoint': self.root, 'percent_used': 91.0},
+            {'mountpoint': '/does-not-matter', 'percent_used': 20.0},
+        ]
+        
+        with redirect_stdout(io.StringIO()):
+            analyses = toolkit.check_largest_directories()
+        
+        self.assertEqual([analysis['path'] for analysis in analyses], [self.root])
+        self.assertEqual(analyses[0]['largest_files'][0]['path'],
+                         os.path.join(self.root, 'data', 'blob.bin'))
+        self.assertIs(toolkit.report_data['checks']['largest_directories'], analyses)
+
+
+class TestLogScanner(unittest.TestCase):
+    """Test cases for the incremental log scanner."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmpdir.name, 'syslog')
+        self.scanner = LogScanner(os.path.join(self.tmpdir.name, 'state', 'offsets.json'))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def _append(self, text, path=None):
+        with open(path or self.log_path, 'a') as f:
+            f.write(text)
+    
+    def test_reads_only_new_complete_lines(self):
+        """Test that each run reads appended lines once and leaves partial lines."""
+        self._append("boot ok\nsshd: Failed password for root\nkernel: I/O error\npartial err")
+        first = self.scanner.scan(self.log_path)
+        self._append("or line\nall quiet\n")
+        second = self.scanner.scan(self.log_path)
+        third = self.scanner.scan(self.log_path)
+        
+        # A failed-password line counts as an auth failure, not also as an error
+        self.assertEqual(first['matches'], {'auth_failure': 1, 'error': 1})
+        self.assertEqual(first['samples']['auth_failure'], ['sshd: Failed password for root'])
+        self.assertEqual(second['matches'], {'auth_failure': 0, 'error': 1})
+        self.assertEqual(second['samples']['error'], ['partial error line'])
+        self.assertEqual(third['bytes_read'], 0)
+    
+    def test_line_counts_under_first_pattern_in_order(self):
+        """Test that a line matching several patterns counts under the earliest one."""
+        self._append("sshd: error: authentication failure for root\n"
+                     "kernel: error reading block\n")
+        result = self.scanner.scan(self.log_path)
+        
+        # 'error' comes first on the line, but auth_failure is listed first
+        self.assertEqual(result['matches'], {'auth_failure': 1, 'error': 1})
+        self.assertEqual(result['samples']['auth_failure'],
+                         ['sshd: error: authentication failure for root'])
+    
+    def test_offsets_persist_and_rotation_is_detected(self):
+        """Test that saved offsets survive restarts and rotated logs are finished."""
+        self._append("old error 1\n")
+        self.scanner.scan(self.log_path)
+        self.scanner.save()
+        
+        self._append("old error 2\n")
+        os.rename(self.log_path, self.log_path + '.1')
+        self._append("new error 3\n")
+        scanner = LogScanner(self.scanner.state_path)
+        rotated = scanner.scan(self.log_path)
+        
+        self.assertTrue(rotated['rotated'])
+        self.assertEqual(rotated['samples']['error'], ['old error 2', 'new error 3'])
+        
+        with open(self.log_path, 'w') as f:
+            f.write("error after truncate\n")
+        truncated = scanner.scan(self.log_path)
+        self.assertTrue(truncated['rotated'])
+        self.assertEqual(truncated['matches']['error'], 1)
+    
+    def test_first_scan_reads_only_the_tail(self):
+        """Test that a log seen for the first time is not read from the start."""
+        self._append("early error\n" * 1000 + "late error\n")
+        scanner = LogScanner(initial_bytes=30)
+        
+        result = scanner.scan(self.log_path)
+        
+        self.assertLessEqual(result['bytes_read'], 30)
+        self.assertEqual(result['samples']['error'][-1], 'late error')
+        self.assertEqual(scanner.scan(os.path.join(self.tmpdir.name, 'absent'))['status'],
+                         'missing')
+
+
+class TestReportRecords(unittest.TestCase):
+    """Test cases for the compact report record types."""
+    
+    REPORT = {
+        'hostname': 'host-a',
+        'timestamp': '2024-01-01 12:00:00',
+        'checks': {
+            'disk_space': [{'device': '/dev/sda1', 'mountpoint': '/', 'filesystem': 'ext4',
+                            'total_gb': 100.0, 'used_gb': 50.0, 'free_gb': 50.0,
+                            'percent_used': 50.0, 'status': 'ok'}],
+            'users': [{'name': 'alice', 'terminal': 'pts/0', 'host': '10.0.0.5',
+                       'started': '2024-01-01 09:00:00'}],
+            'network': {
+                'interfaces': [{'interface': 'eth0', 'ip_address': '10.0.0.2',
+                                'netmask': '255.255.255.0'}],
+                'connectivity_tests': [{'host': '8.8.8.8', 'port': 53,
+                                        'description': 'Google DNS', 'reachable': False,
+                                        'latency_ms': None, 'error': 'timed out'}],
+            },
+        },
+    }
+    
+    def test_records_keep_json_schema(self):
+        """Test that compacted reports serialise exactly like the dict reports."""
+        encoded = json.dumps(self.REPORT)
+        report = compact_report(json.loads(encoded))
+        
+        disk = report['checks']['disk_space'][0]
+        self.assertIsInstance(disk, DiskRecord)
+        self.assertEqual(disk, self.REPORT['checks']['disk_space'][0])
+        self.assertNotIn('error', disk)
+        self.assertIsNone(disk.get('error'))
+        self.assertEqual(report['checks']['network']['connectivity_tests'][0]['error'],
+                         'timed out')
+        self.assertEqual(json.dumps(report, default=record_default), encoded)
+        with self.assertRaises(AttributeError):
+            disk.status = 'error'
+    
+    def test_records_are_compact_and_interned(self):
+        """Test that records are smaller than dicts and share repeated strings."""
+        first = compact_report(json.loads(json.dumps(self.REPORT)))
+        second = compact_report(json.loads(json.dumps(self.REPORT)))
+        disk_a = first['checks']['disk_space'][0]
+        disk_b = second['checks']['disk_space'][0]
+        
+        self.assertIs(disk_a['filesystem'], disk_b['filesystem'])
+        self.assertIs(disk_a['device'], disk_b['device'])
+        self.assertLess(sys.getsizeof(disk_a) * 2,
+                        sys.getsizeof(self.REPORT['checks']['disk_space'][0]))
+    
+    def test_unknown_fields_stay_dicts(self):
+        """Test that items from a newer schema are kept as dicts, not dropped."""
+        report = {'checks': {'network': {'connectivity_tests': [
+            {'host': 'a', 'port': 1, 'description': 'a', 'reachable': True,
+             'latency_ms': 1.0, 'jitter_ms': 0.2}]}}}
+        
+        test = compact_report(report)['checks']['network']['connectivity_tests'][0]
+        
+        self.assertNotIsInstance(test, ProbeResult)
+        self.assertEqual(test['jitter_ms'], 0.2)
+
+
+class TestReportCatalog(unittest.TestCase):
+    """Test cases for the cached report catalogue."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def write_report(self, stamp, hostname, suffix='.json'):
+        path = os.path.join(self.tmpdir.name, f'it_support_report_{stamp}{suffix}')
+        with open(path, 'w') as f:
+            if suffix == '.json':
+                json.dump({'timestamp': stamp, 'hostname': hostname, 'checks': {}}, f, indent=2)
+            elif suffix == '.txt':
+                f.write(f"Generated: {stamp}\nHostname: {hostname}\n")
+            else:
+                f.write(f"Generated,{stamp}\r\nHostname,{hostname}\r\n")
+        return path
+    
+    def test_refresh_is_incremental(self):
+        """Test that only new reports are read after a directory change."""
+        self.write_report('20251201_090000', 'web1')
+        self.write_report('20251202_090000', 'web2', '.txt')
+        self.write_report('20251203_090000', 'web1', '.csv')
+        
+        catalog = view_reports.list_reports(self.tmpdir.name)
+        self.assertEqual(catalog.hosts(), ['web1', 'web2'])
+        
+        with patch('view_reports._read_report_metadata',
+                   wraps=view_reports._read_report_metadata) as mock_read:
+            reloaded = view_reports.ReportCatalog(self.tmpdir.name)
+            self.assertFalse(reloaded.refresh())
+            self.assertEqual(len(reloaded.entries), 3)
+            
+            self.write_report('20251204_090000', 'web3')
+            self.assertTrue(reloaded.refresh())
+        
+        self.assertEqual(mock_read.call_count, 1)
+        self.assertEqual(reloaded.hosts(), ['web1', 'web2', 'web3'])
+    
+    def test_query_filters_and_pages(self):
+        """Test filtering by host and date range, and paginated listing."""
+        for day in range(1, 8):
+            self.write_report(f'202512{day:02d}_090000', 'web1' if day % 2 else 'web2')
+        catalog = view_reports.list_reports(self.tmpdir.name)
+        
+        web1 = catalog.query(host='web1')
+        self.assertEqual([r['timestamp'][:10] for r in web1],
+                         sorted([r['timestamp'][:10] for r in web1], reverse=True))
+        self.assertEqual(len(web1), 4)
+        
+        ranged = catalog.query(since='2025-12-03', until='2025-12-05')
+        self.assertEqual(len(ranged), 3)
+        
+        page = catalog.query(offset=2, limit=2)
+        self.assertEqual(len(page), 2)
+        self.assertEqual(page[0]['format'], 'JSON')
+    
+    def test_compare_matches_disks_by_mountpoint(self):
+        """Test that mounts sharing a device are compared with themselves."""
+        paths = []
+        for day, (root, home) in enumerate(((40.0, 70.0), (45.0, 70.0)), start=1):
+            report = {'timestamp': f'2025-12-0{day} 09:00:00', 'hostname': 'web1',
+                      'checks': {'disk_space': [
+                          {'device': '/dev/sda2', 'mountpoint': '/', 'percent_used': root},
+                          {'device': '/dev/sda2', 'mountpoint': '/home', 'percent_used': home},
+                      ]}}
+            path = Path(self.tmpdir.name) / f'it_support_report_2025120{day}_090000.json'
+            path.write_text(json.dumps(report))
+            paths.append(path)
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            view_reports.compare_reports(*paths)
+        self.assertIn('/dev/sda2 (/): 40.0% → 45.0% (↑ 5.0%)', output.getvalue())
+        self.assertNotIn('/home', output.getvalue())
+    
+    def test_retention_covers_ndjson_and_uses_configured_codec(self):
+        """Test that NDJSON reports are catalogued and rollups use the chosen codec."""
+        from datetime import datetime
+        for stamp in ('20251210_090000', '20251210_180000'):
+            path = os.path.join(self.tmpdir.name, f'it_support_report_{stamp}.ndjson')
+            with open(path, 'w') as f:
+                f.write(json.dumps({'type': 'report', 'hostname': 'web1',
+                                    'timestamp': stamp}) + '\n')
+        catalog = view_reports.list_reports(self.tmpdir.name)
+        self.assertEqual(catalog.hosts(), ['web1'])
+        
+        result = catalog.apply_retention(7, 'daily', now=datetime(2025, 12, 20),
+                                         compression='xz')
+        self.assertEqual(result['deleted'], ['it_support_report_20251210_090000.ndjson'])
+        self.assertEqual(sorted(catalog.entries),
+                         ['it_support_report_20251210_180000.ndjson.xz'])
+        self.assertEqual(catalog.query()[0]['compression'], 'xz')
+    
+    def test_compressed_reports_read_transparently(self):
+        """Test that gzip and xz exports are catalogued and read like plain ones."""
+        toolkit = ITSupportToolkit()
+        toolkit.report_data['hostname'] = 'web1'
+        toolkit.report_data['checks']['ram'] = {'total_gb': 16.0, 'used_gb': 8.0,
+                                                'available_gb': 8.0, 'percent_used': 50.0}
+        toolkit.console_mode = 'quiet'
+        toolkit.compression = 'gzip'
+        base = os.path.join(self.tmpdir.name, 'it_support_report_20251201_090000')
+        paths = toolkit.export('all', base)
+        self.assertEqual(paths['json'], os.path.abspath(base + '.json.gz'))
+        with open(paths['json'], 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+        toolkit.compression = 'xz'
+        toolkit.export_report_txt(base.replace('01_', '02_') + '.txt.xz')
+        
+        catalog = view_reports.list_reports(self.tmpdir.name)
+        reports = catalog.query()
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(catalog.hosts(), ['web1'])
+        self.assertEqual({(r['format'], r['compression']) for r in reports},
+                         {('TXT', 'xz'), ('TXT', 'gzip'), ('CSV', 'gzip'), ('JSON', 'gzip')})
+        
+        series = view_reports.load_metric_series([paths['json']])
+        self.assertEqual(series['RAM %'][1], [50.0])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            view_reports.view_csv_report(Path(paths['csv']))
+        self.assertIn('web1', output.getvalue())
+    
+    def test_retention_keeps_recent_reports_and_rolls_up(self):
+        """Test that old reports are thinned to one compressed report per day."""
+        from datetime import datetime
+        self.write_report('20251219_100000', 'web1')   # Within keep_days
+        self.write_report('20251210_090000', 'web1')   # Superseded the same day
+        self.write_report('20251210_180000', 'web1')   # Daily rollup
+        self.write_report('20251210_120000', 'web2')   # Other host keeps its own
+        self.write_report('20251101_090000', 'web1')   # Past max_days
+        catalog = view_reports.list_reports(self.tmpdir.name)
+        now = datetime(2025, 12, 20, 12, 0)
+        
+        planned = catalog.apply_retention(7, 'daily', max_days=30, dry_run=True, now=now)
+        self.assertEqual(planned['deleted'], ['it_support_report_20251101_090000.json',
+                                              'it_support_report_20251210_090000.json'])
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 6)  # Manifest included
+        
+        result = catalog.apply_retention(7, 'daily', max_days=30, now=now)
+        self.assertEqual(result['compressed'], ['it_support_report_20251210_120000.json',
+                                                'it_support_report_20251210_180000.json'])
+        self.assertGreater(result['freed_bytes'], 0)
+        self.assertEqual(sorted(catalog.entries),
+                         ['it_support_report_20251210_120000.json.gz',
+                          'it_support_report_20251210_180000.json.gz',
+                          'it_support_report_20251219_100000.json'])
+        self.assertEqual(catalog.hosts(), ['web1', 'web2'])
+        
+        # Rollups are already compressed, so a second pass changes nothing
+        again = catalog.apply_retention(7, 'daily', max_days=30, now=now)
+        self.assertEqual((again['deleted'], again['compressed']), ([], []))
+
+
+
+class TestTrendAnalysis(unittest.TestCase):
+    """Test cases for multi-report trend analysis."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.paths = []
+        # /var grows 2% per day from 50%, RAM oscillates
+        for day in range(10):
+            report = {
+                'timestamp': f'2025-12-{day + 1:02d} 09:00:00',
+                'hostname': 'web1',
+                'checks': {
+                    'ram': {'percent_used': 40.0 + (day % 2) * 10},
+                    'disk_space': [
+                        {'device': '/dev/sda1', 'mountpoint': '/', 'percent_used': 30.0},
+                        {'device': '/dev/sda2', 'mountpoint': '/var',
+                         'percent_used': 50.0 + 2 * day},
+                    ],
+                }
+            }
+            path = os.path.join(self.tmpdir.name, f'it_support_report_{day}.json')
+            with open(path, 'w') as f:
+                json.dump(report, f)
+            self.paths.append(path)
+    
+    def check_trends(self, trends):
+        var = trends['Disk /var %']
+        self.assertEqual(var['count'], 10)
+        self.assertAlmostEqual(var['min'], 50.0)
+        self.assertAlmostEqual(var['max'], 68.0)
+        self.assertAlmostEqual(var['mean'], 59.0)
+        self.assertAlmostEqual(var['p95'], 67.1)
+        self.assertAlmostEqual(var['slope_per_day'], 2.0)
+        self.assertAlmostEqual(var['days_until_full'], 16.0)
+        
+        self.assertAlmostEqual(trends['Disk / %']['slope_per_day'], 0.0)
+        self.assertNotIn('days_until_full', trends['Disk / %'])
+        self.assertAlmostEqual(trends['RAM %']['mean'], 45.0)
+    
+    def test_analyze_trends_pure_python(self):
+        """Test trend statistics without NumPy."""
+        with patch.object(view_reports, 'np', None):
+            self.check_trends(view_reports.analyze_trends(reversed(self.paths)))
+    
+    @unittest.skipIf(view_reports.np is None, 'NumPy not installed')
+    def test_analyze_trends_numpy(self):
+        """Test trend statistics with NumPy."""
+        self.check_trends(view_reports.analyze_trends(self.paths))
+    
+    def test_display_trends_forecast(self):
+        """Test the capacity forecast output."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            view_reports.display_trends(self.paths)
+        self.assertIn('/var fills in ~16 days', output.getvalue())
+
+
+
+class TestFleetAggregator(unittest.TestCase):
+    """End-to-end tests with agent and aggregator on localhost."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.db_path = os.path.join(self.tmpdir.name, 'fleet.db')
+    
+    def make_report(self, hostname, minute):
+        return {
+            'timestamp': f'2025-12-18 10:{minute:02d}:00',
+            'hostname': hostname,
+            'os': 'Linux 6.1',
+            'checks': {'ram': {'total_gb': 16.0, 'available_gb': 8.0, 'used_gb': 8.0,
+                               'percent_used': 50.0}}
+        }
+    
+    def test_agents_post_over_reused_connection(self):
+        """Test that posted reports are batched into the store."""
+        aggregator = FleetAggregator('127.0.0.1', 0, self.db_path, batch_interval=0.05)
+        with aggregator:
+            host, port = aggregator.address
+            poster = ReportPoster(f'http://{host}:{port}/reports')
+            for minute in range(20):
+                self.assertEqual(poster.post(self.make_report('web1', minute)), 202)
+            poster.post([self.make_report(f'db{i}', 0) for i in range(5)])
+            poster.close()
+            stats = aggregator.stats()
+        
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['accepted'], 25)
+        
+        with HistoryStore(self.db_path) as store:
+            self.assertEqual(len(store.query('ram', host='web1')), 20)
+            self.assertEqual(len(store.hosts()), 6)
+    
+    def test_backpressure_when_queue_full(self):
+        """Test that a full ingest queue answers 503 and agents give up after retries."""
+        aggregator = FleetAggregator('127.0.0.1', 0, self.db_path, queue_size=2)
+        # Serve HTTP only, so nothing drains the queue
+        server_thread = threading.Thread(target=aggregator.server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            host, port = aggregator.address
+            poster = ReportPoster(f'http://{host}:{port}/reports', retries=1)
+            poster.post([self.make_report('web1', 0), self.make_report('web1', 1)])
+            with patch('time.sleep') as mock_sleep:
+                with self.assertRaises(ReportPostError):
+                    poster.post(self.make_report('web1', 2))
+            mock_sleep.assert_called_once_with(1.0)
+            poster.close()
+            self.assertEqual(aggregator.stats()['rejected'], 2)
+        finally:
+            aggregator.server.shutdown()
+            aggregator.server.server_close()
+            aggregator.store.close()
+    
+    def test_partially_accepted_batch_is_not_resent(self):
+        """Test that a retry after a partial accept only sends the rejected reports."""
+        aggregator = FleetAggregator('127.0.0.1', 0, self.db_path, queue_size=3)
+        server_thread = threading.Thread(target=aggregator.server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            host, port = aggregator.address
+            poster = ReportPoster(f'http://{host}:{port}/reports', retries=2)
+            poster.post([self.make_report('web1', 0), self.make_report('web1', 1)])
+            # The writer takes one report off the queue while the agent backs off
+            with patch('time.sleep', side_effect=lambda delay: aggregator.queue.get_nowait()):
+                self.assertEqual(poster.post([self.make_report('web1', 2),
+                                              self.make_report('web1', 3)]), 202)
+            poster.close()
+            
+            queued = [aggregator.queue.get_nowait()['timestamp'][-5:-3] for _ in range(3)]
+            self.assertEqual(queued, ['01', '02', '03'])
+            self.assertEqual(aggregator.stats()['accepted'], 4)
+        finally:
+            aggregator.server.shutdown()
+            aggregator.server.server_close()
+            aggregator.store.close()
+    
+    def test_malformed_report_does_not_discard_batch(self):
+        """Test that one report with incomplete records is skipped on its own."""
+        reports = [self.make_report(f'web{i}', 0) for i in range(5)]
+        bad = self.make_report('broken', 0)
+        bad['checks'] = {'disk_space': [{'mountpoint': '/'}]}
+        aggregator = FleetAggregator('127.0.0.1', 0, self.db_path, batch_interval=0.05)
+        output = io.StringIO()
+        with redirect_stdout(output), aggregator:
+            host, port = aggregator.address
+            poster = ReportPoster(f'http://{host}:{port}/reports')
+            poster.post(reports[:3] + [bad] + reports[3:])
+            poster.close()
+        
+        stats = aggregator.stats()
+        self.assertEqual((stats['written'], stats['skipped']), (5, 1))
+        self.assertIn('broken', output.getvalue())
+        with HistoryStore(self.db_path) as store:
+            self.assertEqual(store.hosts(), [f'web{i}' for i in range(5)])
+            self.assertEqual(len(store.query('ram')), 5)
+    
+    def test_invalid_report_rejected(self):
+        """Test that malformed payloads are refused without retries."""
+        with FleetAggregator('127.0.0.1', 0, self.db_path, batch_interval=0.05) as aggregator:
+            host, port = aggregator.address
+            poster = ReportPoster(f'http://{host}:{port}/reports')
+            with self.assertRaises(ReportPostError):
+                poster.post({'checks': {}})
+            poster.close()
+
+
+
+class TestMetricsExporter(unittest.TestCase):
+    """Test cases for the OpenMetrics exporter."""
+    
+    def test_render_openmetrics(self):
+        """Test rendering report data as OpenMetrics text."""
+        report = {'checks': {
+            'disk_space': [{'device': '/dev/sda1', 'mountpoint': '/', 'filesystem': 'ext4',
+                            'percent_used': 42.5}],
+            'cpu': {'usage_percent': 12.0, 'per_core_percent': [10.0, 14.0],
+                    'average_percent': {'1s': 12.0, '60s': 8.0}},
+            'ram': {'percent_used': 61.0},
+            'users': [{'name': 'a'}, {'name': 'b'}],
+            'network': {'connectivity_tests': [
+                {'host': '10.0.0.1', 'port': 443, 'description': 'API "v2"',
+                 'reachable': True, 'latency_ms': 12.5},
+                {'host': '10.0.0.2', 'port': 22, 'description': 'SSH',
+                 'reachable': False, 'latency_ms': None},
+            ]},
+        }}
+        text = render_openmetrics(report)
+        
+        self.assertIn('# TYPE it_support_disk_used_percent gauge', text)
+        self.assertIn('it_support_disk_used_percent{mountpoint="/",device="/dev/sda1",'
+                      'fstype="ext4"} 42.5', text)
+        self.assertIn('it_support_cpu_core_usage_percent{core="1"} 14.0', text)
+        self.assertIn('it_support_cpu_usage_average_percent{window="60s"} 8.0', text)
+        self.assertIn('it_support_logged_in_users 2.0', text)
+        self.assertIn('it_support_probe_latency_seconds{target="API \\"v2\\"",'
+                      'host="10.0.0.1",port="443"} 0.0125', text)
+        self.assertIn('it_support_probe_up{target="SSH",host="10.0.0.2",port="22"} 0.0', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+        self.assertEqual(text.count('# TYPE it_support_probe_up'), 1)
+    
+    def test_scrapes_serve_cached_snapshot(self):
+        """Test that scrapes never trigger the checks themselves."""
+        toolkit = ITSupportToolkit()
+        calls = []
+        
+        def check_ram():
+            calls.append(1)
+            toolkit._store_check('ram', {'percent_used': 33.0})
+        
+        toolkit.check_ram = check_ram
+        snapshot = MetricsSnapshot(toolkit, ttl=3600, checks=['check_ram'])
+        
+        with MetricsServer(snapshot, '127.0.0.1', 0) as server:
+            host, port = server.address
+            for _ in range(5):
+                with urllib.request.urlopen(f'http://{host}:{port}/metrics') as response:
+                    body = response.read().decode('utf-8')
+                    content_type = response.headers['Content-Type']
+        
+        self.assertEqual(len(calls), 1)
+        self.assertIn('it_support_ram_used_percent 33.0', body)
+        self.assertTrue(content_type.startswith('application/openmetrics-text'))
 
 
 if __name__ == '__main__':
@@ -1,73 +1,279 @@
 #!/usr/bin/env python3
 """
 Report Viewer - Simple utility to view generated IT support reports
+
+Reports compressed with gzip or xz (``.json.gz``, ``.txt.xz``, ...) are read
+transparently. ``--keep-days`` applies a retention policy to the report
+directory (see ``report_files.plan_retention``).
 """
 
 import os
+import re
 import sys
 import json
 from pathlib import Path
 from datetime import datetime
 
+from report_files import (COMPRESSIONS, DEFAULT_COMPRESSION, DEFAULT_KEEP_DAYS, DEFAULT_ROLLUP,
+                          ROLLUPS, compress_file, compression_of, open_report, plan_retention,
+                          strip_compression)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; trends fall back to pure Python
+    np = None
+
+
+# Persistent manifest of report metadata, kept next to the reports
+CATALOG_FILE = '.it_support_reports.json'
+CATALOG_VERSION = 1
+REPORT_PREFIX = 'it_support_report_'
+REPORT_FORMATS = {'.txt': 'txt', '.csv': 'csv', '.json': 'json', '.ndjson': 'ndjson'}
+DEFAULT_PAGE_SIZE = 20
+
+# Hostname is read from the first bytes of each report, never the whole file
+HEADER_BYTES = 4096
+HOSTNAME_PATTERNS = {
+    'txt': re.compile(r'^Hostname: (.*)$', re.MULTILINE),
+    'csv': re.compile(r'^Hostname,(.*?)\r?$', re.MULTILINE),
+    'json': re.compile(r'"hostname":\s*"((?:[^"\\]|\\.)*)"'),
+}
+# The NDJSON header record carries the hostname like a JSON report
+HOSTNAME_PATTERNS['ndjson'] = HOSTNAME_PATTERNS['json']
+FILENAME_TIMESTAMP = re.compile(r'(\d{8}_\d{6})')
 
-def list_reports():
-    """List all available report files."""
-    report_files = {
-        'txt': [],
-        'csv': [],
-        'json': []
+
+def report_format(name):
+    """Return 'txt', 'csv', 'json' or 'ndjson' for a (possibly compressed) report name, else None."""
+    return REPORT_FORMATS.get(Path(strip_compression(os.fspath(name))).suffix)
+
+
+def _read_report_metadata(path, report_format, stat):
+    """Extract host and timestamp for one report from its name and header."""
+    host = None
+    try:
+        with open_report(path) as f:
+            match = HOSTNAME_PATTERNS[report_format].search(f.read(HEADER_BYTES))
+        if match:
+            host = match.group(1).strip()
+    except (OSError, EOFError):
+        pass  # Unreadable, or a compressed report still being written
+    
+    match = FILENAME_TIMESTAMP.search(path.name)
+    try:
+        timestamp = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+    except (AttributeError, ValueError):
+        timestamp = datetime.fromtimestamp(stat.st_mtime)
+    
+    return {
+        'format': report_format,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'host': host,
+        'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S')
     }
+
+
+class ReportCatalog:
+    """
+    Persistent catalogue of report files in a directory.
     
-    current_dir = Path('.')
+    Metadata (format, size, mtime, host, timestamp) is cached in a manifest
+    file. The directory is only rescanned when its mtime changes, and then
+    only files not already in the manifest are stat'ed and read, so startup
+    cost does not grow with the number of reports.
+    """
+    
+    def __init__(self, directory='.'):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / CATALOG_FILE
+        self.dir_mtime = None
+        self.entries = {}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get('version') != CATALOG_VERSION:
+            return
+        self.dir_mtime = manifest.get('dir_mtime')
+        self.entries = manifest.get('entries', {})
     
-    for file in current_dir.glob('it_support_report_*'):
-        if file.suffix == '.txt':
-            report_files['txt'].append(file)
-        elif file.suffix == '.csv':
-            report_files['csv'].append(file)
-        elif file.suffix == '.json':
-            report_files['json'].append(file)
+    def _save(self):
+        manifest = {
+            'version': CATALOG_VERSION,
+            'dir_mtime': self.dir_mtime,
+            'entries': self.entries
+        }
+        created = not self.manifest_path.exists()
+        try:
+            # Rewrite in place: only creating the manifest changes the directory mtime
+            with open(self.manifest_path, 'w') as f:
+                json.dump(manifest, f)
+            if created:
+                manifest['dir_mtime'] = self.dir_mtime = os.stat(self.directory).st_mtime_ns
+                with open(self.manifest_path, 'w') as f:
+                    json.dump(manifest, f)
+        except OSError:
+            # A read-only directory just means no caching
+            pass
     
-    return report_files
+    def refresh(self, force=False):
+        """Bring the catalogue up to date; returns True if the directory was rescanned."""
+        dir_mtime = os.stat(self.directory).st_mtime_ns
+        if not force and dir_mtime == self.dir_mtime:
+            return False
+        
+        entries = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.startswith(REPORT_PREFIX):
+                    continue
+                entry_format = report_format(entry.name)
+                if entry_format is None:
+                    continue
+                
+                known = self.entries.get(entry.name)
+                if known is not None and not force:
+                    entries[entry.name] = known
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = _read_report_metadata(Path(entry.path),
+                                                            entry_format, stat)
+        
+        self.entries = entries
+        self.dir_mtime = dir_mtime
+        self._save()
+        return True
+    
+    def apply_retention(self, keep_days=DEFAULT_KEEP_DAYS, rollup=DEFAULT_ROLLUP,
+                        max_days=None, dry_run=False, now=None, compression=DEFAULT_COMPRESSION):
+        """
+        Thin out old reports: see ``report_files.plan_retention``.
+        
+        Rollups are compressed with ``compression`` ('gzip' or 'xz').
+        
+        Returns ``{'deleted': [...], 'compressed': [...], 'freed_bytes': n}``;
+        with ``dry_run`` nothing is changed and ``freed_bytes`` only counts
+        the deletions.
+        """
+        self.refresh()
+        delete, compress = plan_retention(self.entries, keep_days, rollup, max_days, now)
+        result = {'deleted': [], 'compressed': [], 'freed_bytes': 0}
+        
+        for name in delete:
+            path = self.directory / name
+            try:
+                size = path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+            except OSError:
+                continue
+            result['deleted'].append(name)
+            result['freed_bytes'] += size
+        
+        for name in compress:
+            path = self.directory / name
+            if dry_run:
+                result['compressed'].append(name)
+                continue
+            try:
+                size = path.stat().st_size
+                compressed = compress_file(path, compression)
+                result['freed_bytes'] += size - os.stat(compressed).st_size
+            except OSError:
+                continue
+            result['compressed'].append(name)
+        
+        if not dry_run and (result['deleted'] or result['compressed']):
+            self.refresh()
+        return result
+    
+    def hosts(self):
+        """Return the distinct hostnames seen in the catalogue."""
+        return sorted({entry['host'] for entry in self.entries.values() if entry['host']})
+    
+    def query(self, host=None, since=None, until=None, report_format=None,
+              offset=0, limit=None):
+        """
+        Return matching reports, newest first, as viewer report dicts.
+        
+        ``since``/``until`` are datetimes or 'YYYY-MM-DD[ HH:MM:SS]' strings
+        compared against the report timestamp.
+        """
+        if isinstance(since, datetime):
+            since = since.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(until, datetime):
+            until = until.strftime('%Y-%m-%d %H:%M:%S')
+        elif until and len(until) == 10:
+            until += ' 23:59:59'
+        
+        matches = []
+        for name, entry in self.entries.items():
+            if host is not None and entry['host'] != host:
+                continue
+            if report_format is not None and entry['format'] != report_format:
+                continue
+            if since and entry['timestamp'] < since:
+                continue
+            if until and entry['timestamp'] > until:
+                continue
+            matches.append((name, entry))
+        
+        matches.sort(key=lambda item: item[1]['mtime'], reverse=True)
+        end = None if limit is None else offset + limit
+        return [{
+            'file': self.directory / name,
+            'format': entry['format'].upper(),
+            'compression': compression_of(name),
+            'size': entry['size'],
+            'modified': datetime.fromtimestamp(entry['mtime']),
+            'host': entry['host'],
+            'timestamp': entry['timestamp']
+        } for name, entry in matches[offset:end]]
+
 
+def list_reports(directory='.', rescan=False):
+    """Return an up-to-date catalogue of the available report files."""
+    catalog = ReportCatalog(directory)
+    catalog.refresh(force=rescan)
+    return catalog
 
-def display_report_summary(report_files):
-    """Display a summary of available reports."""
+
+def display_report_summary(reports, page=0, page_size=DEFAULT_PAGE_SIZE):
+    """Display one page of the available reports."""
     print("=" * 60)
     print("AVAILABLE IT SUPPORT REPORTS")
     print("=" * 60)
     
-    all_reports = []
-    for format_type, files in report_files.items():
-        for file in files:
-            stat = file.stat()
-            modified = datetime.fromtimestamp(stat.st_mtime)
-            all_reports.append({
-                'file': file,
-                'format': format_type.upper(),
-                'size': stat.st_size,
-                'modified': modified
-            })
-    
-    if not all_reports:
+    if not reports:
         print("\nNo reports found in current directory.")
         print("Run the toolkit first: python it_support_toolkit.py")
         return None
     
-    # Sort by modified time (newest first)
-    all_reports.sort(key=lambda x: x['modified'], reverse=True)
+    pages = (len(reports) + page_size - 1) // page_size
+    page = max(0, min(page, pages - 1))
+    first = page * page_size
     
-    print(f"\nFound {len(all_reports)} report(s):\n")
+    print(f"\nFound {len(reports)} report(s) - page {page + 1} of {pages}:\n")
     
-    for idx, report in enumerate(all_reports, 1):
+    for idx, report in enumerate(reports[first:first + page_size], first + 1):
         size_kb = report['size'] / 1024
         print(f"{idx}. {report['file'].name}")
-        print(f"   Format: {report['format']} | "
+        compression = f" ({report['compression']})" if report.get('compression') else ""
+        print(f"   Format: {report['format']}{compression} | "
               f"Size: {size_kb:.2f} KB | "
+              f"Host: {report['host'] or 'unknown'} | "
               f"Modified: {report['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
         print()
     
-    return all_reports
+    return reports
 
 
 def view_txt_report(filepath):
@@ -76,7 +282,7 @@ def view_txt_report(filepath):
     print(f"VIEWING: {filepath.name}")
     print("=" * 60 + "\n")
     
-    with open(filepath, 'r') as f:
+    with open_report(filepath) as f:
         print(f.read())
 
 
@@ -86,7 +292,7 @@ def view_json_report(filepath):
     print(f"VIEWING: {filepath.name}")
     print("=" * 60 + "\n")
     
-    with open(filepath, 'r') as f:
+    with open_report(filepath) as f:
         data = json.load(f)
     
     print(f"Timestamp: {data['timestamp']}")
@@ -97,6 +303,9 @@ def view_json_report(filepath):
     if 'disk_space' in data['checks']:
         print("DISK SPACE:")
         for disk in data['checks']['disk_space']:
+            if disk.get('status', 'ok') != 'ok':
+                print(f"  {disk['device']} ({disk['mountpoint']}): {disk['status'].upper()}")
+                continue
             print(f"  {disk['device']} ({disk['mountpoint']}): "
                   f"{disk['used_gb']} GB / {disk['total_gb']} GB "
                   f"({disk['percent_used']}%)")
@@ -114,6 +323,13 @@ def view_json_report(filepath):
               f"({ram['percent_used']}%)")
         print()
     
+    if 'processes' in data['checks']:
+        print("TOP PROCESSES (CPU):")
+        for proc in data['checks']['processes'].get('top_cpu', []):
+            print(f"  {proc['pid']} {proc['name']}: {proc['cpu_percent']}% CPU, "
+                  f"{proc['rss_mb']} MB")
+        print()
+    
     if 'users' in data['checks'] and data['checks']['users']:
         print("LOGGED IN USERS:")
         for user in data['checks']['users']:
@@ -128,7 +344,7 @@ def view_csv_report(filepath):
     print(f"VIEWING: {filepath.name}")
     print("=" * 60 + "\n")
     
-    with open(filepath, 'r') as f:
+    with open_report(filepath, newline='') as f:
         # Read CSV and display in a simple format
         import csv
         reader = csv.reader(f)
@@ -144,14 +360,14 @@ def compare_reports(report1, report2):
     print("COMPARING REPORTS")
     print("=" * 60)
     
-    if not (report1.suffix == '.json' and report2.suffix == '.json'):
+    if not (report_format(report1) == 'json' and report_format(report2) == 'json'):
         print("\n⚠️  Comparison only works with JSON reports.")
         return
     
-    with open(report1, 'r') as f:
+    with open_report(report1) as f:
         data1 = json.load(f)
     
-    with open(report2, 'r') as f:
+    with open_report(report2) as f:
         data2 = json.load(f)
     
     print(f"\nReport 1: {data1['timestamp']}")
@@ -177,37 +393,231 @@ def compare_reports(report1, report2):
     # Compare Disk Space
     if 'disk_space' in data1['checks'] and 'disk_space' in data2['checks']:
         print("\nDisk Space Changes:")
+        # Bind mounts, btrfs subvolumes and tmpfs share device names; mountpoints do not
+        disks2 = {disk['mountpoint']: disk for disk in data2['checks']['disk_space']}
         for disk1 in data1['checks']['disk_space']:
-            for disk2 in data2['checks']['disk_space']:
-                if disk1['device'] == disk2['device']:
-                    diff = disk2['percent_used'] - disk1['percent_used']
-                    if abs(diff) > 0.1:  # Only show if changed
-                        arrow = "↑" if diff > 0 else "↓"
-                        print(f"  {disk1['device']}: {disk1['percent_used']}% → "
-                              f"{disk2['percent_used']}% ({arrow} {abs(diff):.1f}%)")
+            disk2 = disks2.get(disk1['mountpoint'])
+            if (disk2 is not None and disk1['percent_used'] is not None
+                    and disk2['percent_used'] is not None):
+                diff = disk2['percent_used'] - disk1['percent_used']
+                if abs(diff) > 0.1:  # Only show if changed
+                    arrow = "↑" if diff > 0 else "↓"
+                    print(f"  {disk1['device']} ({disk1['mountpoint']}): "
+                          f"{disk1['percent_used']}% → "
+                          f"{disk2['percent_used']}% ({arrow} {abs(diff):.1f}%)")
+
+
+def load_metric_series(report_paths):
+    """
+    Load JSON reports and build per-metric time series in one pass.
+    
+    Metrics are aligned across reports by name: disks by mountpoint and
+    probes by description. Returns ``{metric: ([timestamps], [values])}``
+    with timestamps in epoch seconds, sorted oldest first.
+    """
+    samples = {}
+    for path in report_paths:
+        try:
+            with open_report(path) as f:
+                data = json.load(f)
+            ts = datetime.strptime(data['timestamp'], '%Y-%m-%d %H:%M:%S').timestamp()
+        except (OSError, EOFError, ValueError, KeyError):
+            continue
+        
+        checks = data.get('checks', {})
+        points = []
+        if 'cpu' in checks:
+            points.append(('CPU %', checks['cpu'].get('usage_percent')))
+        if 'ram' in checks:
+            points.append(('RAM %', checks['ram'].get('percent_used')))
+        for disk in checks.get('disk_space', []):
+            points.append((f"Disk {disk['mountpoint']} %", disk.get('percent_used')))
+        for test in checks.get('network', {}).get('connectivity_tests', []):
+            points.append((f"Latency {test['description']} ms", test.get('latency_ms')))
+        
+        for metric, value in points:
+            if isinstance(value, (int, float)):
+                samples.setdefault(metric, []).append((ts, value))
+    
+    series = {}
+    for metric, points in samples.items():
+        points.sort()
+        series[metric] = ([t for t, _ in points], [v for _, v in points])
+    return series
+
+
+def _percentile(sorted_values, percent):
+    """Linear-interpolated percentile, matching numpy.percentile's default."""
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def trend_statistics(timestamps, values):
+    """
+    Return min, max, mean, p95 and the least-squares growth slope per day.
+    
+    Uses NumPy when it is installed.
+    """
+    count = len(values)
+    if np is not None:
+        v = np.asarray(values, dtype=float)
+        days = (np.asarray(timestamps, dtype=float) - timestamps[0]) / 86400
+        stats = {
+            'count': count,
+            'min': float(v.min()),
+            'max': float(v.max()),
+            'mean': float(v.mean()),
+            'p95': float(np.percentile(v, 95)),
+            'last': float(v[-1]),
+        }
+        spread = days - days.mean()
+        denominator = float((spread * spread).sum())
+        stats['slope_per_day'] = (float((spread * (v - v.mean())).sum()) / denominator
+                                  if denominator else 0.0)
+        return stats
+    
+    days = [(t - timestamps[0]) / 86400 for t in timestamps]
+    mean = sum(values) / count
+    mean_days = sum(days) / count
+    denominator = sum((d - mean_days) ** 2 for d in days)
+    numerator = sum((d - mean_days) * (v - mean) for d, v in zip(days, values))
+    return {
+        'count': count,
+        'min': min(values),
+        'max': max(values),
+        'mean': mean,
+        'p95': _percentile(sorted(values), 95),
+        'last': values[-1],
+        'slope_per_day': numerator / denominator if denominator else 0.0
+    }
+
+
+def analyze_trends(report_paths):
+    """Compute trend statistics for every metric across many JSON reports."""
+    trends = {}
+    for metric, (timestamps, values) in load_metric_series(report_paths).items():
+        stats = trend_statistics(timestamps, values)
+        if metric.startswith('Disk ') and stats['slope_per_day'] > 0:
+            stats['days_until_full'] = (100 - stats['last']) / stats['slope_per_day']
+        trends[metric] = stats
+    return trends
+
+
+def display_trends(report_paths):
+    """Print trend statistics for a set of JSON reports."""
+    print("\n" + "=" * 60)
+    print("TREND ANALYSIS")
+    print("=" * 60)
+    
+    json_paths = [path for path in report_paths if report_format(path) == 'json']
+    if len(json_paths) < 2:
+        print("\n⚠️  Trend analysis needs at least two JSON reports.")
+        return None
+    
+    trends = analyze_trends(json_paths)
+    print(f"\nAnalyzed {len(json_paths)} report(s)\n")
+    print(f"{'Metric':<30} {'Min':>7} {'Max':>7} {'Mean':>7} {'P95':>7} {'Slope/day':>10}")
+    for metric, stats in sorted(trends.items()):
+        print(f"{metric[:30]:<30} {stats['min']:>7.1f} {stats['max']:>7.1f} "
+              f"{stats['mean']:>7.1f} {stats['p95']:>7.1f} {stats['slope_per_day']:>+10.2f}")
+    
+    forecasts = [(stats['days_until_full'], metric) for metric, stats in trends.items()
+                 if 'days_until_full' in stats]
+    if forecasts:
+        print("\nCapacity Forecast:")
+        for days, metric in sorted(forecasts):
+            mountpoint = metric[len('Disk '):-len(' %')]
+            print(f"  ⚠️  {mountpoint} fills in ~{days:.0f} days")
+    return trends
 
 
 def main():
     """Main entry point for report viewer."""
-    report_files = list_reports()
-    reports = display_report_summary(report_files)
+    import argparse
     
-    if not reports:
+    parser = argparse.ArgumentParser(
+        description='View generated IT support reports',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                          # Browse all reports
+  %(prog)s --host myserver          # Only reports from one host
+  %(prog)s --since 2025-12-01 --until 2025-12-31
+  %(prog)s --host myserver --trend  # Trends across all JSON reports
+  %(prog)s --keep-days 7 --rollup hourly --max-days 90  # Thin out old reports
+        """
+    )
+    parser.add_argument('--dir', default='.',
+                       help='Directory containing the reports (default: .)')
+    parser.add_argument('--host', help='Only list reports from this host')
+    parser.add_argument('--since', help='Only list reports from this date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Only list reports up to this date (YYYY-MM-DD)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE,
+                       help=f'Reports per page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--rescan', action='store_true',
+                       help='Ignore the cached catalogue and rescan every report')
+    parser.add_argument('--trend', action='store_true',
+                       help='Print trend analysis for the matching JSON reports and exit')
+    parser.add_argument('--keep-days', type=float, metavar='DAYS',
+                       help='Apply retention and exit: keep every report for DAYS days, '
+                            'then one compressed report per --rollup period')
+    parser.add_argument('--rollup', choices=list(ROLLUPS), default=DEFAULT_ROLLUP,
+                       help=f'Period of the reports kept after --keep-days '
+                            f'(default: {DEFAULT_ROLLUP})')
+    parser.add_argument('--max-days', type=float, metavar='DAYS',
+                       help='With --keep-days, delete reports older than DAYS days')
+    parser.add_argument('--compress', choices=list(COMPRESSIONS), default=DEFAULT_COMPRESSION,
+                       help=f'With --keep-days, codec for the kept rollups '
+                            f'(default: {DEFAULT_COMPRESSION})')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='With --keep-days, only show what would be removed or compressed')
+    args = parser.parse_args()
+    
+    catalog = list_reports(args.dir, rescan=args.rescan)
+    if args.keep_days is not None:
+        result = catalog.apply_retention(args.keep_days, args.rollup, args.max_days,
+                                         dry_run=args.dry_run, compression=args.compress)
+        removed, compressed = ("Would remove", "compress") if args.dry_run else ("Removed", "compressed")
+        print(f"✓ {removed} {len(result['deleted'])} report(s), {compressed} "
+              f"{len(result['compressed'])}, freeing {result['freed_bytes'] / 1024:.1f} KB")
         return
+    reports = catalog.query(host=args.host, since=args.since, until=args.until)
     
-    print("=" * 60)
-    print("\nOptions:")
-    print("  1-N  : View report by number")
-    print("  c    : Compare two reports (JSON only)")
-    print("  q    : Quit")
-    print()
+    if args.trend:
+        display_trends([report['file'] for report in reports])
+        return
+    page = 0
     
     try:
-        choice = input("Select option: ").strip().lower()
+        while True:
+            if not display_report_summary(reports, page, args.page_size):
+                return
+            
+            print("=" * 60)
+            print("\nOptions:")
+            print("  1-N  : View report by number")
+            print("  n/p  : Next/previous page")
+            print("  c    : Compare two reports (JSON only)")
+            print("  t    : Trend analysis across all listed JSON reports")
+            print("  q    : Quit")
+            print()
+            
+            choice = input("Select option: ").strip().lower()
+            if choice == 'n':
+                page = min(page + 1, (len(reports) - 1) // args.page_size)
+            elif choice == 'p':
+                page = max(page - 1, 0)
+            else:
+                break
         
         if choice == 'q':
             return
         
+        elif choice == 't':
+            display_trends([report['file'] for report in reports])
+        
         elif choice == 'c':
             print("\nSelect first report:")
             idx1 = int(input("Report number: ").strip())
@@ -224,7 +634,7 @@ def main():
             if 1 <= idx <= len(reports):
                 report = reports[idx-1]
                 
-                if report['format'] == 'TXT':
+                if report['format'] in ('TXT', 'NDJSON'):
                     view_txt_report(report['file'])
                 elif report['format'] == 'JSON':
                     view_json_report(report['file'])